@@ -0,0 +1,206 @@
+"""Headless batch evaluation of complete workshop configurations.
+
+Each line of the input JSON Lines file is one configuration::
+
+    {"name": "workshop-1",
+     "scenarios": [{"name": "Autonomous", "likelihood": 40}, ...],
+     "personas": [{"name": "Adrian", "distance": 18, "bodyweight": 80, "weight": 30}, ...],
+     "population": 50000,
+     "preferences": [{"Car": ["3: Likely", 4, ...], "Bike": [...], ...}, ...],
+     "factors": {"CO2e": {"Car": 50, ...}, "MJ": {"Car": 0.8, ...}},
+     "walk_calories": 1, "bike_calories": 0.4,
+     "allocation": {"PT-MoD": {"PT": 0.7, "MoD": 0.3}, ...},
+     "interventions": [{"name": "E-Bike sharing service", "impacts": [{"Bike": ["+1: Slight increase", 1, ...]}, ...]}]}
+
+``preferences`` and the intervention ``impacts`` hold one table per scenario, mapping modes to one value per
+persona, given as codes (0 to 4 and -2 to +2) or as the labels of the editor tables. Modes left out count as
+"0: Unlikely" and "0: No change", an intervention without ``impacts`` changes nothing. ``allocation`` replaces rows
+of the mode allocation of Step 7 (shares of the impact modes per mode), either once for all scenarios or as a list
+with one (possibly empty) mapping per scenario. ``factors``, ``walk_calories``,
+``bike_calories``, ``allocation`` and ``interventions`` are optional and default to the values of Step 7 and no
+intervention.
+
+Usage::
+
+    python -m decision_tool.batch configs.jsonl results.parquet --workers 8
+
+The output has one row per configuration, intervention, scenario and persona with the individual and group impacts,
+the scenario likelihood and the persona weight. Likelihood-weighted totals as in Step 10c are the sum of the group
+impacts times likelihood / 100. It is a Parquet file (needs ``pyarrow``), or a CSV file if its name ends in ``.csv``.
+"""
+import argparse
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from decision_tool import engine
+
+BASE_VARIANT = 'No intervention'
+
+# Range of the preference codes and of the intervention deltas
+PREFERENCES = (0, 4)
+IMPACTS = (-2, 2)
+
+
+def _field(entry, key, name):
+    try:
+        return entry[key]
+    except (KeyError, TypeError):
+        raise ValueError(f'{name}: missing {key!r}')
+
+
+def _column(entries, key, name):
+    # One value of each scenario, persona or intervention, named by their number
+    return [_field(entry, key, f'{name} {j + 1}') for j, entry in enumerate(entries)]
+
+
+def _code(value, codes, name):
+    # Editor labels start with their code, e.g. "3: Likely" or "+1: Slight increase"
+    try:
+        code = float(value.split(':')[0]) if isinstance(value, str) else float(value)
+    except (ValueError, TypeError):
+        raise ValueError(f'{name}: {value!r} is not a code')
+    low, high = codes
+    if not code.is_integer() or not low <= code <= high:
+        raise ValueError(f'{name}: {value!r} is not a code from {low} to {high}')
+    return int(code)
+
+
+def _mode_table(table, no_pers, codes, name):
+    result = np.zeros((no_pers, len(engine.MODES)), dtype=np.int8)
+    for mode, values in table.items():
+        if mode not in engine.MODES:
+            raise ValueError(f'{name}: unknown mode {mode!r}')
+        if len(values) != no_pers:
+            raise ValueError(f'{name}: mode {mode!r} has {len(values)} values for {no_pers} personas')
+        result[:, engine.MODES.index(mode)] = [_code(value, codes, f'{name}, mode {mode!r}') for value in values]
+    return result
+
+
+def _allocation(rows, name):
+    allocation = engine.MODE_ALLOCATION.copy()
+    for mode, shares in rows.items():
+        if mode not in engine.MODES:
+            raise ValueError(f'{name}: unknown mode {mode!r} in the allocation')
+        unknown = set(shares) - set(engine.IMPACT_MODES)
+        if unknown:
+            raise ValueError(f'{name}: unknown impact modes {sorted(unknown)} in the allocation of {mode!r}')
+        allocation[engine.MODES.index(mode)] = [shares.get(impact_mode, 0) for impact_mode in engine.IMPACT_MODES]
+    return allocation
+
+
+def parse_config(config):
+    """Arrays of a configuration dict in the layout of the engine."""
+    name = config.get('name', 'configuration')
+    scenarios = _field(config, 'scenarios', name)
+    personas = _field(config, 'personas', name)
+    preferences = _field(config, 'preferences', name)
+    no_pers = len(personas)
+    if len(preferences) != len(scenarios):
+        raise ValueError(f'{name}: {len(preferences)} preference tables for {len(scenarios)} scenarios')
+
+    factors = config.get('factors', {})
+    allocation = config.get('allocation', {})
+    if isinstance(allocation, list) and len(allocation) != len(scenarios):
+        raise ValueError(f'{name}: {len(allocation)} allocations for {len(scenarios)} scenarios')
+    interventions = config.get('interventions', [])
+    delta = np.zeros((len(interventions), len(scenarios), no_pers, len(engine.MODES)), dtype=np.int8)
+    interv_names = _column(interventions, 'name', f'{name}, intervention')
+    for k, intervention in enumerate(interventions):
+        tables = intervention.get('impacts', [])
+        if tables and len(tables) != len(scenarios):
+            raise ValueError(f'{name}, {interv_names[k]}: {len(tables)} impact tables for {len(scenarios)} scenarios')
+        for i, table in enumerate(tables):
+            delta[k, i] = _mode_table(table, no_pers, IMPACTS, f'{name}, {interv_names[k]}')
+
+    return {
+        'name': name,
+        'scenarios': _column(scenarios, 'name', f'{name}, scenario'),
+        'personas': _column(personas, 'name', f'{name}, persona'),
+        'variants': [BASE_VARIANT] + interv_names,
+        'likelihood': np.array(_column(scenarios, 'likelihood', f'{name}, scenario'), dtype=float),
+        'distance': np.array(_column(personas, 'distance', f'{name}, persona'), dtype=float),
+        'bodyweight': np.array(_column(personas, 'bodyweight', f'{name}, persona'), dtype=float),
+        'weights': np.array(_column(personas, 'weight', f'{name}, persona'), dtype=float),
+        'no_people': _field(config, 'population', name),
+        'pref': np.stack([_mode_table(table, no_pers, PREFERENCES, name) for table in preferences]),
+        'delta': delta,
+        'factors': np.array([[factors.get(row, {}).get(mode, default)
+                              for mode, default in zip(engine.IMPACT_MODES, engine.FACTORS[row])]
+                             for row in ('CO2e', 'MJ')], dtype=float),
+        'walk_calories': config.get('walk_calories', engine.WALK_CALORIES),
+        'bike_calories': config.get('bike_calories', engine.BIKE_CALORIES),
+        'allocation': (np.stack([_allocation(rows, name) for rows in allocation]) if isinstance(allocation, list)
+                       else _allocation(allocation, name)),
+    }
+
+
+def evaluate(config):
+    """Long-format results of one configuration dict, evaluated as in Steps 8 and 10."""
+    arrays = parse_config(config)
+    pref = np.concatenate([arrays['pref'][np.newaxis], engine.apply_intervention(arrays['pref'], arrays['delta'])])
+    dist = engine.distance_split(pref, arrays['distance'], allocation=arrays['allocation'])
+    ind = engine.impacts(dist, arrays['factors'], arrays['bodyweight'], arrays['walk_calories'],
+                         arrays['bike_calories'])
+    group = engine.group_totals(ind, arrays['weights'], arrays['no_people'])
+
+    no_var, no_scen, no_pers = pref.shape[:3]
+    result = pd.DataFrame({
+        'config': arrays['name'],
+        'intervention': np.repeat(arrays['variants'], no_scen * no_pers),
+        'scenario': np.tile(np.repeat(arrays['scenarios'], no_pers), no_var),
+        'persona': np.tile(arrays['personas'], no_var * no_scen),
+        'likelihood': np.tile(np.repeat(arrays['likelihood'], no_pers), no_var),
+        'weight': np.tile(arrays['weights'], no_var * no_scen),
+    })
+    for indicator in engine.INDICATORS:
+        result[indicator] = ind[indicator].reshape(-1)
+    for indicator in engine.INDICATORS:
+        result[f'{indicator} group'] = group[indicator].reshape(-1)
+    return result
+
+
+def read_configs(path):
+    """Configuration dicts of a JSON Lines file, blank lines are skipped."""
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def run(configs, workers=None, chunksize=4):
+    """Evaluate configurations in a process pool and concatenate the results in input order."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return pd.concat(pool.map(evaluate, configs, chunksize=chunksize), ignore_index=True)
+
+
+def write(results, path):
+    """Write the results to ``path``, a CSV file if it ends in .csv and a Parquet file otherwise."""
+    if path.lower().endswith('.csv'):
+        results.to_csv(path, index=False)
+        return
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise ValueError('Batch: Parquet files need the pyarrow package (pip install pyarrow), or write a .csv file')
+    results.to_parquet(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Evaluate decision tool configurations from a JSON Lines file.')
+    parser.add_argument('configs', help='JSON Lines file with one configuration per line')
+    parser.add_argument('output', help='Parquet file for the results, or CSV file if it ends in .csv')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (default: CPU count)')
+    args = parser.parse_args(argv)
+
+    try:
+        results = run(read_configs(args.configs), workers=args.workers)
+        write(results, args.output)
+    except ValueError as error:
+        parser.exit(1, f'Error: {error}\n')
+    # The command line reports what was written, the functions above only return their results
+    print(f'{results["config"].nunique()} configurations, {len(results)} rows written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
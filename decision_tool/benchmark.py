@@ -0,0 +1,313 @@
+"""Timings of the pipeline stages and of a full run of the interface script.
+
+Usage::
+
+    python -m decision_tool.benchmark benchmark.json --sizes 2x2 4x4 8x8 16x64 32x256 --repeat 5
+    python -m decision_tool.benchmark benchmark.json --compare previous.json
+
+Each size ``SxP`` times the stages on synthetic inputs with ``S`` scenarios and ``P`` personas (and
+``--interventions`` interventions):
+
+    preference parsing   editor tables of Step 6 to codes
+    modal split          modal split and allocation to the impact modes (Step 8a)
+    indicators           individual CO2e, energy and calories
+    aggregation          group and likelihood-weighted totals and the extremes of the written analysis
+    interventions        intervention deltas applied to the preferences of all scenarios
+    chart specs          results dataset and the Vega-Lite specs of the Step 8 charts
+    full script          one run of ``streamlit_app.py`` with all steps shown (sizes up to the slider limit of 8)
+
+The first run of the script fills the caches of the pipeline stages, it is reported as ``full script (first run)``,
+the following runs as ``full script``. With ``--memory N`` the script is also run in ``N`` sessions side by side, and
+the memory each session keeps between runs (its session state) and the peak of a rerun are recorded. The output is a
+JSON file with the environment and one record per stage and size::
+
+    {"label": "...", "created": "2024-01-01T12:00:00", "python": "3.11.7", "numpy": "1.24.4", ...,
+     "results": [{"stage": "modal split", "scenarios": 4, "personas": 4, "interventions": 2, "repeat": 5,
+                  "best": 0.00012, "median": 0.00013}, ...],
+     "memory": [{"scenarios": 4, "personas": 4, "interventions": 2, "sessions": 5, "per session": 271312,
+                 "rerun peak": 817545}, ...]}
+
+``--compare`` prints the ratio of the median times (and of the memory) to those of an earlier file and flags the
+stages that got slower (or larger) by more than ``--threshold``.
+"""
+import argparse
+import datetime
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import threading
+import time
+import tracemalloc
+import warnings
+
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from decision_tool import charts, engine, ordinal, summary
+
+SIZES = ['2x2', '4x4', '8x8', '16x64', '32x256']
+
+# Largest number of scenarios and personas the sliders of the interface allow
+SCRIPT_LIMIT = 8
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'streamlit_app.py')
+
+
+def inputs(no_scen, no_pers, no_interv=2, seed=0):
+    """Synthetic inputs of the pipeline with ``no_scen`` scenarios, ``no_pers`` personas and ``no_interv``
+    interventions."""
+    rng = np.random.default_rng(seed)
+    pref = rng.integers(0, 5, (no_scen, no_pers, len(engine.MODES)), dtype=np.int8)
+    weights = rng.random(no_pers)
+    likelihood = rng.random(no_scen)
+    return {
+        'pref': pref,
+        'tables': [ordinal.PREFERENCE.table(table, [f'P{i + 1}' for i in range(no_pers)], engine.MODES)
+                   for table in pref],
+        'delta': rng.integers(-1, 2, (no_interv, no_scen, no_pers, len(engine.MODES)), dtype=np.int8),
+        'distance': rng.uniform(1, 60, no_pers),
+        'bodyweight': rng.uniform(50, 90, no_pers),
+        'weights': weights / weights.sum() * 100,
+        'likelihood': likelihood / likelihood.sum() * 100,
+        'factors': np.array([engine.FACTORS[key] for key in engine.FACTORS], dtype=float),
+        'allocation': np.broadcast_to(engine.MODE_ALLOCATION, (no_scen,) + engine.MODE_ALLOCATION.shape),
+        'scenarios': [f'S{i + 1}' for i in range(no_scen)],
+        'personas': [f'P{i + 1}' for i in range(no_pers)],
+    }
+
+
+def stages(data):
+    """One function per pipeline stage on ``data``, in pipeline order; each stage keeps its result for the next."""
+    state = {}
+
+    def parse():
+        state['pref'] = np.stack([ordinal.PREFERENCE.codes(table, engine.MODES) for table in data['tables']])
+
+    def split():
+        state['dist'] = engine.distance_split(state['pref'], data['distance'], allocation=data['allocation'])
+
+    def indicators():
+        state['ind'] = engine.impacts(state['dist'], data['factors'], data['bodyweight'], engine.WALK_CALORIES,
+                                      engine.BIKE_CALORIES)
+
+    def aggregate():
+        state['group'] = engine.group_totals(state['ind'], data['weights'], 50000)
+        engine.scenario_totals(state['group'], data['likelihood'])
+        for indicator in engine.INDICATORS:
+            summary.extremes(state['ind'][indicator])
+            summary.extremes(state['group'][indicator])
+
+    def interventions():
+        engine.apply_intervention(state['pref'], data['delta'])
+
+    def chart_specs():
+        frame = charts.results_frame(state['dist'][np.newaxis], {k: v[np.newaxis] for k, v in state['ind'].items()},
+                                     {k: v[np.newaxis] for k, v in state['group'].items()}, [data['scenarios']],
+                                     data['scenarios'], data['personas'])
+        # Streamlit sends the data of a chart without a row limit
+        with alt.data_transformers.enable('default', max_rows=None):
+            charts.modal_share_chart(frame, data['scenarios'][0]).to_dict()
+            charts.impact_chart(frame, 'CO2e', 'individual', data['scenarios'],
+                                charts.shades(charts.COLOURS, len(data['scenarios']))).to_dict()
+
+    return {
+        'preference parsing': parse,
+        'modal split': split,
+        'indicators': indicators,
+        'aggregation': aggregate,
+        'interventions': interventions,
+        'chart specs': chart_specs,
+    }
+
+
+def script(no_scen, no_pers, no_interv=2, path=SCRIPT):
+    """Function running the interface script without a server, with the scenario, persona and intervention sliders
+    set."""
+    import streamlit as st
+
+    with open(path) as file:
+        code = compile(file.read(), path, 'exec')
+    sizes = {'no-scenarios': no_scen, 'no-personas': no_pers, 'no-interventions': no_interv}
+
+    def run():
+        slider = st.slider
+        cwd = os.getcwd()
+        # The sliders of the sizes return the benchmark size instead of their default
+        st.slider = lambda *args, key=None, **kwargs: sizes[key] if key in sizes else slider(*args, key=key,
+                                                                                               **kwargs)
+        os.chdir(os.path.dirname(path))
+        # Streamlit warns about the missing server on every cache and widget
+        logging.disable(logging.WARNING)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                exec(code, {'__name__': '__main__', '__file__': path})
+        finally:
+            st.slider = slider
+            os.chdir(cwd)
+            logging.disable(logging.NOTSET)
+    return run
+
+
+def session(func, number=0):
+    """Function running ``func`` (see ``script``) as a run of its own session, which keeps its state between runs."""
+    from streamlit.proto.WidgetStates_pb2 import WidgetStates
+    from streamlit.runtime.scriptrunner.script_run_context import ScriptRunContext, add_script_run_ctx
+    from streamlit.runtime.state import SafeSessionState, SessionState
+    from streamlit.runtime.uploaded_file_manager import UploadedFileManager
+
+    state = SessionState()
+    ctx = ScriptRunContext(session_id=f'benchmark-{number}', _enqueue=lambda msg: None, query_string='',
+                           session_state=SafeSessionState(state), uploaded_file_mgr=UploadedFileManager(),
+                           page_script_hash='', user_info={'email': 'test@example.com'})
+
+    def run():
+        ctx.reset()
+        state.on_script_will_rerun(WidgetStates())
+        add_script_run_ctx(threading.current_thread(), ctx)
+        func()
+        state.on_script_finished(ctx.widget_ids_this_run)
+    return run
+
+
+def sessions(no_scen, no_pers, no_interv=2, count=5, path=SCRIPT):
+    """Memory record of ``count`` sessions of the interface script: bytes kept per session after its runs and the
+    median peak of a rerun."""
+    func = script(no_scen, no_pers, no_interv, path)
+    # The first session fills the caches of the pipeline stages, which all sessions share
+    warm = session(func)
+    warm()
+    warm()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        runs, peaks = [], []
+        for number in range(1, count + 1):
+            run = session(func, number)
+            run()
+            gc.collect()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            run()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+            runs.append(run)
+        gc.collect()
+        kept = tracemalloc.get_traced_memory()[0] - base
+    finally:
+        tracemalloc.stop()
+    return {'scenarios': no_scen, 'personas': no_pers, 'interventions': no_interv, 'sessions': count,
+            'per session': kept // count, 'rerun peak': int(statistics.median(peaks))}
+
+
+def timings(func, repeat):
+    """Run times of ``repeat`` calls of ``func`` in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def _record(stage, no_scen, no_pers, no_interv, times):
+    return {'stage': stage, 'scenarios': no_scen, 'personas': no_pers, 'interventions': no_interv,
+            'repeat': len(times), 'best': min(times), 'median': statistics.median(times)}
+
+
+def run(sizes=SIZES, no_interv=2, repeat=5, script_repeat=3, path=SCRIPT):
+    """Benchmark records of all stages and sizes (``'SxP'`` strings or ``(S, P)`` pairs)."""
+    results = []
+    for size in sizes:
+        no_scen, no_pers = map(int, size.split('x')) if isinstance(size, str) else size
+        funcs = stages(inputs(no_scen, no_pers, no_interv))
+        # Stages run in order in every repetition, each one reads the result of the previous stage
+        times = {stage: [] for stage in funcs}
+        for _ in range(repeat):
+            for stage, func in funcs.items():
+                times[stage].extend(timings(func, 1))
+        results.extend(_record(stage, no_scen, no_pers, no_interv, values) for stage, values in times.items())
+
+        if script_repeat and no_scen <= SCRIPT_LIMIT and no_pers <= SCRIPT_LIMIT:
+            func = script(no_scen, no_pers, no_interv, path)
+            results.append(_record('full script (first run)', no_scen, no_pers, no_interv, timings(func, 1)))
+            results.append(_record('full script', no_scen, no_pers, no_interv, timings(func, script_repeat)))
+    return results
+
+
+def environment(label=''):
+    """Versions and machine the benchmark ran on."""
+    import streamlit
+    return {
+        'label': label,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'streamlit': streamlit.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+    }
+
+
+def compare(old, new, threshold=1.2):
+    """Median times of ``new`` against ``old`` benchmark results per stage and size, slowest change first; the memory
+    records of both are compared as stages ``memory per session`` and ``memory rerun peak``."""
+    keys = ['stage', 'scenarios', 'personas', 'interventions']
+
+    def records(result):
+        table = pd.DataFrame(result['results'], columns=keys + ['median'])
+        memory = pd.DataFrame(result.get('memory', []), columns=keys[1:] + ['per session', 'rerun peak'])
+        return pd.concat([table] + [memory[keys[1:]].assign(stage=f'memory {column}', median=memory[column])
+                                    for column in ['per session', 'rerun peak']], ignore_index=True)
+
+    table = records(old)[keys + ['median']].merge(records(new)[keys + ['median']], on=keys, suffixes=(' old', ' new'))
+    table['ratio'] = table['median new'] / table['median old']
+    table['slower'] = table['ratio'] > threshold
+    return table.sort_values('ratio', ascending=False, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time the pipeline stages and the interface script.')
+    parser.add_argument('output', help='JSON file for the results')
+    parser.add_argument('--sizes', nargs='+', default=SIZES, help='sizes as SCENARIOSxPERSONAS (default: %(default)s)')
+    parser.add_argument('--interventions', type=int, default=2, help='number of interventions (default: 2)')
+    parser.add_argument('--repeat', type=int, default=5, help='repetitions per stage (default: 5)')
+    parser.add_argument('--script-repeat', type=int, default=3,
+                        help='runs of the interface script after the first one, 0 to skip it (default: 3)')
+    parser.add_argument('--memory', type=int, default=0, metavar='SESSIONS',
+                        help='sessions of the interface script to measure the memory of, 0 to skip it (default: 0)')
+    parser.add_argument('--label', default='', help='name of the version under test')
+    parser.add_argument('--compare', help='earlier results to compare the medians with')
+    parser.add_argument('--threshold', type=float, default=1.2,
+                        help='ratio of the medians above which a stage counts as slower (default: 1.2)')
+    args = parser.parse_args(argv)
+
+    result = dict(environment(args.label), results=run(args.sizes, args.interventions, args.repeat,
+                                                       args.script_repeat))
+    if args.memory:
+        result['memory'] = [sessions(no_scen, no_pers, args.interventions, args.memory)
+                            for no_scen, no_pers in (map(int, size.split('x')) for size in args.sizes)
+                            if no_scen <= SCRIPT_LIMIT and no_pers <= SCRIPT_LIMIT]
+    with open(args.output, 'w') as file:
+        json.dump(result, file, indent=1)
+    table = pd.DataFrame(result['results'])
+    print(table.pivot_table(index='stage', columns=['scenarios', 'personas'], values='median', sort=False)
+          .to_string(float_format=lambda value: f'{value * 1000:.2f}'), '\n(median ms)')
+    if result.get('memory'):
+        print(pd.DataFrame(result['memory']).to_string(index=False), '\n(bytes)')
+
+    if args.compare:
+        with open(args.compare) as file:
+            changes = compare(json.load(file), result, args.threshold)
+        print(changes.to_string(index=False, float_format=lambda value: f'{value:.4g}'))
+        if changes['slower'].any():
+            print(f'{int(changes["slower"].sum())} stages are slower by more than {args.threshold:g}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Results dataset and Altair charts of Steps 8 and 10.
+
+The results of a step are held in one long frame with a row per variant, scenario and persona. Each chart is a view
+on a slice of it: the scenario or indicator is picked with a Streamlit selector, so a chart only carries the columns
+and rows it shows and its size does not grow with the number of indicators or charts.
+"""
+import altair as alt
+import numpy as np
+import pandas as pd
+
+from decision_tool import engine
+
+# One colour per scenario (Step 8) or per impact mode (modal share charts)
+COLOURS = ['#193f5a', '#db666e', '#eca83e', '#62548e', '#e18054', '#c65a86', '#344c79', '#975792']
+
+
+def shades(colours, n, lightest=0.65):
+    """``n`` shades per colour, from the colour itself towards white, listed colour by colour.
+
+    Used to colour the base scenario and its intervention variants in the same hue.
+    """
+    result = []
+    for colour in colours:
+        rgb = [int(colour[i:i + 2], 16) for i in (1, 3, 5)]
+        for k in range(n):
+            mix = lightest * k / (n - 1) if n > 1 else 0
+            result.append('#' + ''.join(f'{round(c + (255 - c) * mix):02x}' for c in rgb))
+    return result
+
+
+# Axis and chart titles per indicator for individual and group values
+TITLES = {
+    'individual': {
+        'CO2e': ('CO2 equivalent in kg', 'Daily emissions in CO2e per persona across scenarios'),
+        'Energy': ('Energy in mega joule', 'Daily energy demand in MJ per persona across scenarios'),
+        'Calories': ('Calories burned during commute', 'Daily calories burned per persona across scenarios'),
+    },
+    'group': {
+        'CO2e': ('CO2e per group and scenario in tons (t)', 'CO2 equivalent in tons for aggregated persona group'),
+        'Energy': ('Energy demand per group and scenario in giga joule', 'Energy demand in giga joule (MJ*1000)'),
+        'Calories': ('Calories burned per group and scenario', 'Pizzas burned per persona group (1 pizza = 1000 cal)'),
+    },
+    'annual': {
+        'CO2e': ('CO2e per year in tons (t)', 'Annual CO2 equivalent in tons of the population'),
+        'Energy': ('Energy demand per year in giga joule', 'Annual energy demand in giga joule of the population'),
+        'Calories': ('Pizzas burned per year', 'Annual pizzas burned by the population (1 pizza = 1000 cal)'),
+    },
+    'cumulative': {
+        'CO2e': ('CO2e up to the year in tons (t)', 'Cumulative CO2 equivalent in tons of the population'),
+        'Energy': ('Energy demand up to the year in giga joule', 'Cumulative energy demand in giga joule'),
+        'Calories': ('Pizzas burned up to the year', 'Cumulative pizzas burned by the population'),
+    },
+}
+
+
+def results_frame(dist, individual, group, labels, scenarios, personas):
+    """Long frame of ``[variant, scenario, persona]`` results.
+
+    Holds the chart ``Label`` of each variant and scenario (``labels[variant][scenario]``), the kilometres per impact
+    mode and the individual and group impacts (columns ``CO2e``, ``CO2e group``, ...).
+    """
+    no_var, no_scen, no_pers = np.shape(individual['CO2e'])
+    frame = pd.DataFrame({
+        'Label': np.repeat(np.ravel(labels), no_pers),
+        'Scenario': np.tile(np.repeat(scenarios, no_pers), no_var),
+        'Persona': np.tile(personas, no_var * no_scen),
+    })
+    for j, mode in enumerate(engine.IMPACT_MODES):
+        frame[mode] = np.asarray(dist)[..., j].reshape(-1)
+    for indicator in engine.INDICATORS:
+        frame[indicator] = np.asarray(individual[indicator]).reshape(-1)
+        frame[f'{indicator} group'] = np.asarray(group[indicator]).reshape(-1)
+    return frame
+
+
+def _style(chart, title, width):
+    return chart.properties(
+        width=width,
+        title={
+            'text': title,
+            'fontSize': 16,
+            'fontWeight': 'bold',
+            'anchor': 'start',
+            'offset': 20}
+    ).configure_axis(
+        grid=False,
+        labelFontSize=12,
+        titleFontSize=14
+    )
+
+
+def modal_share_chart(frame, scenario, width=140):
+    """Kilometres per impact mode and persona in one scenario."""
+    data = frame.loc[frame['Scenario'] == scenario, ['Persona'] + engine.IMPACT_MODES]
+    data = data.melt('Persona', var_name='Mode', value_name='km')
+    chart = alt.Chart(data).mark_bar().encode(
+        x=alt.X('Mode:N', sort=engine.IMPACT_MODES,
+                axis=alt.Axis(title=None, labelAngle=0, labelPadding=5, labelFlush=False, tickCount=4, labels=False)),
+        y=alt.Y('km:Q', axis=alt.Axis(title='Kilometres')),
+        color=alt.Color('Mode:N', scale=alt.Scale(domain=engine.IMPACT_MODES, range=COLOURS)),
+        column=alt.Column('Persona:N', sort=None, header=alt.Header(labelOrient='bottom', title=None))
+    )
+    return _style(chart, f'Modal share in km for {scenario}', width)
+
+
+def impact_chart(frame, indicator, level, domain, colours, width=140, labels=False):
+    """Individual (``level='individual'``) or group impacts of one indicator per persona and chart label."""
+    column = indicator if level == 'individual' else f'{indicator} group'
+    axis_title, title = TITLES[level][indicator]
+    chart = alt.Chart(frame[['Label', 'Persona', column]]).mark_bar().encode(
+        x=alt.X('Label:N', sort=list(domain),
+                axis=alt.Axis(title=None, labelAngle=-90 if labels else 0, labelPadding=5, labelFlush=False,
+                              tickCount=4, labels=labels)),
+        y=alt.Y(f'{column}:Q', axis=alt.Axis(title=axis_title)),
+        color=alt.Color('Label:N', title='Scenario', scale=alt.Scale(domain=list(domain), range=colours)),
+        column=alt.Column('Persona:N', sort=None, header=alt.Header(labelOrient='bottom', title=None))
+    )
+    return _style(chart, title, width)
+
+
+def trajectory_chart(frame, indicator, level, scenario, domain, colours, width=600):
+    """Annual (``level='annual'``) or cumulative totals of one indicator per year, one line per intervention, in one
+    scenario of a ``trajectory.frame``."""
+    column = indicator if level == 'annual' else f'{indicator} cumulative'
+    axis_title, title = TITLES[level][indicator]
+    data = frame.loc[frame['Scenario'] == scenario, ['Intervention', 'Year', column]]
+    chart = alt.Chart(data).mark_line(point=True).encode(
+        x=alt.X('Year:O', axis=alt.Axis(title=None, labelAngle=0)),
+        y=alt.Y(f'{column}:Q', axis=alt.Axis(title=axis_title)),
+        color=alt.Color('Intervention:N', sort=list(domain), scale=alt.Scale(domain=list(domain), range=colours)),
+    )
+    return _style(chart, title, width)
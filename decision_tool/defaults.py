@@ -0,0 +1,265 @@
+"""Default inputs of the interface, loaded once per server process and shared by all sessions.
+
+The default tables are held as read-only int8 code arrays (see ``ordinal``) and tuples of texts instead of being
+built as label literals in every run. Values beyond the defaults (e.g. a fifth persona) start empty or unlikely.
+
+``share`` interns the default frames of the editor tables, so that all sessions with the same names and sizes hold
+the same object. A session keeps the values of its inputs as a ``diff`` against their shared default: nothing for
+unchanged inputs, the changed cells for tables and the value itself for anything else. ``patch`` restores the value.
+Shared objects are never changed in place; ``patch`` and the editor tables work on copies.
+"""
+import collections
+import threading
+
+import numpy as np
+import pandas as pd
+
+from decision_tool import engine
+
+
+def _frozen(values):
+    values.setflags(write=False)
+    return values
+
+
+# Scenarios of Step 1: name, description and characteristics U1-U4 as codes 1 (low) to 4 (very high)
+SCENARIOS = (
+    ('S1: 2030 | Saclay 2.0',
+     'Continuation of today’s development. The Saclay Plateau today is dominated by universities '
+     'and technology-related institutions. Some residential buildings and other functions '
+     'exist and are growing. Nevertheless, on weekend or holiday periods, '
+     'the plateau remains mostly empty. Saclay 2.0 would be the continuation of the '
+     'current growth. More university and technology functions would grow, complemented by '
+     'more residential buildings. Nevertheless, by 2030, '
+     'the character of the plateau remains to be largely linked to university’s seasonality and '
+     'depending on the incoming commuters, primarily between Tuesday and Thursday and '
+     'barely staying or utilising other functions on the plateau.'),
+    ('S2: 2030 | Paris 2.0',
+     'High-density, mixed-use neighbourhood. The second scenario is more optimistic on the '
+     'integrated development of the plateau. It assumes that a large number of residential'
+     ' developments, going further than only student and international researcher housing, '
+     'adds a critical mass of population density to allow for a variety of other functions to '
+     'arise and remain active even in holiday seasons or weekends.'),
+    ('S3: 2030 | Rural Campus',
+     'Low-density, low diversity rural district. This scenario describes mostly the plateau as it '
+     'has been since the 1970s. While more offices and universities are added, its functions and '
+     'character remains primarily rural. Residential functions, as well as the accompanying '
+     'other functions, remain limited and their growth stagnates, maintaining primarily the status '
+     'quo of activity and functional mix.'),
+    ('S4: 2030 | Village Campus',
+     'High-density active core, surrounded by low-density. As a mix between the scenario '
+     '‘Paris 2.0’ and ‘Rural Campus’, this scenario is defined by overall low density and '
+     'restricted developments. However, it has modern yet traditional French village cores with '
+     'high level of mixed-use, walkability, and a range of bars and restaurants for students and '
+     'other inhabitants of the plateau.'),
+)
+CHARACTERISTICS = _frozen(np.array([[3, 1, 4, 3],
+                                    [4, 4, 4, 4],
+                                    [2, 1, 1, 2],
+                                    [2, 4, 2, 3]] + [[2, 2, 2, 2]] * 4, dtype=np.int8))
+
+UNCERTAINTIES = (
+    ('Intermodality', 'Ability to use various modes, e.g., metro, bus, and shared bikes.'),
+    ('Mixed Use', 'Mix of functions, e.g., only universities or a mix with shops, bars, housing.'),
+    ('Density', 'Population density, i.e. how many people live and work close to each other.'),
+    ('Public Transport', 'Refers to the service level, e.g., schedule frequency, network density.'),
+)
+
+# Personas of Step 2: name, description and daily distance (km) and bodyweight (kg)
+PERSONAS = (
+    ('Jacqueline',
+     'Jacqueline is a French woman aged 40 who works full-time at a technology company as a '
+     'manager, exercises daily and stays healthy. She appreciates her privacy and has flexible '
+     'work schedules. She doesn’t want to walk too much because she carries lots of bags around, '
+     'she prefers to cycle. She has no children and no partner and can be described as a '
+     'workaholic. She is a bit concerned with sustainability issues.'),
+    ('Thierry',
+     'Thierry is a 67-year-old man who visits the campus during the day to work. He is a professor '
+     'and will soon be retired. He comes to the plateau from time to time to give guest lectures '
+     'and lives inside Paris. He is not in charge of children. He usually uses public transport '
+     'but lately is struggling due to a leg injury. He is very concerned by sustainability.'),
+    ('Adrian',
+     'Adrian is a 35-year-old French man working part-time at a local supermarket in an '
+     'administrative function. He is in charge of two kindergarten and one primary school child. '
+     'He has a medium income. He has many time constraints and lots of activities and scheduled '
+     'meetings. He uses his car due to his complex daily movements and no possibility to deal '
+     'with delays. Sustainability is not the priority in his choices due to several constraints.'),
+    ('Rui',
+     'Rui is a 21-year-old female. She is an international undergrad exchange student from China, '
+     'studying at CentraleSupélec. She lives on the campus in one of the student residencies. '
+     'She mainly moves between her daily activities by walking and cycling because she cares about '
+     'sustainability and has not many alternatives. It is also cheaper.'),
+)
+PERSONA_CHARACTERISTICS = _frozen(np.array([[60, 57], [40, 84], [10, 72], [4, 53]]))
+
+# Likelihood to use each mode of Step 6 as codes 0 (unlikely) to 4 (very likely), [scenario, persona, mode] with
+# modes in engine.MODES order; further scenarios are rather unlikely for all modes
+PREFERENCES = _frozen(np.array([
+    # S1: 2030 | Saclay 2.0
+    [[ 2,  3,  0,  0,  0,  3,  1,  3,  1,  1,  0,  3,  0],  # Jacqueline
+     [ 3,  0,  0,  0,  0,  3,  0,  2,  0,  3,  0,  1,  0],  # Thierry
+     [ 3,  3,  1,  1,  2,  2,  0,  0,  1,  3,  3,  4,  0],  # Adrian
+     [ 3,  0,  4,  4,  3,  1,  4,  4,  4,  1,  0,  0,  4]],  # Rui
+    # S2: 2030 | Paris 2.0
+    [[ 0,  2,  0,  0,  0,  4,  2,  4,  2,  1,  0,  1,  0],  # Jacqueline
+     [ 2,  0,  0,  0,  0,  4,  0,  3,  1,  3,  1,  1,  0],  # Thierry
+     [ 4,  3,  1,  1,  2,  2,  0,  0,  1,  3,  4,  4,  0],  # Adrian
+     [ 3,  0,  4,  4,  3,  1,  4,  4,  4,  1,  0,  0,  4]],  # Rui
+    # S3: 2030 | Rural Campus
+    [[ 3,  4,  0,  0,  0,  0,  0,  1,  0,  2,  0,  4,  0],  # Jacqueline
+     [ 1,  1,  0,  0,  0,  2,  0,  1,  0,  2,  0,  2,  0],  # Thierry
+     [ 3,  4,  0,  0,  0,  1,  0,  0,  0,  2,  2,  4,  0],  # Adrian
+     [ 0,  0,  4,  3,  0,  0,  2,  3,  1,  0,  0,  0,  1]],  # Rui
+    # S4: 2030 | Village Campus
+    [[ 1,  3,  0,  0,  0,  3,  1,  3,  3,  1,  0,  4,  0],  # Jacqueline
+     [ 1,  1,  0,  0,  0,  2,  0,  2,  1,  3,  1,  2,  0],  # Thierry
+     [ 4,  4,  0,  0,  1,  1,  0,  0,  0,  3,  2,  4,  0],  # Adrian
+     [ 3,  2,  4,  3,  2,  2,  3,  3,  2,  2,  1,  1,  3]],  # Rui
+] + [[[1] * 13] * 4] * 4, dtype=np.int8))
+
+# Interventions of Step 9: name, acronym and description
+INTERVENTIONS = (
+    ('On demand shuttles', 'MoD', 'Shared electric on demand shuttles that move on demand between key destinations.'),
+    ('E-Bike sharing service', 'eBike', 'Affordable e-bikes for rent connecting the plateau, stations, the villages '
+                                        'in the valley, and Massy-Palaiseau.'),
+)
+
+# Impact of the interventions as codes -2 (strong decrease) to +2 (strong increase), [intervention, scenario, persona,
+# mode]; further scenarios start without any change
+IMPACTS = _frozen(np.array([
+    [
+        # S1: 2030 | Saclay 2.0
+        [[ 1,  0, -1,  0,  0,  0,  0,  0,  0,  1,  0,  0,  0],  # Jacqueline
+         [ 2,  0,  0,  0,  0,  2,  0,  0,  0,  1,  0,  0,  0],  # Thierry
+         [ 1, -1,  0,  0,  0,  1,  0,  0,  0,  1,  0,  0,  0],  # Adrian
+         [ 0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0]],  # Rui
+        # S2: 2030 | Paris 2.0
+        [[ 1,  0,  0,  0,  0,  0,  0,  0,  0,  2,  0,  0,  0],  # Jacqueline
+         [ 1,  0,  0,  0,  0,  1,  0,  0,  0,  2,  0,  0,  0],  # Thierry
+         [ 1, -1,  0,  0,  0,  1,  0,  0,  0,  2,  0,  0,  0],  # Adrian
+         [ 0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0]],  # Rui
+        # S3: 2030 | Rural Campus
+        [[ 1,  0, -1,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0],  # Jacqueline
+         [ 2,  0,  0,  0,  0,  1,  0,  0,  0,  0,  0,  0,  0],  # Thierry
+         [ 1,  0,  0,  0,  0,  0,  0,  0,  0,  1,  0,  0,  0],  # Adrian
+         [ 0,  0,  0,  0,  0,  1,  0,  0,  0,  0,  0,  0,  0]],  # Rui
+        # S4: 2030 | Village Campus
+        [[ 1,  0,  0,  0,  0,  1,  0,  0,  0,  2,  0,  0,  0],  # Jacqueline
+         [ 1,  0,  0,  0,  0,  2,  0,  0,  0,  1,  0,  0,  0],  # Thierry
+         [ 1, -1,  0,  0,  0,  1,  0,  0,  0,  0,  0,  0,  0],  # Adrian
+         [ 0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0]],  # Rui
+    ],
+    [
+        # S1: 2030 | Saclay 2.0
+        [[ 0,  0,  2,  0,  0,  0,  2, -1,  0,  0,  0,  0,  0],  # Jacqueline
+         [ 0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0],  # Thierry
+         [ 0, -1,  1,  0,  0,  0,  1, -1,  0,  0,  0,  0,  0],  # Adrian
+         [ 0,  0,  1, -1, -1,  0,  1,  0, -1,  0,  0,  0,  0]],  # Rui
+        # S2: 2030 | Paris 2.0
+        [[ 0,  0,  1,  0,  0,  0,  1,  0,  0,  0,  0,  0,  0],  # Jacqueline
+         [ 0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0],  # Thierry
+         [ 0, -1,  1,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0],  # Adrian
+         [ 0,  0,  1, -1,  0,  0,  1, -1,  0,  0,  0,  0,  0]],  # Rui
+        # S3: 2030 | Rural Campus
+        [[ 0,  0,  2,  0,  0,  0,  2, -1,  0,  0,  0,  0,  0],  # Jacqueline
+         [ 0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0],  # Thierry
+         [ 0, -1,  1,  0,  0,  0,  1, -1,  0,  0,  0,  0,  0],  # Adrian
+         [ 0,  0,  2, -1, -1,  0,  1,  0,  0,  0,  0,  0,  0]],  # Rui
+        # S4: 2030 | Village Campus
+        [[ 0, -1,  1,  0,  0,  0,  2,  0,  0,  0,  0,  0,  0],  # Jacqueline
+         [ 0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0],  # Thierry
+         [ 0, -1,  1,  0,  0,  0,  0,  0,  0,  0,  0,  0,  0],  # Adrian
+         [ 0,  0,  1, -1,  0,  0,  1, -1, -1,  0,  0,  0,  0]],  # Rui
+    ],
+], dtype=np.int8))
+
+# Emission and energy factors of Step 7, one row per factor and one column per impact mode
+FACTORS = pd.DataFrame(engine.FACTORS, index=engine.IMPACT_MODES).T
+
+
+def pad(values, shape):
+    """Array of ``shape`` with the default ``values`` where they reach and zeros beyond."""
+    result = np.zeros(shape, dtype=values.dtype)
+    reach = tuple(slice(0, min(n, m)) for n, m in zip(shape, values.shape))
+    result[reach] = values[reach]
+    return result
+
+
+def texts(defaults, i, *fallback):
+    """Default texts of row ``i`` of ``defaults``, beyond them ``fallback`` followed by empty texts."""
+    return defaults[i] if i < len(defaults) else fallback + ('',) * (len(defaults[0]) - len(fallback))
+
+
+# Shared default frames, the least recently used ones are dropped beyond SHARED_ENTRIES (sessions holding them keep
+# them alive)
+SHARED_ENTRIES = 256
+_shared = collections.OrderedDict()
+_lock = threading.Lock()
+
+
+def _key(frame):
+    return (tuple(frame.index), tuple(frame.columns), tuple(map(str, frame.dtypes)),
+            pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+
+
+def share(value):
+    """The process-wide object equal to the frame ``value``; other values are returned as they are."""
+    if not isinstance(value, pd.DataFrame):
+        return value
+    key = _key(value)
+    with _lock:
+        shared = _shared.setdefault(key, value)
+        _shared.move_to_end(key)
+        if len(_shared) > SHARED_ENTRIES:
+            _shared.popitem(last=False)
+    return shared
+
+
+class Cells(dict):
+    """Changed cells of a table as ``{(row, column): value}`` by position."""
+
+
+# Diff of a value equal to its default
+SAME = Cells()
+
+
+def same(value, default):
+    """Whether ``value`` equals ``default``, tables cell by cell with their labels and types."""
+    if isinstance(value, pd.DataFrame) or isinstance(default, pd.DataFrame):
+        return isinstance(value, pd.DataFrame) and isinstance(default, pd.DataFrame) and value.equals(default)
+    return value == default
+
+
+def diff(value, default):
+    """Difference of ``value`` from ``default``: ``SAME``, the changed ``Cells`` of a table with the labels of the
+    default, or ``value`` itself."""
+    if same(value, default):
+        return SAME
+    if not (isinstance(value, pd.DataFrame) and isinstance(default, pd.DataFrame) and value.shape == default.shape
+            and value.index.equals(default.index) and value.columns.equals(default.columns)):
+        return value
+    new, old = value.to_numpy(dtype=object), default.to_numpy(dtype=object)
+    changed = ~((new == old) | (pd.isna(new) & pd.isna(old)))
+    cells = Cells()
+    for j in np.flatnonzero(changed.any(axis=0)):
+        # Editors return categories as plain labels, changed cells are kept in the type of the default column
+        try:
+            column = value.iloc[:, j].astype(default.dtypes.iloc[j])
+        except (TypeError, ValueError):
+            return value
+        if (column.isna() != value.iloc[:, j].isna()).any():
+            return value
+        cells.update(((i, j), column.iat[i]) for i in np.flatnonzero(changed[:, j]))
+    return cells or SAME
+
+
+def patch(default, diff):
+    """Value of ``default`` changed by ``diff``."""
+    if diff is SAME:
+        return default
+    if isinstance(diff, Cells):
+        value = default.copy()
+        for (i, j), cell in diff.items():
+            value.iat[i, j] = cell
+        return value
+    return diff
@@ -0,0 +1,171 @@
+"""Vectorised impact engine behind Steps 8 and 10 of the decision tool.
+
+Mode preferences are held as a dense ``[scenario, persona, mode]`` array of
+ordinal codes (0 = unlikely ... 4 = very likely). All functions broadcast over
+any leading axes, so the baseline and the interventions (or sampled inputs)
+are evaluated in the same call by stacking them in front of the scenario axis.
+"""
+import numpy as np
+
+# Modes as they appear in the preference tables of Step 6
+MODES = ["MoD", "Car", "Bike", "Walk", "MM", "PT-MoD", "PT-Bike", "PT-Walk", "PT-MM", "MoD-Walk", "MoD-MM",
+         "Car-Walk", "MM-Walk"]
+
+# Modes for which emission and energy factors are defined in Step 7
+IMPACT_MODES = ['PT', 'Car', 'MoD', 'MM', 'Bike', 'Walk']
+
+INDICATORS = ['CO2e', 'Energy', 'Calories']
+
+# Default share of each preference mode (rows) travelled with each impact mode (columns), editable in Step 7.
+# Multimodal trips are split 80/20 between the first- and the second-mentioned mode.
+MODE_ALLOCATION = np.array([
+    # PT   Car  MoD  MM   Bike Walk
+    [0.0, 0.0, 1.0, 0.0, 0.0, 0.0],  # MoD
+    [0.0, 1.0, 0.0, 0.0, 0.0, 0.0],  # Car
+    [0.0, 0.0, 0.0, 0.0, 1.0, 0.0],  # Bike
+    [0.0, 0.0, 0.0, 0.0, 0.0, 1.0],  # Walk
+    [0.0, 0.0, 0.0, 1.0, 0.0, 0.0],  # MM
+    [0.8, 0.0, 0.2, 0.0, 0.0, 0.0],  # PT-MoD
+    [0.8, 0.0, 0.0, 0.0, 0.2, 0.0],  # PT-Bike
+    [0.8, 0.0, 0.0, 0.0, 0.0, 0.2],  # PT-Walk
+    [0.8, 0.0, 0.0, 0.2, 0.0, 0.0],  # PT-MM
+    [0.0, 0.0, 0.8, 0.0, 0.0, 0.2],  # MoD-Walk
+    [0.0, 0.0, 0.8, 0.2, 0.0, 0.0],  # MoD-MM
+    [0.0, 0.8, 0.0, 0.0, 0.0, 0.2],  # Car-Walk
+    [0.0, 0.0, 0.0, 0.8, 0.0, 0.2],  # MM-Walk
+])
+
+# Share of multimodal trips travelled with the first-mentioned mode in MODE_ALLOCATION
+MULTIMODAL_SPLIT = 0.8
+
+# Impact mode of the first-mentioned mode of each multimodal preference mode (-1 for single modes)
+MULTIMODAL_FIRST = np.array([IMPACT_MODES.index(mode.split('-')[0]) if '-' in mode else -1 for mode in MODES])
+
+
+def mode_allocation(split=MULTIMODAL_SPLIT, allocation=MODE_ALLOCATION):
+    """``allocation`` with the first-mentioned mode of multimodal trips scaled to a split of ``split`` instead of 80/20.
+
+    The first-mentioned share of each multimodal row is scaled by ``split / MULTIMODAL_SPLIT`` (at most to the row
+    total) and the other shares of the row make up the rest, so the default matrix is split ``split`` / ``1 - split``
+    and ``split=MULTIMODAL_SPLIT`` returns ``allocation`` as it is. ``allocation`` may carry leading axes, e.g.
+    scenarios (``[..., 13, 6]``), and ``split`` may be an array of shares, giving one set of matrices per share
+    (``[split, ..., 13, 6]``).
+    """
+    allocation = np.asarray(allocation, dtype=float)
+    split = np.asarray(split, dtype=float)
+    split = split.reshape(split.shape + (1,) * allocation.ndim)
+    rows = np.flatnonzero(MULTIMODAL_FIRST >= 0)
+    first = np.zeros(allocation.shape[-2:], dtype=bool)
+    first[rows, MULTIMODAL_FIRST[rows]] = True
+    multimodal = MULTIMODAL_FIRST[:, np.newaxis] >= 0
+
+    row_total = allocation.sum(axis=-1, keepdims=True)
+    first_share = (allocation * first).sum(axis=-1, keepdims=True)
+    scaled = np.minimum(first_share * split / MULTIMODAL_SPLIT, row_total)
+    rest = row_total - first_share
+    other = np.divide(row_total - scaled, rest, out=np.zeros(np.broadcast(scaled, rest).shape), where=rest > 0)
+    return np.where(multimodal, np.where(first, scaled, allocation * other), allocation)
+
+
+# Default CO2e emissions in g/passenger km and energy demand in MJ/passenger km of Step 7, in IMPACT_MODES order
+FACTORS = {
+    'CO2e': [15, 50, 150, 10, 0, 0],
+    'MJ': [0.2, 0.8, 1.8, 0.5, 0, 0]
+}
+
+# Default calories burned per kg bodyweight and km
+WALK_CALORIES = 1
+BIKE_CALORIES = 0.4
+
+# Preference cells (samples x scenarios x personas x modes) evaluated at once by the sampling analyses
+CHUNK_CELLS = 2 ** 22
+
+BIKE = IMPACT_MODES.index('Bike')
+WALK = IMPACT_MODES.index('Walk')
+
+
+def apply_intervention(pref, delta):
+    """Shift preference codes by intervention deltas, clipped to the 0-4 scale.
+
+    ``delta`` may carry leading intervention axes, all interventions are applied in one addition.
+    """
+    return np.clip(np.asarray(pref, dtype=np.int8) + np.asarray(delta, dtype=np.int8), 0, 4)
+
+
+def modal_split(pref):
+    """Normalise preferences to the share of kilometres per mode; personas without any preference get zeros."""
+    pref = np.asarray(pref, dtype=float)
+    total = pref.sum(axis=-1, keepdims=True)
+    return np.divide(pref, total, out=np.zeros_like(pref), where=total > 0)
+
+
+def distance_split(pref, distance, allocation=MODE_ALLOCATION, decimals=1, routes=None):
+    """Kilometres per impact mode, shape ``[..., scenario, persona, impact mode]``.
+
+    ``distance`` holds the daily kilometres per persona (``[..., persona]``), ``allocation`` the ``[13, 6]`` allocation
+    of the preference modes to the impact modes or one matrix per scenario (``[..., scenario, 13, 6]``), applied in
+    one matrix product. ``routes`` optionally holds the length of the trips with each impact mode relative to the
+    persona distance (``[..., persona, impact mode]``, e.g. from a network, see ``spatial``). Pass ``decimals=None`` to
+    skip the rounding applied for display.
+    """
+    distance = np.asarray(distance, dtype=float)
+    dist = (modal_split(pref) @ allocation) * distance[..., np.newaxis, :, np.newaxis]
+    if routes is not None:
+        dist = dist * np.asarray(routes, dtype=float)[..., np.newaxis, :, :]
+    return dist if decimals is None else np.round(dist, decimals)
+
+
+def emissions(dist, co2e):
+    """Daily CO2e in kg from kilometres per impact mode and factors in g/passenger km."""
+    return (dist * np.asarray(co2e, dtype=float)[..., np.newaxis, np.newaxis, :]).sum(axis=-1) / 1000
+
+
+def energy(dist, mj):
+    """Daily energy demand in MJ from kilometres per impact mode and factors in MJ/passenger km."""
+    return (dist * np.asarray(mj, dtype=float)[..., np.newaxis, np.newaxis, :]).sum(axis=-1)
+
+
+def calories(dist, bodyweight, walk_calories, bike_calories, decimals=0):
+    """Daily calories burned while walking and cycling, per kg bodyweight and km."""
+    bodyweight = np.asarray(bodyweight, dtype=float)[..., np.newaxis, :]
+    walk_calories = np.asarray(walk_calories, dtype=float)[..., np.newaxis, np.newaxis]
+    bike_calories = np.asarray(bike_calories, dtype=float)[..., np.newaxis, np.newaxis]
+    cal = dist[..., BIKE] * bodyweight * bike_calories + dist[..., WALK] * bodyweight * walk_calories
+    return cal if decimals is None else np.round(cal, decimals)
+
+
+def impacts(dist, factors, bodyweight, walk_calories, bike_calories, decimals=0):
+    """Individual daily impacts per indicator, each of shape ``[..., scenario, persona]``.
+
+    ``factors`` is the Step 7 table as an array with the CO2e row first and the MJ row second.
+    """
+    factors = np.asarray(factors, dtype=float)
+    return {
+        'CO2e': emissions(dist, factors[..., 0, :]),
+        'Energy': energy(dist, factors[..., 1, :]),
+        'Calories': calories(dist, bodyweight, walk_calories, bike_calories, decimals=decimals),
+    }
+
+
+def group_totals(individual, weights, no_people, decimals=0):
+    """Scale individual impacts by persona weight (in %) and population size.
+
+    Values are divided by 1000 on top of the percentage, i.e. tons CO2e, gigajoules and pizzas (1000 calories).
+    """
+    weights = np.asarray(weights, dtype=float)[..., np.newaxis, :]
+    no_people = np.asarray(no_people, dtype=float)[..., np.newaxis, np.newaxis]
+    groups = {}
+    for indicator, values in individual.items():
+        group = values * weights * no_people / 100000
+        groups[indicator] = group if decimals is None else np.round(group, decimals)
+    return groups
+
+
+def scenario_totals(group, likelihood, decimals=None):
+    """Population totals per scenario weighted by the scenario likelihood (in %), shape ``[..., scenario]``."""
+    likelihood = np.asarray(likelihood, dtype=float)
+    totals = {}
+    for indicator, values in group.items():
+        total = values.sum(axis=-1) * likelihood / 100
+        totals[indicator] = total if decimals is None else np.round(total, decimals)
+    return totals
@@ -0,0 +1,249 @@
+"""Export of all results and the inputs that produced them (Step 10h).
+
+The tables are built in chunks of long-format rows, so large results (e.g. the synthetic population) are written
+without building one frame of all rows:
+
+    results       one row per intervention variant, scenario, persona and impact mode with the kilometres, the
+                  individual impacts (kg CO2e, MJ, calories) and the group impacts (t CO2e, GJ, pizzas); summed over
+                  the modes they give the (unrounded) persona results of Steps 8 and 10
+    totals        one row per variant and scenario with the population totals and the likelihood-weighted totals
+    travellers    one row per variant, scenario and traveller of the synthetic population (Step 10e)
+    uncertainty   percentile bands of the totals (Step 10d)
+    trajectory    annual and cumulative totals per variant, scenario and year (Step 10g)
+    inputs        scenarios, personas, preferences, factors, allocation, intervention impacts and settings as
+                  separate tables, e.g. ``inputs preferences``, see ``inputs``
+
+``write`` streams the tables into a zip archive with one Parquet or CSV file per table, or into an Excel workbook
+with one sheet per table (tables over the row limit of a sheet continue on further sheets).
+"""
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from decision_tool import engine, population
+
+# File extension per format
+FORMATS = {'Parquet': 'zip', 'CSV': 'zip', 'Excel': 'xlsx'}
+
+MIME_TYPES = {'zip': 'application/zip', 'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'}
+
+# Rows per chunk of the long tables
+CHUNK_ROWS = 2 ** 18
+
+# Rows per sheet of an Excel workbook
+EXCEL_ROWS = 2 ** 20 - 1
+
+
+def _labels(names, codes):
+    # Categorical column of ``names`` for integer codes, -1 for none
+    return pd.Categorical.from_codes(codes, categories=pd.Index(names).drop_duplicates())
+
+
+def _names(names):
+    # Positions of names in their list without duplicates, so that equal names share one category
+    unique = pd.Index(names).drop_duplicates()
+    return unique.get_indexer(names)
+
+
+def results(pref, distance, bodyweight, weights, no_people, factors, walk_calories, bike_calories, likelihood,
+            allocation, variants, scenarios, personas, groups=None, chunk_rows=CHUNK_ROWS, routes=None):
+    """Chunks of the ``results`` table of ``[variant, scenario, persona, mode]`` preference codes.
+
+    ``groups`` optionally holds the group of each persona (persona catalog), written as column ``group``; ``routes``
+    are the route factors of ``engine.distance_split``.
+    """
+    pref = np.asarray(pref)
+    no_var, no_scen, no_pers = pref.shape[:3]
+    no_modes = len(engine.IMPACT_MODES)
+    factors = np.asarray(factors, dtype=float)
+    bodyweight = np.asarray(bodyweight, dtype=float)
+    group_scale = np.asarray(weights, dtype=float) * no_people / 100000
+    likelihood = np.asarray(likelihood, dtype=float)
+    allocation = np.broadcast_to(allocation, (no_var, no_scen) + engine.MODE_ALLOCATION.shape)
+    pref, allocation = pref.reshape(-1, no_pers, len(engine.MODES)), allocation.reshape(
+        (-1,) + engine.MODE_ALLOCATION.shape)
+    variant_codes, scen_codes, pers_codes = _names(variants), _names(scenarios), _names(personas)
+
+    cells = max(1, chunk_rows // (no_pers * no_modes))
+    for start in range(0, len(pref), cells):
+        stop = min(start + cells, len(pref))
+        cell = np.arange(start, stop)
+        dist = engine.distance_split(pref[start:stop], distance, allocation=allocation[start:stop], routes=routes)
+        ind = {
+            'CO2e': dist * factors[0] / 1000,
+            'Energy': dist * factors[1],
+            'Calories': np.zeros_like(dist),
+        }
+        ind['Calories'][..., engine.BIKE] = dist[..., engine.BIKE] * bodyweight * bike_calories
+        ind['Calories'][..., engine.WALK] = dist[..., engine.WALK] * bodyweight * walk_calories
+
+        rows = dist.size
+        persona = np.tile(np.repeat(np.arange(no_pers), no_modes), len(cell))
+        chunk = pd.DataFrame({
+            'intervention': _labels(variants, np.repeat(variant_codes[cell // no_scen], no_pers * no_modes)),
+            'scenario': _labels(scenarios, np.repeat(scen_codes[cell % no_scen], no_pers * no_modes)),
+            'persona': _labels(personas, pers_codes[persona]),
+        })
+        if groups is not None:
+            chunk['group'] = _labels(groups, _names(groups)[persona])
+        chunk['mode'] = _labels(engine.IMPACT_MODES, np.tile(np.arange(no_modes), rows // no_modes))
+        chunk['km'] = dist.reshape(-1)
+        chunk['likelihood'] = np.repeat(likelihood[cell % no_scen], no_pers * no_modes)
+        chunk['weight'] = np.asarray(weights, dtype=float)[persona]
+        for indicator in engine.INDICATORS:
+            chunk[indicator] = ind[indicator].reshape(-1)
+        for indicator in engine.INDICATORS:
+            chunk[f'{indicator} group'] = (ind[indicator] * group_scale[:, np.newaxis]).reshape(-1)
+        yield chunk
+
+
+def totals(group, likelihood, variants, scenarios):
+    """``totals`` table of the ``[variant, scenario, persona]`` group impacts per indicator."""
+    no_var, no_scen = np.shape(group['CO2e'])[:2]
+    likelihood = np.asarray(likelihood, dtype=float)
+    table = pd.DataFrame({
+        'intervention': np.repeat(variants, no_scen),
+        'scenario': np.tile(scenarios, no_var),
+        'likelihood': np.tile(likelihood, no_var),
+    })
+    for indicator in engine.INDICATORS:
+        table[indicator] = np.sum(group[indicator], axis=-1).reshape(-1)
+    for indicator in engine.INDICATORS:
+        table[f'{indicator} weighted'] = table[indicator] * table['likelihood'] / 100
+    return table
+
+
+def travellers(travellers, pref, factors, walk_calories, bike_calories, allocation, variants, scenarios, personas,
+               chunk_rows=CHUNK_ROWS, routes=None):
+    """Chunks of the ``travellers`` table of a synthetic population and ``[variant, scenario, persona, mode]``
+    preference codes. The ``mode`` is the preference mode of a traveller, empty without any preference."""
+    pref = np.asarray(pref)
+    no_var, no_scen = pref.shape[:2]
+    no_cells = no_var * no_scen
+    cells = np.arange(no_cells)
+    variant_codes, scen_codes, pers_codes = _names(variants), _names(scenarios), _names(personas)
+    chunk_size = max(1, chunk_rows // no_cells)
+    for start, stop, mode, values in population.traveller_impacts(travellers, pref, factors, walk_calories,
+                                                                  bike_calories, allocation, chunk_size,
+                                                                  routes):
+        size = stop - start
+        chunk = pd.DataFrame({
+            'intervention': _labels(variants, np.repeat(variant_codes[cells // no_scen], size)),
+            'scenario': _labels(scenarios, np.repeat(scen_codes[cells % no_scen], size)),
+            'traveller': np.tile(np.arange(start, stop), no_cells),
+            'persona': _labels(personas, np.tile(pers_codes[travellers['persona'][start:stop]], no_cells)),
+            'distance': np.tile(travellers['distance'][start:stop], no_cells),
+            'bodyweight': np.tile(travellers['bodyweight'][start:stop], no_cells),
+            'mode': _labels(engine.MODES, mode.reshape(-1)),
+        })
+        for indicator in engine.INDICATORS:
+            chunk[indicator] = values[indicator].reshape(-1)
+        yield chunk
+
+
+def inputs(state, personas):
+    """Input tables of a snapshot dict (see ``snapshot``) by table name; ``personas`` are the names of the rows of
+    the intervention impacts."""
+    scenarios = state['scenarios']['names']
+    tables = {'inputs scenarios': pd.DataFrame(dict({
+        'scenario': scenarios,
+        'description': state['scenarios']['descriptions'],
+        'likelihood': state['scenarios']['likelihood'],
+    }, **{f'U{j + 1}: {name}': np.asarray(state['scenarios']['characteristics'])[:, j]
+          for j, name in enumerate(state['uncertainties']['names'])}))}
+    if 'personas' in state:
+        pers = state['personas']
+        tables['inputs personas'] = pd.DataFrame({
+            'persona': pers['names'], 'description': pers['descriptions'], 'distance': pers['distance'],
+            'bodyweight': pers['bodyweight'], 'weight': pers['weights']})
+        tables['inputs preferences'] = _long(state['preferences'], ['scenario', 'persona', 'mode'],
+                                             [scenarios, pers['names'], engine.MODES], 'code')
+    tables['inputs factors'] = pd.DataFrame(state['factors'], index=pd.Index(engine.IMPACT_MODES, name='mode')
+                                            ).reset_index()
+    allocation = np.stack([state['allocation'] if own is None else own for own in state['scenario_allocation']])
+    tables['inputs allocation'] = _long(allocation, ['scenario', 'mode', 'impact mode'],
+                                        [scenarios, engine.MODES, engine.IMPACT_MODES], 'share')
+    interventions = state['interventions']
+    tables['inputs interventions'] = pd.DataFrame({
+        'intervention': interventions['names'], 'acronym': interventions['acronyms'],
+        'description': interventions['descriptions']})
+    tables['inputs impacts'] = _long(interventions['impacts'], ['intervention', 'scenario', 'persona', 'mode'],
+                                     [interventions['names'], scenarios, personas, engine.MODES], 'delta')
+    settings = ['population', 'synthetic_population', 'walk_calories', 'bike_calories']
+    tables['inputs settings'] = pd.DataFrame({'setting': settings,
+                                              'value': np.array([state[key] for key in settings], dtype=float)})
+    return tables
+
+
+def _long(values, columns, names, value):
+    # Long table of an array with one column per axis
+    values = np.asarray(values)
+    index = pd.MultiIndex.from_product([range(n) for n in values.shape], names=columns)
+    table = pd.DataFrame({column: np.asarray(labels, dtype=object)[index.codes[j]]
+                          for j, (column, labels) in enumerate(zip(columns, names))})
+    table[value] = values.reshape(-1)
+    return table
+
+
+def _chunks(table):
+    return [table] if isinstance(table, pd.DataFrame) else table
+
+
+def write(file, tables, fmt='Parquet', files=None):
+    """Write ``tables`` (name to frame or iterable of frame chunks) to ``file`` in a format of ``FORMATS``.
+
+    Parquet and CSV go to a zip archive with one file per table, each chunk written as it comes (one row group per
+    chunk in Parquet); ``files`` (name to bytes) are added to the archive as they are. Excel needs openpyxl.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Export: unknown format {fmt}, expected one of {", ".join(FORMATS)}')
+    if fmt == 'Excel':
+        _write_excel(file, tables)
+        return
+    with zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in (files or {}).items():
+            archive.writestr(name, data)
+        for name, table in tables.items():
+            with archive.open(f'{name}.{fmt.lower()}', 'w', force_zip64=True) as member:
+                if fmt == 'Parquet':
+                    _write_parquet(member, _chunks(table))
+                else:
+                    text = io.TextIOWrapper(member, encoding='utf-8', newline='')
+                    for k, chunk in enumerate(_chunks(table)):
+                        chunk.to_csv(text, header=k == 0, index=False)
+                    text.flush()
+                    text.detach()
+
+
+def _write_parquet(file, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    for chunk in chunks:
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        writer = writer or pq.ParquetWriter(file, table.schema)
+        writer.write_table(table)
+    if writer is not None:
+        writer.close()
+
+
+def _write_excel(file, tables):
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        raise ValueError('Export: the Excel format needs the openpyxl package (pip install openpyxl)')
+    with pd.ExcelWriter(file, engine='openpyxl') as writer:
+        for name, table in tables.items():
+            sheet, row = 1, 0
+            for chunk in _chunks(table):
+                # Chunks are split where a sheet is full, the table continues with a header on the next sheet
+                while len(chunk):
+                    part, chunk = chunk.iloc[:EXCEL_ROWS - row], chunk.iloc[EXCEL_ROWS - row:]
+                    title = name[:31] if sheet == 1 else f'{name[:27]} {sheet}'
+                    part.to_excel(writer, sheet_name=title, startrow=row + (row > 0), header=row == 0, index=False)
+                    row += len(part)
+                    if row == EXCEL_ROWS:
+                        sheet, row = sheet + 1, 0
@@ -0,0 +1,36 @@
+"""Thumbnails for the scenario, persona and logo images.
+
+Images are only shown at a fixed width, so they are decoded once, resized and re-encoded as WebP (or JPEG when
+Pillow is built without WebP support). The app caches the results by path or content hash.
+"""
+import hashlib
+import io
+
+from PIL import Image, features
+
+THUMBNAIL_WIDTH = 300
+THUMBNAIL_FORMAT = 'WEBP' if features.check('webp') else 'JPEG'
+
+
+def content_hash(data):
+    """Stable key for uploaded image bytes."""
+    return hashlib.sha1(data).hexdigest()
+
+
+def thumbnail(data, width=THUMBNAIL_WIDTH, format=THUMBNAIL_FORMAT, quality=85):
+    """Return ``data`` resized to at most ``width`` pixels and encoded as ``format``."""
+    with Image.open(io.BytesIO(data)) as image:
+        image.load()
+        if image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        if format == 'JPEG':
+            # JPEG has no transparency, flatten onto the white page background
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        elif image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA')
+        buffer = io.BytesIO()
+        image.save(buffer, format=format, quality=quality)
+    return buffer.getvalue()
@@ -0,0 +1,235 @@
+"""Incremental evaluation of the results of Steps 8 and 10, and what changed since the last evaluation.
+
+A session keeps its last evaluation with the inputs it was made from. The next evaluation compares the inputs slice
+by slice and only recomputes the results they touch:
+
+    preferences, allocation       the ``[variant, scenario]`` cells whose preferences or scenario allocation changed
+    distance, bodyweight, routes  the persona columns of all cells
+    factors, calories             the individual impacts of all cells, the kilometres are kept
+    weights, population           the group impacts of the personas with a new weight (all for a new population size)
+    likelihood                    the likelihood-weighted totals only
+
+The per-scenario sums of the group impacts are patched by the change of the recomputed slices; the likelihood-weighted
+totals (``[variant, scenario]``) and their sum per variant follow from them. Variants are matched by position, so
+added interventions are computed in full and the others are kept, as are the remaining ones after a removal. A new
+number of scenarios or personas recomputes everything. The results equal those of the engine functions with their
+default rounding.
+
+Whole arrays (a first or full evaluation, all impacts for new factors, all group impacts for a new population size)
+are computed by the ``stages`` passed to ``evaluate``, e.g. cached stages shared by all sessions; only the slices are
+computed here.
+"""
+import numpy as np
+import pandas as pd
+
+from decision_tool import engine
+
+# Inputs compared as a whole and per persona
+SETTINGS = ['factors', 'walk_calories', 'bike_calories', 'no_people', 'likelihood']
+PERSONA_INPUTS = ['distance', 'bodyweight', 'routes', 'weights']
+
+# Names of the inputs in the summary of the changes
+NAMES = {
+    'factors': 'the emission and energy factors', 'walk_calories': 'the calories of walking',
+    'bike_calories': 'the calories of cycling', 'no_people': 'the population size',
+    'likelihood': 'the scenario likelihoods', 'distance': 'distance', 'bodyweight': 'bodyweight',
+    'routes': 'route lengths', 'weights': 'weight',
+}
+
+
+def inputs(pref, distance, bodyweight, factors, walk_calories, bike_calories, weights, no_people, likelihood,
+           allocation=engine.MODE_ALLOCATION, routes=None):
+    """Inputs of an evaluation as arrays of ``[variant, scenario, persona, mode]`` preference codes; the other inputs
+    are those of the engine functions."""
+    pref = np.asarray(pref, dtype=np.int8)
+    no_scen, no_pers = pref.shape[1:3]
+    return {
+        'pref': pref,
+        'allocation': np.broadcast_to(np.asarray(allocation, dtype=float), (no_scen,) + engine.MODE_ALLOCATION.shape),
+        'distance': np.asarray(distance, dtype=float),
+        'bodyweight': np.asarray(bodyweight, dtype=float),
+        'routes': np.ones((no_pers, len(engine.IMPACT_MODES))) if routes is None else np.asarray(routes, dtype=float),
+        'weights': np.asarray(weights, dtype=float),
+        'factors': np.asarray(factors, dtype=float),
+        'walk_calories': float(walk_calories),
+        'bike_calories': float(bike_calories),
+        'no_people': float(no_people),
+        'likelihood': np.asarray(likelihood, dtype=float),
+    }
+
+
+def _changes(new, old):
+    # Changed cells, personas and settings of ``new`` inputs against ``old`` ones, None if they cannot be compared
+    if old is None or new['pref'].shape[1:] != old['pref'].shape[1:]:
+        return None
+    no_var, no_old = len(new['pref']), min(len(new['pref']), len(old['pref']))
+    cells = np.ones(new['pref'].shape[:2], dtype=bool)
+    cells[:no_old] = (new['pref'][:no_old] != old['pref'][:no_old]).any(axis=(-2, -1))
+    # A new scenario allocation changes the cells of the scenario in all variants
+    cells |= (new['allocation'] != old['allocation']).any(axis=(-2, -1))
+    return {
+        'cells': cells,
+        'added': no_var - no_old,
+        'removed': len(old['pref']) - no_old,
+        'personas': {key: new[key] != old[key] if new[key].ndim == 1 else (new[key] != old[key]).any(axis=-1)
+                     for key in PERSONA_INPUTS},
+        'settings': [key for key in SETTINGS if not np.array_equal(new[key], old[key])],
+    }
+
+
+def _impacts(data, dist, persona=slice(None), stages=engine):
+    # Individual impacts of kilometres of the ``persona`` columns, rounded as in ``engine.impacts``
+    return stages.impacts(dist, data['factors'], data['bodyweight'][persona], data['walk_calories'],
+                          data['bike_calories'])
+
+
+def _group(data, individual, decimals, persona=slice(None), stages=engine):
+    return stages.group_totals(individual, data['weights'][persona], data['no_people'], decimals=decimals)
+
+
+def _sums(group):
+    return {indicator: values.sum(axis=-1) for indicator, values in group.items()}
+
+
+def _full(data, decimals, stages=engine):
+    dist = stages.distance_split(data['pref'], data['distance'], allocation=data['allocation'], routes=data['routes'])
+    individual = _impacts(data, dist, stages=stages)
+    group = _group(data, individual, decimals, stages=stages)
+    return dist, individual, group, _sums(group)
+
+
+def evaluate(data, previous=None, decimals=0, stages=engine):
+    """Results of ``inputs``, reusing the unchanged slices of the ``previous`` evaluation of this function.
+
+    Returns the ``inputs``, the kilometres ``dist`` (``[variant, scenario, persona, impact mode]``), the
+    ``individual`` and ``group`` impacts per indicator (``[variant, scenario, persona]``, the group impacts rounded to
+    ``decimals``), their ``sums`` per scenario, the likelihood-weighted ``totals`` (``[variant, scenario]``) and the
+    ``aggregate`` per variant. ``changes`` holds what changed against the previous evaluation and ``before`` its
+    sums, totals and aggregates; both are kept from the previous evaluation if nothing changed.
+
+    ``stages`` provides the ``distance_split``, ``impacts`` and ``group_totals`` of whole arrays with the arguments of
+    the engine functions. The results of the stages are not changed in place.
+    """
+    old = None if previous is None or previous['decimals'] != decimals else previous
+    changes = _changes(data, None if old is None else old['inputs'])
+    if changes is not None and not (changes['cells'].any() or changes['settings'] or changes['removed']
+                                    or any(changed.any() for changed in changes['personas'].values())):
+        return previous
+    if changes is None:
+        dist, individual, group, sums = _full(data, decimals, stages)
+    else:
+        # The results of the previous evaluation are copied before they are patched, with zeros for added variants
+        no_old, added = len(data['pref']) - changes['added'], changes['added']
+        dist, individual, group, sums = [
+            np.concatenate([values[:no_old], np.zeros((added,) + values.shape[1:])]) if isinstance(values, np.ndarray)
+            else {indicator: np.concatenate([v[:no_old], np.zeros((added,) + v.shape[1:])]) for indicator, v in
+                  values.items()}
+            for values in (old['dist'], old['individual'], old['group'], old['sums'])]
+        cells = np.nonzero(changes['cells'])
+        personas = changes['personas']
+        moved = np.flatnonzero(personas['distance'] | personas['routes'])
+        impacted = np.flatnonzero(personas['distance'] | personas['routes'] | personas['bodyweight'])
+        weighted = np.flatnonzero(personas['distance'] | personas['routes'] | personas['bodyweight']
+                                  | personas['weights'])
+
+        # Kilometres of the changed cells (all personas) and of the moved personas (all cells)
+        dist[cells] = engine.distance_split(data['pref'][cells], data['distance'], routes=data['routes'],
+                                            allocation=data['allocation'][cells[1]])
+        if len(moved):
+            dist[..., moved, :] = engine.distance_split(data['pref'][..., moved, :], data['distance'][moved],
+                                                        allocation=data['allocation'], routes=data['routes'][moved])
+        # Individual impacts of the same slices and of the personas with a new bodyweight, all for new factors
+        all_impacts = bool({'factors', 'walk_calories', 'bike_calories'} & set(changes['settings']))
+        if all_impacts:
+            individual = _impacts(data, dist, stages=stages)
+        else:
+            for indicator, values in _impacts(data, dist[cells]).items():
+                individual[indicator][cells] = values
+            if len(impacted):
+                for indicator, values in _impacts(data, dist[..., impacted, :], impacted).items():
+                    individual[indicator][..., impacted] = values
+        # Group impacts of the same slices and of the personas with a new weight, patched into the sums
+        if all_impacts or 'no_people' in changes['settings']:
+            group = _group(data, individual, decimals, stages=stages)
+            sums = _sums(group)
+        else:
+            for indicator, values in _group(data, {k: v[cells] for k, v in individual.items()}, decimals).items():
+                sums[indicator][cells] += values.sum(axis=-1) - group[indicator][cells].sum(axis=-1)
+                group[indicator][cells] = values
+            if len(weighted):
+                for indicator, values in _group(data, {k: v[..., weighted] for k, v in individual.items()}, decimals,
+                                                weighted).items():
+                    sums[indicator] += (values - group[indicator][..., weighted]).sum(axis=-1)
+                    group[indicator][..., weighted] = values
+
+    totals = {indicator: values * data['likelihood'] / 100 for indicator, values in sums.items()}
+    return {
+        'inputs': data,
+        'decimals': decimals,
+        'dist': dist,
+        'individual': individual,
+        'group': group,
+        'sums': sums,
+        'totals': totals,
+        'aggregate': {indicator: values.sum(axis=-1) for indicator, values in totals.items()},
+        'changes': changes,
+        'before': None if old is None else {key: old[key] for key in ['sums', 'totals', 'aggregate']},
+    }
+
+
+def summary(evaluation, variants, scenarios, personas):
+    """Inputs changed against the previous evaluation, as phrases, e.g. ``the preferences of S1 (No intervention)``;
+    None without a comparable previous evaluation."""
+    changes = evaluation['changes']
+    if changes is None:
+        return None
+    no_var = len(changes['cells'])
+    phrases = []
+    if changes['added']:
+        phrases.append('the new interventions ' + ', '.join(variants[no_var - changes['added']:]))
+    if changes['removed']:
+        phrases.append(f'{changes["removed"]} removed intervention{"s" if changes["removed"] > 1 else ""}')
+    # Scenarios changed in all variants are named once, e.g. for a new scenario allocation
+    everywhere = changes['cells'][:no_var - changes['added']].all(axis=0)
+    if everywhere.any():
+        phrases.append('the results of ' + ', '.join(np.asarray(scenarios)[everywhere]))
+    for k in range(no_var - changes['added']):
+        cells = changes['cells'][k] & ~everywhere
+        if cells.any():
+            phrases.append(f'the preferences of {", ".join(np.asarray(scenarios)[cells])} ({variants[k]})')
+    for key in PERSONA_INPUTS:
+        if changes['personas'][key].any():
+            phrases.append(f'the {NAMES[key]} of {", ".join(np.asarray(personas)[changes["personas"][key]])}')
+    phrases.extend(NAMES[key] for key in changes['settings'])
+    return phrases
+
+
+def delta(evaluation, variants, scenarios):
+    """Likelihood-weighted totals before and after the last change, one row per variant and scenario whose totals
+    changed, followed by the sum over the scenarios as scenario ``Expected``; None without a comparable previous
+    evaluation. Columns ``{indicator} before``, ``{indicator} after`` and ``{indicator} change`` per indicator."""
+    before = evaluation['before']
+    if evaluation['changes'] is None or before is None:
+        return None
+    no_var = len(evaluation['changes']['cells'])
+    no_old = no_var - evaluation['changes']['added']
+    # Totals of new variants have no value before
+    values = {}
+    for indicator in engine.INDICATORS:
+        after = np.concatenate([evaluation['totals'][indicator], evaluation['aggregate'][indicator][:, np.newaxis]],
+                               axis=-1)
+        previous = np.full(after.shape, np.nan)
+        previous[:no_old] = np.concatenate([before['totals'][indicator][:no_old],
+                                            before['aggregate'][indicator][:no_old, np.newaxis]], axis=-1)
+        values[indicator] = previous, after
+    changed = np.any([~np.isclose(previous, after, rtol=0, atol=1e-9) for previous, after in values.values()], axis=0)
+    variant, scenario = np.nonzero(changed)
+    table = pd.DataFrame({
+        'Intervention': np.asarray(variants, dtype=object)[variant],
+        'Scenario': np.asarray(list(scenarios) + ['Expected'], dtype=object)[scenario],
+    })
+    for indicator, (previous, after) in values.items():
+        table[f'{indicator} before'] = previous[variant, scenario]
+        table[f'{indicator} after'] = after[variant, scenario]
+        table[f'{indicator} change'] = after[variant, scenario] - previous[variant, scenario]
+    return table
@@ -0,0 +1,187 @@
+"""Monte Carlo propagation of input uncertainty through the impact engine.
+
+The ordinal preferences and intervention deltas, the persona distances and bodyweights and the Step 7 emission and
+energy factors are all point estimates. ``simulate`` perturbs them, evaluates the samples in chunks along a leading
+sample axis and streams the results into histograms spanning the sampled values, so percentiles are available without
+keeping the individual samples in memory.
+"""
+import numpy as np
+
+from decision_tool import engine
+
+# Default spread of the sampled inputs
+UNCERTAINTY = {
+    'preference': 0.2,  # probability that a preference code moves one step up or down
+    'impact': 0.2,  # probability that an intervention delta moves one step up or down
+    'distance': 0.2,  # relative range (+/-) of the daily distance per persona
+    'bodyweight': 0.1,  # relative range (+/-) of the bodyweight per persona
+    'factors': 0.25,  # relative range (+/-) of each emission and energy factor
+}
+
+PERCENTILES = (5, 50, 95)
+
+
+def _jitter(rng, shape, probability):
+    # -1 or +1 with probability / 2 each, 0 otherwise
+    u = rng.random(shape, dtype=np.float32)
+    return (u > 1 - probability / 2).astype(np.int8) - (u < probability / 2).astype(np.int8)
+
+
+def _scale(rng, shape, spread):
+    return rng.uniform(1 - spread, 1 + spread, shape)
+
+
+def _histogram_percentiles(counts, percentiles):
+    # counts: [cells, bins], percentiles as positions in bins, interpolated linearly within the bin
+    bins = counts.shape[-1]
+    cdf = np.cumsum(counts, axis=-1)
+    target = np.asarray(percentiles, dtype=float)[:, np.newaxis] / 100 * cdf[:, -1]
+    idx = np.minimum((cdf[np.newaxis] < target[..., np.newaxis]).sum(axis=-1), bins - 1)
+    below = np.where(idx > 0, np.take_along_axis(cdf, np.maximum(idx - 1, 0).T, axis=-1).T, 0)
+    inside = np.take_along_axis(counts, idx.T, axis=-1).T
+    frac = np.divide(target - below, inside, out=np.zeros_like(target), where=inside > 0)
+    return idx + np.clip(frac, 0, 1)
+
+
+class Histogram:
+    """Histograms for many cells at once, filled chunk by chunk.
+
+    The range of a cell is set by the values of its first chunk, widened by ``MARGIN`` of their spread. Later values
+    outside of it grow the range by merging neighbouring bins, so each value is counted in the bin of the final range
+    it falls in. ``scale`` is the order of magnitude of the values of a cell; a fraction of it is the smallest range,
+    e.g. of a cell without any spread.
+    """
+
+    MARGIN = 0.1
+
+    def __init__(self, scale, bins):
+        scale = np.asarray(scale, dtype=float).reshape(-1)
+        self.bins = bins
+        self.smallest = np.maximum(scale * 1e-6, np.finfo(float).eps)
+        self.lower = None
+        self.width = None
+        self.counts = np.zeros((scale.size, bins), dtype=np.int64)
+        self.total = np.zeros(scale.size)
+        self.n = 0
+
+    def _grow(self, low, high):
+        # Cells with values outside of their range get bins of 2^k old bins, shifted by s old bins, covering both
+        cells = np.flatnonzero((low < self.lower) | (high > self.lower + self.bins * self.width))
+        if not len(cells):
+            return
+        lower, width, low, high = self.lower[cells], self.width[cells], low[cells], high[cells]
+        span = np.maximum(high, lower + self.bins * width) - np.minimum(low, lower)
+        k = np.maximum(np.ceil(np.log2(span / (self.bins * width))), 1)
+        while True:
+            factor = 2 ** k
+            shift_min = np.maximum(np.ceil((lower - low) / width), 0)
+            shift_max = np.minimum(np.floor(self.bins * factor - (high - lower) / width), self.bins * (factor - 1))
+            fits = shift_min <= shift_max
+            if fits.all():
+                break
+            k[~fits] += 1
+        # The old values are centred in the new range
+        shift = ((shift_min + shift_max) // 2).astype(np.int64)
+        factor = factor.astype(np.int64)
+        idx = (np.arange(self.bins) + shift[:, np.newaxis]) // factor[:, np.newaxis]
+        idx += np.arange(len(cells))[:, np.newaxis] * self.bins
+        self.counts[cells] = np.bincount(idx.ravel(), weights=self.counts[cells].ravel(),
+                                         minlength=len(cells) * self.bins).reshape(-1, self.bins).astype(np.int64)
+        self.lower[cells] = lower - shift * width
+        self.width[cells] = width * factor
+
+    def add(self, values):
+        values = values.reshape(values.shape[0], -1)
+        low, high = values.min(axis=0), values.max(axis=0)
+        if self.lower is None:
+            margin = np.maximum((high - low) * self.MARGIN, self.smallest)
+            self.lower = low - margin
+            self.width = (high - low + 2 * margin) / self.bins
+        else:
+            self._grow(low, high)
+        idx = np.clip(((values - self.lower) / self.width).astype(np.int64), 0, self.bins - 1)
+        idx += np.arange(self.counts.shape[0]) * self.bins
+        self.counts += np.bincount(idx.ravel(), minlength=self.counts.size).reshape(self.counts.shape)
+        self.total += values.sum(axis=0)
+        self.n += values.shape[0]
+
+    def percentiles(self, percentiles, shape):
+        values = self.lower + _histogram_percentiles(self.counts, percentiles) * self.width
+        return values.reshape((len(percentiles),) + shape)
+
+    def mean(self, shape):
+        return (self.total / self.n).reshape(shape)
+
+
+def simulate(pref, delta, distance, bodyweight, factors, walk_calories, bike_calories, weights, no_people, likelihood,
+             samples=100000, percentiles=PERCENTILES, uncertainty=None, seed=0, chunk_size=None, bins=512,
+             allocation=engine.MODE_ALLOCATION, routes=None):
+    """Percentile bands of the daily impacts under sampled inputs.
+
+    ``pref`` holds the ``[scenario, persona, mode]`` preference codes and ``delta`` the ``[intervention, scenario,
+    persona, mode]`` intervention deltas; variant 0 of the results is the base scenario, variant ``k`` intervention
+    ``k``. ``allocation`` and ``routes`` are those of ``engine.distance_split``. Returns a dict with the
+    ``percentiles``, the ``individual`` bands per indicator (shape ``[percentile, variant, scenario, persona]``), the
+    likelihood-weighted population ``total`` bands (``[percentile, variant]``) and the sample ``mean`` of both.
+
+    Every chunk draws from its own stream spawned from ``seed``, so results are reproducible for a given seed and
+    chunk size (by default sized to ``engine.CHUNK_CELLS``). Percentiles are read from ``bins`` histogram bins
+    over the range of the sampled values.
+    """
+    spread = dict(UNCERTAINTY, **(uncertainty or {}))
+    pref = np.asarray(pref, dtype=np.int8)
+    delta = np.asarray(delta, dtype=np.int8)
+    distance = np.asarray(distance, dtype=float)
+    bodyweight = np.asarray(bodyweight, dtype=float)
+    factors = np.asarray(factors, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    likelihood = np.asarray(likelihood, dtype=float)
+    allocation = np.asarray(allocation, dtype=float)
+    shape = (delta.shape[0] + 1,) + pref.shape[:2]
+    chunk_size = chunk_size or max(1, engine.CHUNK_CELLS // (shape[0] * pref.size))
+
+    # Scale of the sampled values, the largest value the sampled ranges allow: all kilometres travelled with the most
+    # intensive mode
+    distance_max = distance * (1 + spread['distance']) * max(1, allocation.sum(axis=-1).max())
+    if routes is not None:
+        distance_max = distance_max * np.asarray(routes, dtype=float).max(axis=-1)
+    factors_max = factors.max(axis=-1) * (1 + spread['factors'])
+    upper = {
+        'CO2e': distance_max * factors_max[0] / 1000,
+        'Energy': distance_max * factors_max[1],
+        'Calories': distance_max * bodyweight * (1 + spread['bodyweight']) * max(walk_calories, bike_calories),
+    }
+    scale = weights * no_people / 100000
+    individual = {indicator: Histogram(np.broadcast_to(upper[indicator], shape), bins)
+                  for indicator in engine.INDICATORS}
+    total = {indicator: Histogram(np.full(shape[0], (upper[indicator] * scale).sum() * likelihood.sum() / 100), bins)
+             for indicator in engine.INDICATORS}
+
+    sizes = [min(chunk_size, samples - start) for start in range(0, samples, chunk_size)]
+    for size, child in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))):
+        rng = np.random.default_rng(child)
+        base = np.clip(pref + _jitter(rng, (size,) + pref.shape, spread['preference']), 0, 4)
+        shift = np.clip(delta + _jitter(rng, (size,) + delta.shape, spread['impact']), -2, 2)
+        pref_sample = np.concatenate([base[:, np.newaxis], engine.apply_intervention(base[:, np.newaxis], shift)],
+                                     axis=1)
+        distance_sample = distance * _scale(rng, (size, 1, distance.size), spread['distance'])
+        bodyweight_sample = bodyweight * _scale(rng, (size, 1, bodyweight.size), spread['bodyweight'])
+        factors_sample = factors * _scale(rng, (size, 1) + factors.shape, spread['factors'])
+
+        dist = engine.distance_split(pref_sample, distance_sample, allocation=allocation, decimals=None, routes=routes)
+        ind = engine.impacts(dist, factors_sample, bodyweight_sample, walk_calories, bike_calories, decimals=None)
+        group = engine.group_totals(ind, weights, no_people, decimals=None)
+        aggr = engine.scenario_totals(group, likelihood)
+        for indicator in engine.INDICATORS:
+            individual[indicator].add(ind[indicator])
+            total[indicator].add(aggr[indicator].sum(axis=-1))
+
+    return {
+        'percentiles': tuple(percentiles),
+        'individual': {indicator: hist.percentiles(percentiles, shape) for indicator, hist in individual.items()},
+        'total': {indicator: hist.percentiles(percentiles, shape[:1]) for indicator, hist in total.items()},
+        'mean': {
+            'individual': {indicator: hist.mean(shape) for indicator, hist in individual.items()},
+            'total': {indicator: hist.mean(shape[:1]) for indicator, hist in total.items()},
+        },
+    }
@@ -0,0 +1,60 @@
+"""Ordinal scales of the editor tables.
+
+Scenario characteristics, mode preferences and intervention impacts are held as int8 codes. Their labels, e.g.
+"3: Likely", only exist in the editor tables: ``Scale.table`` builds the categorical frame of an editor from codes and
+``Scale.codes`` reads an edited frame back, both without parsing any strings.
+"""
+import numpy as np
+import pandas as pd
+
+
+class Scale:
+    """Ordinal scale with consecutive codes from ``first`` on, one label per code.
+
+    Empty or unknown cells read as the ``missing`` code (by default ``first``).
+    """
+
+    def __init__(self, labels, first=0, missing=None):
+        self.labels = list(labels)
+        self.first = first
+        self.missing = first if missing is None else missing
+        self.dtype = pd.CategoricalDtype(self.labels, ordered=True)
+
+    def table(self, codes, index, columns):
+        """Editor frame of a ``[row, column]`` array of codes, one categorical column per column."""
+        positions = np.asarray(codes, dtype=np.int8) - self.first
+        frame = pd.DataFrame({j: pd.Categorical.from_codes(positions[:, j], dtype=self.dtype)
+                              for j in range(len(columns))}, index=index)
+        # Columns are named afterwards, so that equal names (e.g. two uncertainties named alike) are kept apart
+        frame.columns = list(columns)
+        return frame
+
+    def codes(self, cells, columns=None):
+        """``[row, column]`` int8 codes of an editor frame (optionally only ``columns``) or an array of labels."""
+        if isinstance(cells, pd.DataFrame):
+            frame = cells if columns is None else cells.reindex(columns=columns)
+            # Columns of the editor already hold the categories of the scale, their codes are taken as they are
+            positions = np.zeros(frame.shape, dtype=np.int8)
+            for j in range(frame.shape[1]):
+                column = frame.iloc[:, j]
+                positions[:, j] = (column.cat.codes if column.dtype == self.dtype
+                                   else pd.Categorical(column, dtype=self.dtype).codes)
+        else:
+            cells = np.asarray(cells, dtype=object)
+            positions = pd.Categorical(cells.ravel(), dtype=self.dtype).codes.reshape(cells.shape)
+        return np.where(positions < 0, self.missing, positions + self.first).astype(np.int8)
+
+    def label(self, codes):
+        """Labels of an array of codes."""
+        return np.array(self.labels, dtype=object)[np.asarray(codes) - self.first]
+
+
+# Scenario characteristics of Step 1, codes 1 (low) to 4 (very high)
+CHARACTERISTIC = Scale(["1: low", "2: medium", "3: high", "4: very high"], first=1)
+
+# Likelihood to use a mode of Step 6, codes 0 (unlikely) to 4 (very likely)
+PREFERENCE = Scale(["0: Unlikely", "1: Rather unlikely", "2: Rather likely", "3: Likely", "4: Very likely"])
+
+# Impact of an intervention of Step 9b, codes -2 (strong decrease) to +2 (strong increase)
+IMPACT = Scale(['-2: Strong decrease', '-1: Slight decrease', '0: No change', '+1: Slight increase',
+                '+2: Strong increase'], first=-2, missing=0)
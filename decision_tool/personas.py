@@ -0,0 +1,116 @@
+"""Persona catalogs: many personas loaded from a table, evaluated in bulk and shown per persona group.
+
+A catalog is a CSV file with one row per persona::
+
+    Persona,Group,Weight,Distance (km),Bodyweight (kg),MoD,Car,Bike,Walk,MM,PT-MoD,...,MM-Walk
+    Student 01,Students,0.8,4,53,3,0,4,4,3,1,...,0
+
+``Weight`` is the share of the population in percent. ``Group`` is optional and defaults to the persona itself. The
+mode columns hold preference codes 0-4 or the labels of the Step 6 tables; modes left out count as "0: Unlikely".
+With an optional ``Scenario`` column the table has one row per persona and scenario instead and the preferences can
+differ by scenario; the other values are taken from the first row of each persona.
+
+Personas are held as compact arrays (int8 preferences, float32 characteristics, integer group codes) and results are
+aggregated to the groups with one matrix product.
+"""
+import numpy as np
+import pandas as pd
+
+from decision_tool import engine
+
+COLUMNS = ['Persona', 'Weight', 'Distance (km)', 'Bodyweight (kg)']
+
+
+def _codes(column):
+    # Codes 0-4 or labels starting with their code, e.g. "3: Likely"
+    codes = pd.to_numeric(column.astype(str).str.extract(r'^\s*(\d+)', expand=False), errors='coerce')
+    return codes.fillna(0).clip(0, 4).to_numpy(dtype=np.int8)
+
+
+def _preferences(table):
+    pref = np.zeros((len(table), len(engine.MODES)), dtype=np.int8)
+    for j, mode in enumerate(engine.MODES):
+        if mode in table:
+            pref[:, j] = _codes(table[mode])
+    return pref
+
+
+def read_catalog(file, scenarios):
+    """Compact arrays of a catalog CSV (path or file object) for the given scenario names."""
+    table = pd.read_csv(file)
+    missing = [column for column in COLUMNS if column not in table]
+    if missing:
+        raise ValueError(f'Persona catalog is missing the columns {", ".join(missing)}')
+    table['Persona'] = table['Persona'].astype(str)
+    if 'Group' not in table:
+        table['Group'] = table['Persona']
+
+    personas = table.drop_duplicates('Persona').reset_index(drop=True)
+    if 'Scenario' in table:
+        pref = np.zeros((len(scenarios), len(personas), len(engine.MODES)), dtype=np.int8)
+        for i, scenario in enumerate(scenarios):
+            rows = table[table['Scenario'].astype(str) == str(scenario)].drop_duplicates('Persona')
+            rows = rows.set_index('Persona').reindex(personas['Persona'])
+            pref[i] = _preferences(rows)
+    else:
+        pref = np.broadcast_to(_preferences(personas), (len(scenarios), len(personas), len(engine.MODES)))
+
+    codes, groups = pd.factorize(personas['Group'].astype(str))
+    return {
+        'names': personas['Persona'].tolist(),
+        'groups': list(groups),
+        'codes': codes.astype(np.int32),
+        'weights': personas['Weight'].to_numpy(dtype=np.float32),
+        'distance': personas['Distance (km)'].to_numpy(dtype=np.float32),
+        'bodyweight': personas['Bodyweight (kg)'].to_numpy(dtype=np.float32),
+        'pref': np.ascontiguousarray(pref),
+    }
+
+
+def membership(codes, no_groups, weights=None):
+    """``[persona, group]`` matrix assigning each persona (with its weight) to its group."""
+    matrix = np.zeros((len(codes), no_groups))
+    matrix[np.arange(len(codes)), codes] = 1 if weights is None else weights
+    return matrix
+
+
+def group_sum(values, codes, no_groups, axis=-1):
+    """Sum persona values along ``axis`` per group."""
+    values = np.moveaxis(np.asarray(values, dtype=float), axis, -1)
+    return np.moveaxis(values @ membership(codes, no_groups), -1, axis)
+
+
+def group_mean(values, codes, no_groups, weights, axis=-1):
+    """Weighted mean of persona values along ``axis`` per group; groups without weight get the plain mean."""
+    weights = np.asarray(weights, dtype=float)
+    total = np.bincount(codes, weights=weights, minlength=no_groups)
+    count = np.bincount(codes, minlength=no_groups)
+    matrix = np.where(total > 0, membership(codes, no_groups, weights) / np.where(total > 0, total, 1),
+                      membership(codes, no_groups) / np.maximum(count, 1))
+    values = np.moveaxis(np.asarray(values, dtype=float), axis, -1)
+    return np.moveaxis(values @ matrix, -1, axis)
+
+
+def aggregate(dist, individual, group, catalog):
+    """Persona group view of persona-level results.
+
+    Distances per mode and individual impacts become weighted means per group, the group impacts (unrounded) are
+    summed and rounded as in ``engine.group_totals``.
+    """
+    codes, no_groups, weights = catalog['codes'], len(catalog['groups']), catalog['weights']
+    return (
+        np.round(group_mean(dist, codes, no_groups, weights, axis=-2), 1),
+        {indicator: group_mean(values, codes, no_groups, weights) for indicator, values in individual.items()},
+        {indicator: np.round(group_sum(values, codes, no_groups)) for indicator, values in group.items()},
+    )
+
+
+def group_table(catalog):
+    """Number of personas, total weight and weighted mean distance and bodyweight per group."""
+    codes, no_groups, weights = catalog['codes'], len(catalog['groups']), catalog['weights']
+    return pd.DataFrame({
+        'Personas': np.bincount(codes, minlength=no_groups),
+        'Weight': group_sum(weights, codes, no_groups),
+        'Distance (km)': group_mean(catalog['distance'], codes, no_groups, weights),
+        'Bodyweight (kg)': group_mean(catalog['bodyweight'], codes, no_groups, weights),
+    }, index=catalog['groups'])
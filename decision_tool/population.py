@@ -0,0 +1,177 @@
+"""Synthetic population of individual travellers generated from the persona weights.
+
+Every traveller belongs to a persona and gets a sampled daily distance and bodyweight around the persona values and
+a mode choice quantile. The population is stored as compact typed arrays, about 14 bytes per traveller::
+
+    persona     uint16   index of the persona
+    distance    float32  daily kilometres
+    bodyweight  float32  kg
+    choice      float32  uniform draw that picks the mode from the cumulative modal split of the persona
+
+The mode of a traveller is resolved per preference table (scenario, intervention) from the same ``choice``, so
+differences between interventions are not blurred by new random draws. Impacts are computed in chunks of travellers
+and streamed into per-persona sums and histograms, so results hold distributions across travellers without keeping
+impacts per traveller.
+"""
+import numpy as np
+
+from decision_tool import engine
+from decision_tool.montecarlo import Histogram
+
+# Default spread of the sampled traveller characteristics around the persona values
+DISTANCE_CV = 0.3
+BODYWEIGHT_CV = 0.15
+
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def quotas(weights, no_people):
+    """Number of travellers per persona, proportional to the weights (in %) and adding up to ``no_people``."""
+    weights = np.asarray(weights, dtype=float)
+    share = weights / weights.sum() * no_people if weights.sum() > 0 else np.zeros_like(weights)
+    counts = np.floor(share).astype(np.int64)
+    # Largest remainders get the travellers left over by rounding down
+    counts[np.argsort(counts - share)[:int(round(share.sum())) - counts.sum()]] += 1
+    return counts
+
+
+def synthesize(weights, distance, bodyweight, no_people, seed=0, distance_cv=DISTANCE_CV,
+               bodyweight_cv=BODYWEIGHT_CV):
+    """Synthetic population of ``no_people`` travellers, sorted by persona.
+
+    Distances are log-normal with the persona distance as mean, bodyweights normal around the persona bodyweight.
+    """
+    rng = np.random.default_rng(seed)
+    distance = np.asarray(distance, dtype=float)
+    bodyweight = np.asarray(bodyweight, dtype=float)
+    counts = quotas(weights, no_people)
+    persona = np.repeat(np.arange(len(counts), dtype=np.uint16), counts)
+
+    sigma = np.sqrt(np.log1p(distance_cv ** 2))
+    mu = np.log(np.where(distance > 0, distance, 1)) - sigma ** 2 / 2
+    travelled = rng.lognormal(mu[persona], sigma).astype(np.float32)
+    travelled[distance[persona] <= 0] = 0
+    weight = rng.normal(bodyweight[persona], bodyweight_cv * bodyweight[persona]).astype(np.float32)
+    return {
+        'persona': persona,
+        'distance': travelled,
+        'bodyweight': np.maximum(weight, 0, dtype=np.float32),
+        'choice': rng.random(persona.size, dtype=np.float32),
+    }
+
+
+def modes(population, pref, start=0, stop=None):
+    """Preference mode (0-12, -1 without any preference) of travellers ``start:stop`` for ``[..., persona, mode]``
+    preference codes, as int8 of shape ``[..., traveller]``."""
+    persona = population['persona'][start:stop].astype(np.int64)
+    choice = population['choice'][start:stop].astype(float)
+    split = engine.modal_split(pref)
+    cum = np.cumsum(split, axis=-1)
+    # Per persona block, the cumulative shares offset by the persona index are increasing over all personas, so
+    # one sorted search per table resolves the mode of every traveller
+    keys = (cum + np.arange(cum.shape[-2])[:, np.newaxis]).reshape(cum.shape[:-2] + (-1,))
+    flat = keys.reshape(-1, keys.shape[-1])
+    result = np.empty((len(flat), persona.size), dtype=np.int8)
+    for k, table in enumerate(flat):
+        result[k] = np.minimum(np.searchsorted(table, persona + choice, side='right') - persona * len(engine.MODES),
+                               len(engine.MODES) - 1)
+    result = result.reshape(cum.shape[:-2] + (persona.size,))
+    return np.where(split.sum(axis=-1)[..., persona] > 0, result, -1).astype(np.int8)
+
+
+def per_km(factors, walk_calories, bike_calories, allocation=engine.MODE_ALLOCATION, routes=None):
+    """Impact per km (for calories per km and kg bodyweight) of each preference mode per indicator,
+    ``[..., mode + 1]`` with a trailing zero for travellers without any preference. With the ``[persona, impact
+    mode]`` route factors of ``engine.distance_split``, the impacts are given per persona, ``[..., persona, mode + 1]``.
+    """
+    factors = np.asarray(factors, dtype=float)
+    allocation = np.asarray(allocation, dtype=float)
+    if routes is not None:
+        allocation = allocation[..., np.newaxis, :, :] * np.asarray(routes, dtype=float)[:, np.newaxis, :]
+    values = {
+        'CO2e': allocation @ factors[0] / 1000,
+        'Energy': allocation @ factors[1],
+        'Calories': allocation[..., engine.BIKE] * bike_calories + allocation[..., engine.WALK] * walk_calories,
+    }
+    return {indicator: np.concatenate([value, np.zeros(value.shape[:-1] + (1,))], axis=-1)
+            for indicator, value in values.items()}
+
+
+def traveller_impacts(population, pref, factors, walk_calories, bike_calories, allocation=engine.MODE_ALLOCATION,
+                      chunk_size=250000, routes=None):
+    """Chunks of the impacts of all travellers for ``[..., scenario, persona, mode]`` preference codes.
+
+    Yields ``start, stop, mode, values`` per chunk of travellers, with the preference ``mode`` (``[table, traveller]``,
+    -1 without any preference) and the individual impacts per indicator (``[table, traveller]``) of every preference
+    table, tables flattened in C order. ``routes`` are the route factors of ``engine.distance_split``.
+    """
+    pref = np.asarray(pref, dtype=np.int8)
+    shape = pref.shape[:-2]
+    no_cells = int(np.prod(shape))
+    per_mode = len(engine.MODES) + 1
+    # With route factors, the impacts per km of a traveller are looked up in the row of its persona
+    tail = (per_mode,) if routes is None else (pref.shape[-2], per_mode)
+    factor = {indicator: np.broadcast_to(values, shape + tail).reshape(no_cells, -1).astype(np.float32)
+              for indicator, values in per_km(factors, walk_calories, bike_calories, allocation, routes).items()}
+    for start in range(0, population['persona'].size, chunk_size):
+        stop = min(start + chunk_size, population['persona'].size)
+        mode = modes(population, pref, start, stop).reshape(no_cells, -1)
+        index = mode.astype(np.int64) % per_mode
+        if routes is not None:
+            index += population['persona'][start:stop].astype(np.int64) * per_mode
+        values = {indicator: np.take_along_axis(factor[indicator], index, axis=-1) * population['distance'][start:stop]
+                  for indicator in engine.INDICATORS}
+        values['Calories'] *= population['bodyweight'][start:stop]
+        yield start, stop, mode, values
+
+
+def evaluate(population, pref, factors, walk_calories, bike_calories, likelihood, allocation=engine.MODE_ALLOCATION,
+             percentiles=PERCENTILES, chunk_size=250000, bins=2048, routes=None):
+    """Impacts of all travellers for ``[..., scenario, persona, mode]`` preference codes.
+
+    Returns per indicator the daily ``total`` of the population per scenario (``[..., scenario]``, in tons CO2e,
+    gigajoules and pizzas as in Step 8b), the likelihood-weighted ``aggregate`` (``[...]``), the ``persona`` totals
+    (``[..., scenario, persona]``) and the ``percentiles`` of the individual impacts across travellers (``[percentile,
+    ..., scenario]``). ``allocation`` may hold one matrix per scenario (``[..., scenario, 13, 6]``), ``routes`` are
+    the route factors of ``engine.distance_split``.
+    """
+    pref = np.asarray(pref, dtype=np.int8)
+    likelihood = np.asarray(likelihood, dtype=float)
+    shape = pref.shape[:-2]
+    no_pers = pref.shape[-2]
+    no_cells = int(np.prod(shape))
+
+    max_factor = {indicator: values.astype(np.float32).max() for indicator, values in
+                  per_km(factors, walk_calories, bike_calories, allocation, routes).items()}
+    max_distance = float(population['distance'].max(initial=0))
+    max_bodyweight = float(population['bodyweight'].max(initial=0))
+    histograms = {indicator: Histogram(np.full(no_cells, max_factor[indicator] * max_distance *
+                                               (max_bodyweight if indicator == 'Calories' else 1)), bins)
+                  for indicator in engine.INDICATORS}
+    persona_totals = {indicator: np.zeros(no_cells * no_pers) for indicator in engine.INDICATORS}
+
+    for start, stop, _, values in traveller_impacts(population, pref, factors, walk_calories, bike_calories,
+                                                     allocation, chunk_size, routes):
+        persona = population['persona'][start:stop].astype(np.int64)
+        offsets = (np.arange(no_cells) * no_pers)[:, np.newaxis] + persona
+        for indicator in engine.INDICATORS:
+            histograms[indicator].add(values[indicator].T)
+            persona_totals[indicator] += np.bincount(offsets.ravel(), weights=values[indicator].ravel(),
+                                                     minlength=no_cells * no_pers)
+
+    result = {}
+    for indicator in engine.INDICATORS:
+        persona_total = persona_totals[indicator].reshape(shape + (no_pers,)) / 1000
+        total = persona_total.sum(axis=-1)
+        result[indicator] = {
+            'total': total,
+            'aggregate': (total * likelihood / 100).sum(axis=-1),
+            'persona': persona_total,
+            'percentiles': histograms[indicator].percentiles(percentiles, shape),
+        }
+    return result
+
+
+def nbytes(population):
+    """Memory held by the population arrays."""
+    return sum(values.nbytes for values in population.values())
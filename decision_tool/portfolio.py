@@ -0,0 +1,155 @@
+"""Search for the best portfolio of interventions (Step 10f).
+
+A portfolio gives every candidate intervention a rollout intensity from ``levels``, e.g. 0 (not used) or 1 (fully
+used). The preference codes of a portfolio are shifted by the intensity-weighted sum of the intervention deltas and
+clipped to the 0-4 scale, so intensities of 0 and 1 reproduce the combined interventions of Step 10 and intermediate
+intensities shift the preferences part of the way.
+
+Portfolios are enumerated by size, each one extending a portfolio of the previous size by one intervention with a
+higher index than its own. Intervention costs are non-negative, so a portfolio over ``budget`` is pruned with all its
+extensions, and no portfolio with more than ``max_size`` interventions is built. The portfolios of one size are
+evaluated together along a leading axis of the engine, in chunks.
+
+A portfolio is fair if no persona is worse off in any scenario for the ``protect`` indicators, e.g. no persona burns
+fewer calories than without any intervention.
+"""
+import numpy as np
+import pandas as pd
+
+from decision_tool import engine
+
+# Direction in which an indicator improves: less CO2e and energy, more calories burned
+BETTER = {'CO2e': -1, 'Energy': -1, 'Calories': 1}
+
+LEVELS = (0, 1)
+
+
+def problem(pref, delta, distance, bodyweight, factors, walk_calories, bike_calories, weights, no_people, likelihood,
+            allocation=engine.MODE_ALLOCATION, costs=None, names=None, routes=None):
+    """Inputs of the search for ``[scenario, persona, mode]`` preference codes and ``[intervention, scenario,
+    persona, mode]`` intervention deltas; ``costs`` default to zero for all interventions. ``allocation`` and
+    ``routes`` are those of ``engine.distance_split``."""
+    delta = np.asarray(delta, dtype=float)
+    costs = np.zeros(len(delta)) if costs is None else np.asarray(costs, dtype=float)
+    if (costs < 0).any():
+        raise ValueError('Portfolio: intervention costs must not be negative')
+    return {
+        'pref': np.asarray(pref, dtype=float),
+        'delta': delta.reshape(len(delta), -1),
+        'distance': np.asarray(distance, dtype=float),
+        'routes': routes,
+        'bodyweight': np.asarray(bodyweight, dtype=float),
+        'factors': np.asarray(factors, dtype=float),
+        'walk_calories': walk_calories,
+        'bike_calories': bike_calories,
+        'weights': np.asarray(weights, dtype=float),
+        'no_people': no_people,
+        'likelihood': np.asarray(likelihood, dtype=float),
+        'allocation': np.asarray(allocation, dtype=float),
+        'costs': costs,
+        'names': list(names) if names is not None else [f'Intervention {k + 1}' for k in range(len(delta))],
+    }
+
+
+def evaluate(problem, intensity, chunk_size=None):
+    """Individual impacts (``[portfolio, scenario, persona]``) and likelihood-weighted population totals
+    (``[portfolio]``) per indicator of ``[portfolio, intervention]`` intensities."""
+    intensity = np.asarray(intensity, dtype=float).reshape(-1, len(problem['delta']))
+    pref = problem['pref']
+    chunk_size = chunk_size or max(1, engine.CHUNK_CELLS // pref.size)
+    individual = {indicator: np.empty((len(intensity),) + pref.shape[:2]) for indicator in engine.INDICATORS}
+    total = {indicator: np.empty(len(intensity)) for indicator in engine.INDICATORS}
+    for start in range(0, len(intensity), chunk_size):
+        stop = start + chunk_size
+        shifted = np.clip(pref + (intensity[start:stop] @ problem['delta']).reshape((-1,) + pref.shape), 0, 4)
+        dist = engine.distance_split(shifted, problem['distance'], allocation=problem['allocation'], decimals=None,
+                                     routes=problem['routes'])
+        ind = engine.impacts(dist, problem['factors'], problem['bodyweight'], problem['walk_calories'],
+                             problem['bike_calories'], decimals=None)
+        group = engine.group_totals(ind, problem['weights'], problem['no_people'], decimals=None)
+        aggr = engine.scenario_totals(group, problem['likelihood'])
+        for indicator in engine.INDICATORS:
+            individual[indicator][start:stop] = ind[indicator]
+            total[indicator][start:stop] = aggr[indicator].sum(axis=-1)
+    return individual, total
+
+
+def _extend(parents, last, levels, costs, budget, room):
+    # Portfolios that add one intervention after the last one used by their parent, within the budget, at most
+    # ``room`` of them. The candidates are built for a chunk of parents at a time, each chunk with about ``room``
+    # candidates, and the extension stops once ``room`` portfolios are found. Also returns the number of candidates
+    # over budget and whether all candidates were built
+    no_interv = parents.shape[1]
+    # Number of candidates up to each parent
+    candidates = np.concatenate([[0], np.cumsum((no_interv - 1 - last) * len(levels))])
+    children, intervs, pruned, start, truncated = [np.zeros((0, no_interv))], [np.zeros(0, dtype=int)], 0, 0, False
+    while room > 0 and start < len(parents):
+        stop = max(int(np.searchsorted(candidates, candidates[start] + room, side='right')) - 1, start + 1)
+        parent, interv, level = np.meshgrid(np.arange(start, stop), np.arange(no_interv), levels, indexing='ij')
+        keep = interv > last[parent]
+        parent, interv, level = parent[keep], interv[keep], level[keep]
+        chunk = parents[parent]
+        chunk[np.arange(len(chunk)), interv] = level
+        within = chunk @ costs <= budget + 1e-9
+        pruned += int((~within).sum())
+        truncated = within.sum() > room
+        children.append(chunk[within][:room])
+        intervs.append(interv[within][:room])
+        room -= len(children[-1])
+        start = stop
+    complete = not truncated and candidates[start] == candidates[-1]
+    return np.concatenate(children), np.concatenate(intervs), pruned, complete
+
+
+def search(problem, indicator='CO2e', budget=np.inf, levels=LEVELS, max_size=None, protect=('Calories',),
+           tolerance=1e-9, top=10, limit=200000):
+    """Best portfolios for ``indicator`` within ``budget`` that keep every persona at least as well off in the
+    ``protect`` indicators.
+
+    Returns a dict with the ``portfolios`` table (the ``top`` fair portfolios, best first: intensities per
+    intervention, cost, totals per indicator and the change of ``indicator`` against no intervention), the
+    ``baseline`` totals, and the numbers of ``evaluated``, ``pruned`` (over budget) and ``unfair`` portfolios.
+    ``complete`` is False if the search stopped after ``limit`` portfolios.
+    """
+    no_interv = len(problem['delta'])
+    levels = np.array(sorted(set(levels) - {0}), dtype=float)
+    max_size = no_interv if max_size is None else min(max_size, no_interv)
+    base_individual, base_total = evaluate(problem, np.zeros((1, no_interv)))
+    base_individual = {key: values[0] for key, values in base_individual.items()}
+
+    parents, last = np.zeros((1, no_interv)), np.array([-1])
+    found = [(parents, {key: values for key, values in base_total.items()})]
+    evaluated, pruned, unfair, complete = 1, 0, 0, True
+    for size in range(1, max_size + 1):
+        if not len(parents) or not len(levels):
+            break
+        parents, last, over, complete = _extend(parents, last, levels, problem['costs'], budget, limit - evaluated)
+        pruned += over
+        individual, total = evaluate(problem, parents)
+        evaluated += len(parents)
+        fair = np.ones(len(parents), dtype=bool)
+        for key in protect:
+            change = BETTER[key] * (individual[key] - base_individual[key])
+            fair &= (change >= -tolerance * np.maximum(np.abs(base_individual[key]), 1)).all(axis=(-2, -1))
+        unfair += int((~fair).sum())
+        found.append((parents[fair], {key: values[fair] for key, values in total.items()}))
+        if not complete:
+            break
+
+    intensity = np.concatenate([portfolios for portfolios, _ in found])
+    totals = {key: np.concatenate([values[key] for _, values in found]) for key in engine.INDICATORS}
+    order = np.argsort(-BETTER[indicator] * totals[indicator], kind='stable')[:top]
+    table = pd.DataFrame(intensity[order], columns=problem['names'])
+    table['Cost'] = intensity[order] @ problem['costs']
+    for key in engine.INDICATORS:
+        table[key] = totals[key][order]
+    base = base_total[indicator][0]
+    table[f'{indicator} change (%)'] = (totals[indicator][order] / base - 1) * 100 if base else 0.0
+    return {
+        'portfolios': table,
+        'baseline': {key: values[0] for key, values in base_total.items()},
+        'evaluated': evaluated,
+        'pruned': pruned,
+        'unfair': unfair,
+        'complete': complete,
+    }
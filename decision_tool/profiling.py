@@ -0,0 +1,114 @@
+"""Opt-in timings of the sections of a run of the interface script.
+
+A run is split into sections by ``Profiler.section`` marks in script order, one per step. Within a section, the time
+spent in functions wrapped by ``Profiler.timed`` and in ``Profiler.span`` blocks is booked to their category, e.g.
+``computation`` for the cached pipeline stages and ``charts`` for building and sending the Altair charts. The rest of
+the section is booked to ``widgets``: building the widgets and tables and the script code in between.
+
+The runs are kept as plain dicts, so the last runs of a session can be held in ``st.session_state`` and written out
+as one Chrome trace (``trace``), which opens in ``chrome://tracing`` or https://ui.perfetto.dev::
+
+    {"traceEvents": [{"name": "Run 3", "cat": "run", "ph": "X", "ts": 1520311.0, "dur": 1204881.2, "pid": 1,
+                      "tid": 1}, {"name": "Step 8", "cat": "section", ...}, {"name": "distance_split",
+                      "cat": "computation", ...}, ...], "displayTimeUnit": "ms"}
+"""
+import contextlib
+import functools
+import time
+
+import pandas as pd
+
+CATEGORIES = ['computation', 'charts']
+
+# Category of the time of a section outside the timed functions and blocks
+REST = 'widgets'
+
+
+class Profiler:
+    """Timings of one run, only taken if ``enabled``; a disabled profiler leaves all functions as they are."""
+
+    def __init__(self, enabled=True, clock=time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock
+        self.sections = []
+        self.spans = []
+        self._depth = 0
+
+    def section(self, name):
+        """Close the current section and start the section ``name``."""
+        if not self.enabled:
+            return
+        now = self.clock()
+        if self.sections:
+            self.sections[-1]['end'] = now
+        self.sections.append({'name': name, 'start': now, 'end': None})
+
+    @contextlib.contextmanager
+    def span(self, category, name=None):
+        """Book the time of the block to ``category`` of the current section."""
+        # Nested blocks (e.g. a timed stage called while building a chart) are only booked once, to the outer one
+        if not self.enabled or self._depth or not self.sections:
+            yield
+            return
+        self._depth += 1
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self._depth -= 1
+            self.spans.append({'name': name or category, 'category': category, 'section': len(self.sections) - 1,
+                               'start': start, 'end': self.clock()})
+
+    def timed(self, func, category, name=None):
+        """``func`` with the time of its calls booked to ``category``."""
+        if not self.enabled:
+            return func
+        name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.span(category, name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def finish(self):
+        """Close the last section and return the run, None if disabled or empty."""
+        if not self.enabled or not self.sections:
+            return None
+        self.sections[-1]['end'] = self.clock()
+        return {'sections': self.sections, 'spans': self.spans}
+
+
+def breakdown(run):
+    """Milliseconds per section (rows, in script order) and category (columns ``CATEGORIES``, ``REST`` and
+    ``total``) of a run."""
+    names = list(dict.fromkeys(section['name'] for section in run['sections']))
+    table = pd.DataFrame(0.0, index=pd.Index(names, name='Section'), columns=CATEGORIES + [REST, 'total'])
+    for section in run['sections']:
+        table.loc[section['name'], 'total'] += (section['end'] - section['start']) * 1000
+    for span in run['spans']:
+        name = run['sections'][span['section']]['name']
+        table.loc[name, span['category']] += (span['end'] - span['start']) * 1000
+    table[REST] = (table['total'] - table[CATEGORIES].sum(axis=1)).clip(lower=0)
+    return table
+
+
+def trace(runs, first=1):
+    """Chrome trace dict of ``runs``, numbered from ``first`` on: one event per run, section and timed span."""
+    runs = [run for run in runs if run]
+    origin = min((run['sections'][0]['start'] for run in runs), default=0)
+
+    def event(name, category, start, end, **args):
+        return {'name': name, 'cat': category, 'ph': 'X', 'ts': (start - origin) * 1e6, 'dur': (end - start) * 1e6,
+                'pid': 1, 'tid': 1, 'args': args}
+
+    events = []
+    for number, run in enumerate(runs, first):
+        sections = run['sections']
+        events.append(event(f'Run {number}', 'run', sections[0]['start'], sections[-1]['end']))
+        events.extend(event(section['name'], 'section', section['start'], section['end'], run=number)
+                      for section in sections)
+        events.extend(event(span['name'], span['category'], span['start'], span['end'], run=number,
+                            section=sections[span['section']]['name'])
+                      for span in run['spans'])
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
@@ -0,0 +1,150 @@
+"""Global sensitivity analysis of the likelihood-weighted daily impacts (Step 8c).
+
+The varied inputs are the emission and energy factors per mode, the calories burned while walking and cycling, the
+multimodal split, the persona distances and weights and the scenario likelihoods. Each input ranges over its point
+estimate +/- a relative spread; inputs with a point estimate of zero are left out. Distances and weights are varied
+by a common factor per persona group, so a catalog with hundreds of personas adds one input per group. All model
+runs of a design are evaluated together along a leading sample axis of the engine, in chunks.
+
+``morris`` screens the inputs with elementary effects, ``sobol`` estimates first-order and total indices with the
+Saltelli / Jansen estimators.
+"""
+import numpy as np
+import pandas as pd
+
+from decision_tool import engine
+
+SPREAD = 0.25
+
+# Range of the share of multimodal trips travelled with the first-mentioned mode
+SPLIT_RANGE = (0.6, 0.95)
+
+
+def problem(pref, distance, bodyweight, factors, walk_calories, bike_calories, weights, no_people, likelihood,
+            personas, scenarios, codes=None, allocation=engine.MODE_ALLOCATION, spread=SPREAD,
+            split_range=SPLIT_RANGE, routes=None):
+    """Inputs, names and ranges of the analysis for a ``[scenario, persona, mode]`` array of preference codes.
+
+    ``personas`` names the persona groups and ``codes`` assigns each persona to one of them; by default every
+    persona is its own group. ``allocation`` is the mode allocation (``[13, 6]`` or one per scenario), the multimodal
+    split varies its multimodal rows as in ``engine.mode_allocation``. ``routes`` are the route factors of
+    ``engine.distance_split``, they are not varied.
+    """
+    factors = np.asarray(factors, dtype=float)
+    distance = np.asarray(distance, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    codes = np.arange(len(personas)) if codes is None else np.asarray(codes)
+    # Distances and weights as factors of their point estimate per group, empty groups are not varied
+    used = np.bincount(codes, weights=distance, minlength=len(personas)) > 0
+    weighted = np.bincount(codes, weights=weights, minlength=len(personas)) > 0
+    # Blocks of the parameter vector in order, with their point estimates and the names of their inputs
+    blocks = {
+        'CO2e': (factors[0], [f'CO2e {mode}' for mode in engine.IMPACT_MODES]),
+        'MJ': (factors[1], [f'MJ {mode}' for mode in engine.IMPACT_MODES]),
+        'Walk calories': ([walk_calories], ['Walk calories']),
+        'Bike calories': ([bike_calories], ['Bike calories']),
+        'Multimodal split': ([engine.MULTIMODAL_SPLIT], ['Multimodal split']),
+        'Distance': (used, [f'Distance {p}' for p in personas]),
+        'Weight': (weighted, [f'Weight {p}' for p in personas]),
+        'Likelihood': (likelihood, [f'Likelihood {s}' for s in scenarios]),
+    }
+    ends = np.cumsum([len(block_names) for _, block_names in blocks.values()])
+    positions = {block: slice(end - len(block_names), end)
+                 for (block, (_, block_names)), end in zip(blocks.items(), ends)}
+    nominal = np.concatenate([values for values, _ in blocks.values()]).astype(float)
+    names = [name for _, block_names in blocks.values() for name in block_names]
+    bounds = np.stack([nominal * (1 - spread), nominal * (1 + spread)], axis=-1)
+    bounds[positions['Multimodal split']] = split_range
+    active = np.flatnonzero(bounds[:, 1] > bounds[:, 0])
+    return {
+        'names': [names[i] for i in active],
+        'bounds': bounds[active],
+        'active': active,
+        'nominal': nominal,
+        'positions': positions,
+        'pref': np.asarray(pref, dtype=np.int8),
+        'distance': distance,
+        'routes': routes,
+        'bodyweight': np.asarray(bodyweight, dtype=float),
+        'weights': weights,
+        'codes': codes,
+        'allocation': np.broadcast_to(np.asarray(allocation, dtype=float),
+                                      (len(scenarios),) + engine.MODE_ALLOCATION.shape),
+        'no_people': no_people,
+        'no_groups': len(personas),
+    }
+
+
+def evaluate(problem, x, indicator='CO2e', chunk_size=None):
+    """Likelihood-weighted daily total of ``indicator`` for each row of ``x`` (inputs scaled to the unit range)."""
+    x = np.asarray(x, dtype=float)
+    chunk_size = chunk_size or max(1, engine.CHUNK_CELLS // problem['pref'].size)
+    low, high = problem['bounds'][:, 0], problem['bounds'][:, 1]
+    codes, positions = problem['codes'], problem['positions']
+    result = np.empty(len(x))
+    for start in range(0, len(x), chunk_size):
+        theta = np.tile(problem['nominal'], (len(x[start:start + chunk_size]), 1))
+        theta[:, problem['active']] = low + x[start:start + chunk_size] * (high - low)
+        block = {name: theta[:, position] for name, position in positions.items()}
+        factors = np.stack([block['CO2e'], block['MJ']], axis=1)
+        allocation = engine.mode_allocation(block['Multimodal split'][:, 0], problem['allocation'])
+        distance = problem['distance'] * block['Distance'][:, codes]
+        weights = problem['weights'] * block['Weight'][:, codes]
+        likelihood = block['Likelihood']
+
+        dist = engine.distance_split(problem['pref'], distance, allocation=allocation, decimals=None,
+                                     routes=problem['routes'])
+        ind = engine.impacts(dist, factors, problem['bodyweight'], block['Walk calories'][:, 0],
+                             block['Bike calories'][:, 0], decimals=None)
+        group = engine.group_totals({indicator: ind[indicator]}, weights, problem['no_people'], decimals=None)
+        result[start:start + chunk_size] = engine.scenario_totals(group, likelihood)[indicator].sum(axis=-1)
+    return result
+
+
+def morris(problem, trajectories=100, levels=4, indicator='CO2e', seed=0):
+    """Elementary effects screening, one row per input with ``mu``, ``mu_star`` and ``sigma``.
+
+    Effects are changes of the output for a step of 2/3 of the input range (for four levels).
+    """
+    rng = np.random.default_rng(seed)
+    k = len(problem['names'])
+    step = levels / (2 * (levels - 1))
+    # Each trajectory starts on the lower half of the grid and raises one input at a time by ``step``
+    start = rng.integers(0, levels // 2, (trajectories, 1, k)) / (levels - 1)
+    order = np.argsort(rng.random((trajectories, k)), axis=-1)
+    raised = np.zeros((trajectories, k + 1, k))
+    for j in range(k):
+        raised[np.arange(trajectories), j + 1:, order[:, j]] = step
+    points = start + raised
+
+    y = evaluate(problem, points.reshape(-1, k), indicator=indicator).reshape(trajectories, k + 1)
+    effects = np.empty((trajectories, k))
+    np.put_along_axis(effects, order, np.diff(y, axis=-1) / step, axis=-1)
+    return pd.DataFrame({
+        'mu': effects.mean(axis=0),
+        'mu_star': np.abs(effects).mean(axis=0),
+        'sigma': effects.std(axis=0, ddof=1),
+    }, index=pd.Index(problem['names'], name='Input'))
+
+
+def sobol(problem, samples=2048, indicator='CO2e', seed=0):
+    """First-order (``S1``) and total (``ST``) Sobol indices, one row per input.
+
+    Uses ``samples * (inputs + 2)`` model runs.
+    """
+    rng = np.random.default_rng(seed)
+    k = len(problem['names'])
+    a = rng.random((samples, k))
+    b = rng.random((samples, k))
+    ab = np.repeat(a[np.newaxis], k, axis=0)
+    ab[np.arange(k), :, np.arange(k)] = b.T
+
+    y = evaluate(problem, np.concatenate([a, b, ab.reshape(-1, k)]), indicator=indicator)
+    y_a, y_b, y_ab = y[:samples], y[samples:2 * samples], y[2 * samples:].reshape(k, samples)
+    variance = np.var(np.concatenate([y_a, y_b]))
+    if variance == 0:
+        s1 = st = np.zeros(k)
+    else:
+        s1 = (y_b * (y_ab - y_a)).mean(axis=-1) / variance
+        st = 0.5 * ((y_a - y_ab) ** 2).mean(axis=-1) / variance
+    return pd.DataFrame({'S1': s1, 'ST': st}, index=pd.Index(problem['names'], name='Input'))
@@ -0,0 +1,148 @@
+"""Compact, versioned snapshots of all inputs of the interface.
+
+A snapshot is a JSON document with the ordinal tables stored as integer codes instead of their labels::
+
+    {"version": 1,
+     "scenarios": {"names": [...], "descriptions": [...], "likelihood": [40, ...],
+                   "characteristics": [[3, 1, 4, 3], ...]},
+     "uncertainties": {"names": [...], "descriptions": [...]},
+     "personas": {"names": [...], "descriptions": [...], "distance": [60, ...], "bodyweight": [57, ...],
+                  "weights": [20, ...]},
+     "preferences": [[[2, 3, 0, ...], ...], ...],
+     "population": 50000, "synthetic_population": false,
+     "walk_calories": 1, "bike_calories": 0.4, "factors": {"CO2e": [15, ...], "MJ": [0.2, ...]},
+     "allocation": [[0, 0, 1, 0, 0, 0], ...], "scenario_allocation": [null, [[0, 0, 1, 0, 0, 0], ...], ...],
+     "interventions": {"names": [...], "acronyms": [...], "descriptions": [...], "impacts": [[[[0, 1, ...]]]]}}
+
+The scenario ``characteristics`` hold codes 1-4 per uncertainty, the ``preferences`` codes 0-4 as
+``[scenario, persona, mode]`` and the intervention ``impacts`` deltas -2 to +2 as ``[intervention, scenario, persona,
+mode]``, modes in ``engine.MODES`` order. ``factors`` are in ``engine.IMPACT_MODES`` order. ``allocation`` holds the
+shares of the mode allocation of Step 7 as ``[mode, impact mode]``, ``scenario_allocation`` the own allocation of a
+scenario or null; both are optional and default to ``engine.MODE_ALLOCATION``. ``personas`` and ``preferences`` are
+left out when the personas come from a catalog; the impacts then hold one row per persona group. The numbers of
+scenarios, personas and interventions are limited to ``COUNTS``.
+"""
+import json
+
+import numpy as np
+
+from decision_tool import engine
+
+VERSION = 1
+
+# Smallest and largest number of scenarios, personas and interventions, the limits of the sliders of the interface
+COUNTS = {'scenarios': (2, 8), 'personas': (2, 8), 'interventions': (1, 20)}
+
+
+def _codes(values, shape, low, high, name):
+    codes = np.asarray(values, dtype=np.int64)
+    if codes.shape != shape:
+        raise ValueError(f'Snapshot: {name} has shape {codes.shape} instead of {shape}')
+    if codes.size and (codes.min() < low or codes.max() > high):
+        raise ValueError(f'Snapshot: {name} must hold codes from {low} to {high}')
+    return codes.astype(np.int8)
+
+
+def _count(section, name):
+    count = len(section['names'])
+    low, high = COUNTS[name]
+    if not low <= count <= high:
+        raise ValueError(f'Snapshot: {count} {name} instead of {low} to {high}')
+    return count
+
+
+def _texts(section, key, length, name):
+    values = [str(value) for value in section[key]]
+    if len(values) != length:
+        raise ValueError(f'Snapshot: {len(values)} {name} {key} for {length} {name}')
+    return values
+
+
+def _numbers(section, key, length, name):
+    values = np.asarray(section[key], dtype=float)
+    if values.shape != (length,):
+        raise ValueError(f'Snapshot: {len(values)} {name} {key} for {length} {name}')
+    return values
+
+
+def _allocation(values, name):
+    values = np.asarray(values, dtype=float)
+    if values.shape != engine.MODE_ALLOCATION.shape:
+        raise ValueError(f'Snapshot: {name} has shape {values.shape} instead of {engine.MODE_ALLOCATION.shape}')
+    return values
+
+
+def dumps(snapshot):
+    """JSON bytes of a snapshot dict, code arrays written as nested lists."""
+    def convert(value):
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, np.generic):
+            return value.item()
+        raise TypeError(f'Snapshot: cannot store {type(value).__name__}')
+    return json.dumps(dict(snapshot, version=VERSION), default=convert, separators=(',', ':')).encode()
+
+
+def loads(data):
+    """Snapshot dict of JSON bytes, with the code tables as int8 arrays. Raises ValueError for invalid snapshots."""
+    try:
+        snapshot = json.loads(data)
+        version = snapshot['version']
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Snapshot: not a snapshot file')
+    if version != VERSION:
+        raise ValueError(f'Snapshot: version {version} is not supported (expected {VERSION})')
+
+    try:
+        scenarios = snapshot['scenarios']
+        no_scen = _count(scenarios, 'scenarios')
+        scenarios = {
+            'names': _texts(scenarios, 'names', no_scen, 'scenarios'),
+            'descriptions': _texts(scenarios, 'descriptions', no_scen, 'scenarios'),
+            'likelihood': _numbers(scenarios, 'likelihood', no_scen, 'scenarios'),
+            'characteristics': _codes(scenarios['characteristics'], (no_scen, 4), 1, 4, 'characteristics'),
+        }
+        uncertainties = {key: _texts(snapshot['uncertainties'], key, 4, 'uncertainties')
+                         for key in ['names', 'descriptions']}
+
+        result = {
+            'version': version,
+            'scenarios': scenarios,
+            'uncertainties': uncertainties,
+            'population': int(snapshot['population']),
+            'synthetic_population': bool(snapshot.get('synthetic_population', False)),
+            'walk_calories': float(snapshot['walk_calories']),
+            'bike_calories': float(snapshot['bike_calories']),
+            'factors': {key: _numbers(snapshot['factors'], key, len(engine.IMPACT_MODES), 'modes')
+                        for key in engine.FACTORS},
+            'allocation': _allocation(snapshot.get('allocation', engine.MODE_ALLOCATION), 'allocation'),
+        }
+        scenario_allocation = snapshot.get('scenario_allocation') or [None] * no_scen
+        if len(scenario_allocation) != no_scen:
+            raise ValueError(f'Snapshot: {len(scenario_allocation)} scenario_allocation for {no_scen} scenarios')
+        result['scenario_allocation'] = [None if values is None else _allocation(values, 'scenario_allocation')
+                                         for values in scenario_allocation]
+
+        no_pers = None
+        if 'personas' in snapshot:
+            personas = snapshot['personas']
+            no_pers = _count(personas, 'personas')
+            result['personas'] = dict(
+                {key: _texts(personas, key, no_pers, 'personas') for key in ['names', 'descriptions']},
+                **{key: _numbers(personas, key, no_pers, 'personas')
+                   for key in ['distance', 'bodyweight', 'weights']})
+            result['preferences'] = _codes(snapshot['preferences'], (no_scen, no_pers, len(engine.MODES)), 0, 4,
+                                           'preferences')
+
+        interventions = snapshot['interventions']
+        no_interv = _count(interventions, 'interventions')
+        impacts = np.asarray(interventions['impacts'])
+        if no_pers is None:
+            no_pers = impacts.shape[2] if impacts.ndim == 4 else 0
+        result['interventions'] = dict(
+            {key: _texts(interventions, key, no_interv, 'interventions')
+             for key in ['names', 'acronyms', 'descriptions']},
+            impacts=_codes(impacts, (no_interv, no_scen, no_pers, len(engine.MODES)), -2, 2, 'impacts'))
+    except (KeyError, TypeError) as error:
+        raise ValueError(f'Snapshot: missing or invalid entry {error}')
+    return result
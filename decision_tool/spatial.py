@@ -0,0 +1,271 @@
+"""Home-work distances of the personas from a zone system and a street and transit network (Step 2, optional).
+
+A network is an edge list, either a CSV file with one row per edge::
+
+    From,To,Length (km),Modes
+    N1,N2,0.8,Car MoD MM Bike Walk
+    N2,S1,0.1,PT Walk
+    S1,S2,2.5,PT
+
+or a GeoJSON FeatureCollection of LineString features, whose ends are the nodes and whose length is measured along
+the lon/lat coordinates unless given as property ``length_km``. ``Modes`` (property ``modes``) lists the impact modes
+of ``engine.IMPACT_MODES`` that can use an edge and defaults to all but PT, i.e. a street; transit lines need links
+from the zone nodes tagged PT as well. Edges are two-way unless ``Oneway`` (``oneway``) is true.
+
+Zones are a CSV file with one row per ``Zone`` and its network ``Node`` or its ``X`` and ``Y`` (lon/lat) location, or
+a GeoJSON FeatureCollection of Point or Polygon features with a ``zone`` property. Zones given by a location are
+attached to the nearest node of a GeoJSON network.
+
+The shortest paths between all zones are computed per impact mode once per network and zone file and cached on disk,
+so assigning the personas to zones is a lookup. The daily distance of a persona is the shortest home-work-home round
+trip of any impact mode, its route factors the round trip of each impact mode relative to it (``[persona, impact
+mode]``, 1 where the mode cannot make the trip), see ``engine.distance_split``.
+"""
+import hashlib
+import heapq
+import io
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from decision_tool import engine
+
+# Impact modes of the edges without modes: all but public transport
+STREET_MODES = [mode for mode in engine.IMPACT_MODES if mode != 'PT']
+
+# Directory of the cached shortest paths
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'decision_tool')
+
+EARTH_RADIUS = 6371.0
+
+
+def _is_geojson(data):
+    return data.lstrip()[:1] == b'{'
+
+
+def _modes(value):
+    # Mask of the impact modes listed in a text, e.g. "Car MoD, Bike"
+    if pd.isna(value) or not str(value).strip():
+        return np.isin(engine.IMPACT_MODES, STREET_MODES)
+    lookup = {mode.lower(): j for j, mode in enumerate(engine.IMPACT_MODES)}
+    mask = np.zeros(len(engine.IMPACT_MODES), dtype=bool)
+    for token in re.split(r'[\s,;|/]+', str(value).strip()):
+        if token.lower() not in lookup:
+            raise ValueError(f'Network: unknown mode {token}, expected one of {", ".join(engine.IMPACT_MODES)}')
+        mask[lookup[token.lower()]] = True
+    return mask
+
+
+def _flag(value):
+    # A CSV column with blank cells is read as floats, e.g. 1.0
+    if isinstance(value, (bool, int, float, np.number)):
+        return not pd.isna(value) and bool(value)
+    return str(value).strip().lower() in ('1', 'true', 'yes')
+
+
+def _haversine(lon1, lat1, lon2, lat2):
+    # Great circle distance in km between lon/lat points
+    lon1, lat1, lon2, lat2 = map(np.radians, (lon1, lat1, lon2, lat2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(a))
+
+
+def _features(data, name):
+    try:
+        collection = json.loads(data)
+    except ValueError:
+        raise ValueError(f'{name}: the file is neither a CSV file nor valid GeoJSON')
+    features = collection.get('features', []) if isinstance(collection, dict) else []
+    if not features:
+        raise ValueError(f'{name}: the GeoJSON file holds no features')
+    return features
+
+
+def _table(data, columns, name):
+    table = pd.read_csv(io.BytesIO(data))
+    missing = [column for column in columns if column not in table]
+    if missing:
+        raise ValueError(f'{name} is missing the columns {", ".join(missing)}')
+    return table
+
+
+def read_network(data):
+    """Network of CSV or GeoJSON bytes as arrays: ``nodes`` (names), ``coords`` (``[node, 2]`` lon/lat, None for
+    CSV files), ``source``, ``target`` and ``length`` (km) of the directed edges and their ``modes`` mask."""
+    source, target, length, modes, oneway = [], [], [], [], []
+    if _is_geojson(data):
+        index = {}
+        for feature in _features(data, 'Network'):
+            geometry, properties = feature.get('geometry') or {}, feature.get('properties') or {}
+            lines = {'LineString': [geometry.get('coordinates')],
+                     'MultiLineString': geometry.get('coordinates')}.get(geometry.get('type'), [])
+            for line in lines:
+                line = np.asarray(line, dtype=float)[:, :2]
+                ends = [index.setdefault(tuple(np.round(point, 6)), len(index)) for point in line[[0, -1]]]
+                source.append(ends[0])
+                target.append(ends[1])
+                if properties.get('length_km') is None:
+                    length.append(_haversine(*line[:-1].T, *line[1:].T).sum())
+                else:
+                    length.append(float(properties['length_km']))
+                modes.append(_modes(properties.get('modes')))
+                oneway.append(_flag(properties.get('oneway')))
+        nodes = [f'{lon:.6f} {lat:.6f}' for lon, lat in index]
+        coords = np.array(list(index), dtype=float).reshape(-1, 2)
+    else:
+        table = _table(data, ['From', 'To', 'Length (km)'], 'Network')
+        codes, nodes = pd.factorize(pd.concat([table['From'], table['To']]).astype(str))
+        source, target = codes[:len(table)], codes[len(table):]
+        length = pd.to_numeric(table['Length (km)'], errors='coerce')
+        modes = [_modes(value) for value in table.get('Modes', [None] * len(table))]
+        oneway = [_flag(value) for value in table.get('Oneway', [False] * len(table))]
+        nodes, coords = list(nodes), None
+    length = np.asarray(length, dtype=float)
+    if not len(length):
+        raise ValueError('Network: the file holds no edges')
+    if not np.isfinite(length).all() or (length < 0).any():
+        raise ValueError('Network: each edge needs a length of at least 0 km')
+    # Two-way edges are added in both directions
+    back = ~np.asarray(oneway, dtype=bool)
+    source, target = np.asarray(source, dtype=np.int64), np.asarray(target, dtype=np.int64)
+    modes = np.asarray(modes, dtype=bool).reshape(-1, len(engine.IMPACT_MODES))
+    return {
+        'nodes': nodes,
+        'coords': coords,
+        'source': np.concatenate([source, target[back]]),
+        'target': np.concatenate([target, source[back]]),
+        'length': np.concatenate([length, length[back]]),
+        'modes': np.concatenate([modes, modes[back]]),
+    }
+
+
+def _nearest(coords, points):
+    # Nearest node of each lon/lat point, on a plane scaled to the latitude
+    scale = np.array([np.cos(np.radians(coords[:, 1].mean())), 1])
+    return np.array([np.argmin((((coords - point) * scale) ** 2).sum(axis=-1)) for point in points], dtype=np.int64)
+
+
+def _vertices(coordinates):
+    # Flat list of the [lon, lat] points of nested GeoJSON coordinates
+    if len(coordinates) and np.isscalar(coordinates[0]):
+        return [coordinates[:2]]
+    return [point for part in coordinates for point in _vertices(part)]
+
+
+def read_zones(data, network):
+    """Zone ``names`` of CSV or GeoJSON bytes and the ``nodes`` (indices) of the ``network`` they start from."""
+    if _is_geojson(data):
+        names, points = [], []
+        for feature in _features(data, 'Zones'):
+            geometry, properties = feature.get('geometry') or {}, feature.get('properties') or {}
+            name = properties.get('zone', properties.get('name'))
+            if name is None:
+                raise ValueError('Zones: each feature needs a zone property')
+            # Polygons are located at the mean of their vertices
+            vertices = np.array(_vertices(geometry.get('coordinates')), dtype=float).reshape(-1, 2)
+            names.append(str(name))
+            points.append(vertices.mean(axis=0))
+        table = pd.DataFrame({'Zone': names, 'X': [p[0] for p in points], 'Y': [p[1] for p in points]})
+    else:
+        table = _table(data, ['Zone'], 'Zones')
+    table['Zone'] = table['Zone'].astype(str)
+    if table['Zone'].duplicated().any():
+        raise ValueError(f'Zones: zone {table["Zone"][table["Zone"].duplicated()].iloc[0]} is given more than once')
+
+    if 'Node' in table:
+        lookup = {node: j for j, node in enumerate(network['nodes'])}
+        unknown = [node for node in table['Node'].astype(str) if node not in lookup]
+        if unknown:
+            raise ValueError(f'Zones: node {unknown[0]} is not part of the network')
+        nodes = np.array([lookup[node] for node in table['Node'].astype(str)], dtype=np.int64)
+    elif 'X' in table and 'Y' in table:
+        if network['coords'] is None:
+            raise ValueError('Zones: zones given by location need a GeoJSON network, otherwise give their Node')
+        nodes = _nearest(network['coords'], table[['X', 'Y']].to_numpy(dtype=float))
+    else:
+        raise ValueError('Zones: each zone needs a Node or an X and Y location')
+    return {'names': table['Zone'].tolist(), 'nodes': nodes}
+
+
+def _dijkstra(adjacency, start, goals):
+    # Shortest path lengths from node ``start`` to all nodes of an adjacency list of (node, length) pairs, stopping
+    # once all ``goals`` are settled
+    dist = [float('inf')] * len(adjacency)
+    dist[start] = 0.0
+    open_goals = set(goals)
+    heap = [(0.0, start)]
+    while heap and open_goals:
+        d, node = heapq.heappop(heap)
+        if d > dist[node]:
+            continue
+        open_goals.discard(node)
+        for other, length in adjacency[node]:
+            new = d + length
+            if new < dist[other]:
+                dist[other] = new
+                heapq.heappush(heap, (new, other))
+    return dist
+
+
+def shortest_paths(network, zones):
+    """Shortest path lengths (km) between all zones per impact mode, shape ``[impact mode, zone, zone]``; inf where
+    no path exists.
+
+    Modes using the same edges share one search, each search runs from every zone until all zones are reached.
+    """
+    masks = network['modes'].T
+    nodes = np.asarray(zones['nodes']).tolist()
+    paths = np.empty((len(masks), len(nodes), len(nodes)))
+    searched = {}
+    for k, mask in enumerate(masks):
+        key = mask.tobytes()
+        if key not in searched:
+            adjacency = [[] for _ in network['nodes']]
+            for source, target, length in zip(network['source'][mask].tolist(), network['target'][mask].tolist(),
+                                              network['length'][mask].tolist()):
+                adjacency[source].append((target, length))
+            searched[key] = np.array([np.take(_dijkstra(adjacency, node, nodes), nodes) for node in nodes])
+        paths[k] = searched[key]
+    return paths
+
+
+def zone_paths(network_data, zones_data, cache_dir=CACHE_DIR):
+    """Zone ``names`` and their ``shortest_paths`` for network and zone file bytes, loaded from ``cache_dir`` if the
+    same files were used before."""
+    digest = hashlib.sha1(hashlib.sha1(network_data).digest() + hashlib.sha1(zones_data).digest()).hexdigest()
+    path = os.path.join(cache_dir, f'paths-{digest}.npz')
+    if os.path.exists(path):
+        with np.load(path) as cached:
+            return {'names': cached['names'].tolist(), 'paths': cached['paths']}
+    network = read_network(network_data)
+    zones = read_zones(zones_data, network)
+    result = {'names': zones['names'], 'paths': shortest_paths(network, zones)}
+    # Written to a temporary file first, so that other sessions never load a partial file
+    os.makedirs(cache_dir, exist_ok=True)
+    partial = f'{path}.{os.getpid()}.tmp'
+    with open(partial, 'wb') as file:
+        np.savez(file, names=np.array(result['names'], dtype=str), paths=result['paths'])
+    os.replace(partial, path)
+    return result
+
+
+def persona_distances(paths, home, work):
+    """Daily distance (km) and ``[persona, impact mode]`` route factors of personas living and working in the zones
+    ``home`` and ``work`` (names), for the result of ``zone_paths``."""
+    lookup = {name: j for j, name in enumerate(paths['names'])}
+    unknown = [str(zone) for zone in list(home) + list(work) if str(zone) not in lookup]
+    if unknown:
+        raise ValueError(f'Zones: {unknown[0]} is not a zone of the zone file')
+    home = np.array([lookup[str(zone)] for zone in home], dtype=np.int64)
+    work = np.array([lookup[str(zone)] for zone in work], dtype=np.int64)
+    round_trip = paths['paths'][:, home, work] + paths['paths'][:, work, home]
+    distance = round_trip.min(axis=0)
+    if not np.isfinite(distance).all():
+        raise ValueError(f'Zones: no mode connects the home and work zones of persona '
+                         f'{np.flatnonzero(~np.isfinite(distance))[0] + 1}')
+    routes = np.divide(round_trip, distance, out=np.ones_like(round_trip),
+                       where=np.isfinite(round_trip) & (distance > 0))
+    return distance, routes.T
@@ -0,0 +1,63 @@
+"""Statistics behind the written analysis of Steps 8c and 10c.
+
+``extremes`` reduces a ``[..., scenario, persona]`` array once along the scenario axis (min, max and their positions)
+and once along the persona axis, and picks all extremes of the narrative from these reductions. Leading axes, e.g.
+interventions, are summarised in the same call.
+"""
+import numpy as np
+
+
+def _take(values, index):
+    return np.take_along_axis(values, np.asarray(index)[..., np.newaxis], axis=-1)[..., 0]
+
+
+def extremes(values):
+    """Extremes of ``[..., scenario, persona]`` values, as arrays over the leading axes.
+
+    - ``mean``: mean per persona across scenarios, ``mean_max`` / ``mean_min`` the personas with the highest and
+      lowest mean
+    - ``max``, ``max_persona``, ``max_scenario``: overall maximum and where it occurs, ``max_low`` and
+      ``max_low_scenario`` the lowest value of the same persona across scenarios and where it occurs
+    - ``min``, ``min_persona``, ``min_scenario``: overall minimum, ``min_high`` and ``min_high_scenario`` the highest
+      value of the same persona
+    """
+    values = np.asarray(values, dtype=float)
+    mean = values.mean(axis=-2)
+    low, low_at = values.min(axis=-2), values.argmin(axis=-2)
+    high, high_at = values.max(axis=-2), values.argmax(axis=-2)
+    max_persona = high.argmax(axis=-1)
+    min_persona = low.argmin(axis=-1)
+    return {
+        'mean': mean,
+        'mean_max': mean.argmax(axis=-1),
+        'mean_min': mean.argmin(axis=-1),
+        'max': _take(high, max_persona),
+        'max_persona': max_persona,
+        'max_scenario': _take(high_at, max_persona),
+        'max_low': _take(low, max_persona),
+        'max_low_scenario': _take(low_at, max_persona),
+        'min': _take(low, min_persona),
+        'min_persona': min_persona,
+        'min_scenario': _take(low_at, min_persona),
+        'min_high': _take(high, min_persona),
+        'min_high_scenario': _take(high_at, min_persona),
+    }
+
+
+def scenario_extremes(totals):
+    """Highest and lowest of ``[..., scenario]`` totals and the scenarios they belong to."""
+    totals = np.asarray(totals, dtype=float)
+    return {
+        'max': totals.max(axis=-1),
+        'max_scenario': totals.argmax(axis=-1),
+        'min': totals.min(axis=-1),
+        'min_scenario': totals.argmin(axis=-1),
+    }
+
+
+def ratio(numerator, denominator):
+    """``numerator / denominator``, infinite where the denominator is zero."""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    return np.divide(numerator, denominator, out=np.full(np.broadcast(numerator, denominator).shape, np.inf),
+                     where=denominator != 0)
@@ -0,0 +1,116 @@
+"""Yearly trajectories of the impacts between anchor years (Step 10g).
+
+The inputs of Steps 1-9 describe one snapshot year. Inputs that change over time, i.e. the mode preferences, the
+emission and energy factors and the population size, are given at a few anchor years and interpolated linearly to
+every year of the trajectory; before the first and after the last anchor year they stay constant. Interpolated
+preference codes may be fractional, the modal split weighs them like whole codes.
+
+The years are one more leading axis of the engine arrays (``[..., year, scenario, persona, mode]``), so all years,
+scenarios and interventions are evaluated in one call of each engine function instead of one run per year.
+"""
+import numpy as np
+import pandas as pd
+
+from decision_tool import engine
+
+# Default first and last year of the trajectory
+YEARS = (2025, 2050)
+
+# Days per year of the annual totals
+DAYS = 365
+
+
+def anchor_weights(anchors, years):
+    """Weight of each of the ``anchors`` years in each of the ``years``, shape ``[year, anchor]``.
+
+    The values are interpolated linearly between the anchor years (in any order) and kept constant outside of them.
+    """
+    anchors = np.asarray(anchors, dtype=float)
+    if not np.isfinite(anchors).all():
+        raise ValueError('Trajectory: each anchor needs a year')
+    if len(np.unique(anchors)) < len(anchors):
+        raise ValueError('Trajectory: each anchor year can only be given once')
+    order = np.argsort(anchors)
+    # The weights of an anchor are the interpolation of its unit vector
+    weights = np.stack([np.interp(years, anchors[order], unit) for unit in np.eye(len(anchors))], axis=-1)
+    return weights[:, np.argsort(order)]
+
+
+def interpolate(values, anchors, years, axis=0):
+    """``values`` given at the ``anchors`` years along ``axis`` at each of the ``years``, all years at once as one
+    matrix product over the anchor axis."""
+    values = np.moveaxis(np.asarray(values, dtype=float), axis, 0)
+    return np.ascontiguousarray(np.moveaxis(np.tensordot(anchor_weights(anchors, years), values, axes=1), 0, axis))
+
+
+def annual_totals(pref, anchors, years, distance, bodyweight, factors, walk_calories, bike_calories, weights,
+                  no_people, allocation=engine.MODE_ALLOCATION, days=DAYS, routes=None):
+    """Annual population totals per indicator (t CO2e, GJ and pizzas per year), shape ``[..., year, scenario]``.
+
+    ``pref`` holds the ``[..., anchor, scenario, persona, mode]`` preference codes, ``factors`` the ``[anchor, 2, 6]``
+    Step 7 tables and ``no_people`` the ``[anchor]`` population sizes at the ``anchors`` years; the other inputs are
+    those of the snapshot, ``routes`` those of ``engine.distance_split``. The totals equal those of
+    ``engine.group_totals`` summed over the personas.
+    """
+    pref = np.asarray(pref, dtype=float)
+    anchor_years = anchor_weights(anchors, years)
+    # The modal split of the interpolated codes is the ratio of the interpolated kilometre shares (codes times
+    # allocation) and the interpolated code totals. Only the code totals are interpolated per persona, the shares
+    # are weighed per anchor after the personas are summed up
+    shares = pref @ allocation
+    if routes is not None:
+        shares = shares * np.asarray(routes, dtype=float)
+    total = interpolate(pref.sum(axis=-1), anchors, years, axis=-3)
+    # Kilometres per code of each persona, weighted by its share of the population, [..., scenario, year, persona]
+    per_code = np.asarray(weights, dtype=float) * np.asarray(distance, dtype=float) / 100
+    per_code = np.swapaxes(np.divide(per_code, total, out=np.zeros_like(total), where=total > 0), -2, -3)
+    per_weight = per_code * np.asarray(bodyweight, dtype=float)
+    # Kilometres per impact mode of an average traveller of the population; the years are the rows of one matrix
+    # product per anchor and scenario, the factors of each year only apply after the personas are summed up
+    km, km_weight = 0, 0
+    for j, anchor_weight in enumerate(anchor_years.T):
+        km = km + anchor_weight[:, np.newaxis] * (per_code @ shares[..., j, :, :, :])
+        km_weight = km_weight + anchor_weight[:, np.newaxis] * (per_weight @ shares[..., j, :, :, :])
+    # [..., year, scenario, impact mode]
+    km, km_weight = np.swapaxes(km, -2, -3), np.swapaxes(km_weight, -2, -3)
+
+    factors = interpolate(factors, anchors, years)[:, np.newaxis]
+    people = interpolate(no_people, anchors, years)[:, np.newaxis] * days / 1000
+    return {
+        'CO2e': (km * factors[..., 0, :]).sum(axis=-1) / 1000 * people,
+        'Energy': (km * factors[..., 1, :]).sum(axis=-1) * people,
+        'Calories': (km_weight[..., engine.BIKE] * bike_calories
+                     + km_weight[..., engine.WALK] * walk_calories) * people,
+    }
+
+
+def cumulative(annual):
+    """Totals from the first year up to each year, shape ``[..., year, scenario]``."""
+    return {indicator: np.cumsum(values, axis=-2) for indicator, values in annual.items()}
+
+
+def expected(annual, likelihood):
+    """Totals weighted by the scenario likelihood (in %), shape ``[..., year]``."""
+    likelihood = np.asarray(likelihood, dtype=float)
+    return {indicator: values @ likelihood / 100 for indicator, values in annual.items()}
+
+
+def frame(annual, likelihood, years, variants, scenarios):
+    """Long frame of ``[variant, year, scenario]`` annual totals with one row per variant, scenario and year.
+
+    The scenarios are followed by the likelihood-weighted totals as scenario ``Expected``. Holds the annual totals
+    per indicator (columns ``CO2e``, ...) and the totals up to each year (``CO2e cumulative``, ...).
+    """
+    values = {indicator: np.concatenate([totals, total[..., np.newaxis]], axis=-1)
+              for (indicator, totals), total in zip(annual.items(), expected(annual, likelihood).values())}
+    no_var, no_years, no_scen = values['CO2e'].shape
+    table = pd.DataFrame({
+        'Intervention': np.repeat(variants, no_years * no_scen),
+        'Scenario': np.tile(list(scenarios) + ['Expected'], no_var * no_years),
+        'Year': np.tile(np.repeat(years, no_scen), no_var),
+    })
+    for indicator in engine.INDICATORS:
+        table[indicator] = values[indicator].reshape(-1)
+    for indicator, totals in cumulative(values).items():
+        table[f'{indicator} cumulative'] = totals.reshape(-1)
+    return table
@@ -1,1766 +1,1440 @@
 # Load required packages
+import contextlib
+import io
+import json
+import types
+
 import altair as alt
+import numpy as np
 import pandas as pd
 import streamlit as st
-from PIL import Image
-from itertools import islice
-
-# Introduction
-st.title('Urban Mobility Impact Assessment and Comparison Tool')
-st.write('This is a prototype of a tool to compare impacts of potential interventions on a local urban mobility '
-         'system. It provides an interface to compare impacts across user groups (personas) and across '
-         'future scenarios. Standard values are defined as reference values. This '
-         'application compares the impact of an intervention (e.g., policy/technology) for different '
-         'persona groups and across 2030 scenarios, measured by CO2 equivalent (CO2e) emissions, energy demand in '
-         'megajoules (MJ), and calories burned.')
-st.write('As a prototype, some of the input fields are not as intuitive as they should be in a final version. We hope '
-         'that it is clear nevertheless and are looking forward to any feedback.')
-
-# Information
-st.subheader('Information')
-st.write('You can reset the form by refreshing the website. No values or uploaded images are stored. The code is '
-         'available on Github: https://github.com/TjarkGall/decision-tool-interface')
-st.write('The concept was developed as part of the Institute Pascal research programme 2022 and has been continued as '
-         'part of the work of the <a href="http://www.chaire-anthropolis.fr/">Anthropolis Chair.</a>',
-         unsafe_allow_html=True)
-st.subheader('Questions?')
-st.write('Contact Tjark Gall | tjark.gall@irt-systemx.fr')
-
-# Anthropolis logo
-image = Image.open('data/images/Anthropolis_logo_colour.png')
-st.image(image, use_column_width=True)
-
-# Defining Future Scenarios
-st.header('Step 1: Defining future scenarios')
-
-# Number of scenarios
-st.subheader('Number of scenarios')
-no_scen = st.slider('With how many scenarios do you want to work?', min_value=2, max_value=8, value=4)
-
-# Scenario names and descriptions
-st.subheader('Scenario names and descriptions')
-st.write('You can keep the standard scenario names and descriptions or change them. If you chose more scenarios, '
-         'you should name and describe them.')
-scen_names = []
-scen_desc = []
-for i in range(no_scen):
-    default_name = f'S{i + 1}: '
-    if i == 0:
-        default_name += '2030 | Saclay 2.0'
-        default_desc = 'Continuation of today’s development. The Saclay Plateau today is dominated by universities ' \
-                       'and technology-related institutions. Some residential buildings and other functions ' \
-                       'exist and are growing. Nevertheless, on weekend or holiday periods, ' \
-                       'the plateau remains mostly empty. Saclay 2.0 would be the continuation of the ' \
-                       'current growth. More university and technology functions would grow, complemented by ' \
-                       'more residential buildings. Nevertheless, by 2030, ' \
-                       'the character of the plateau remains to be largely linked to university’s seasonality and ' \
-                       'depending on the incoming commuters, primarily between Tuesday and Thursday and ' \
-                       'barely staying or utilising other functions on the plateau.'
-    elif i == 1:
-        default_name += '2030 | Paris 2.0'
-        default_desc = 'High-density, mixed-use neighbourhood. The second scenario is more optimistic on the ' \
-                       'integrated development of the plateau. It assumes that a large number of residential' \
-                       ' developments, going further than only student and international researcher housing, ' \
-                       'adds a critical mass of population density to allow for a variety of other functions to ' \
-                       'arise and remain active even in holiday seasons or weekends.'
-    elif i == 2:
-        default_name += '2030 | Rural Campus'
-        default_desc = 'Low-density, low diversity rural district. This scenario describes mostly the plateau as it ' \
-                       'has been since the 1970s. While more offices and universities are added, its functions and ' \
-                       'character remains primarily rural. Residential functions, as well as the accompanying ' \
-                       'other functions, remain limited and their growth stagnates, maintaining primarily the status ' \
-                       'quo of activity and functional mix.'
-    elif i == 3:
-        default_name += '2030 | Village Campus'
-        default_desc = 'High-density active core, surrounded by low-density. As a mix between the scenario ' \
-                       '‘Paris 2.0’ and ‘Rural Campus’, this scenario is defined by overall low density and ' \
-                       'restricted developments. However, it has modern yet traditional French village cores with ' \
-                       'high level of mixed-use, walkability, and a range of bars and restaurants for students and ' \
-                       'other inhabitants of the plateau.'
-    else:
-        default_name += f'Scenario {i + 1}'
-        default_desc = ''
-    scen_names.append(st.text_input(f'Scenario {i + 1} name:', value=default_name))
-    scen_desc.append(st.text_area(f'Scenario {i + 1} description (max. 750 characters):',
-                                  value=default_desc, max_chars=750))
-
-# Scenario characteristics
-st.subheader('Scenario characteristics')
-st.write('Scenarios help to integrate future uncertainties (= unknown developments). They shall be distinct from each '
-         'other. To ensure this, four uncertainties are defined as examples here: Intermodality, Mixed Use, '
-         'Density, and Public Transport. For each of the scenarios, they are ranked between low to very high. '
-         'While these numbers are not taken into consideration in the calculation, they shall help to distinguish '
-         'the scenarios during the following steps.')
-
-uncert_names = []
-uncert_desc = []
-
-uncert_names.append(st.text_input('Uncertainty 1 (U1):', value='Intermodality'))
-uncert_desc.append(st.text_area('U1 description (max. 250 characters):',
-                              value='Ability to use various modes, e.g., metro, bus, and shared bikes.', max_chars=250))
-
-uncert_names.append(st.text_input('Uncertainty 2 (U2):', value='Mixed Use'))
-uncert_desc.append(st.text_area('U2 description (max. 250 characters):',
-                              value='Mix of functions, e.g., only universities or a mix with shops, bars, housing.', max_chars=250))
-
-uncert_names.append(st.text_input('Uncertainty 3 (U3):', value='Density'))
-uncert_desc.append(st.text_area('U3 description (max. 250 characters):',
-                              value='Population density, i.e. how many people live and work close to each other.', max_chars=250))
-
-uncert_names.append(st.text_input('Uncertainty 4 (U4):', value='Public Transport'))
-uncert_desc.append(st.text_area('U4 description (max. 250 characters):',
-                              value='Refers to the service level, e.g., schedule frequency, network density.', max_chars=250))
-
-scen_chars_prep = [{"U1": "3: high", "U2": "1: low", "U3": "4: very high", "U4": "3: high", },
-                   {"U1": "4: very high", "U2": "4: very high", "U3": "4: very high", "U4": "4: very high", },
-                   {"U1": "2: medium", "U2": "1: low", "U3": "1: low", "U4": "2: medium", },
-                   {"U1": "2: medium", "U2": "4: very high", "U3": "2: medium", "U4": "3: high"},
-                   {"U1": "2: medium", "U2": "2: medium", "U3": "2: medium", "U4": "2: medium", },
-                   {"U1": "2: medium", "U2": "2: medium", "U3": "2: medium", "U4": "2: medium", },
-                   {"U1": "2: medium", "U2": "2: medium", "U3": "2: medium", "U4": "2: medium", },
-                   {"U1": "2: medium", "U2": "2: medium", "U3": "2: medium", "U4": "2: medium", },]
-scen_chars_prep = scen_chars_prep[0:no_scen]
-
-scen_chars = pd.DataFrame(scen_chars_prep, index=scen_names)
-scen_chars.U1 = scen_chars.U1.astype("category")
-scen_chars.U2 = scen_chars.U2.astype("category")
-scen_chars.U3 = scen_chars.U3.astype("category")
-scen_chars.U4 = scen_chars.U4.astype("category")
-
-cols = ["U1", "U2", "U3", "U4"]
-
-for col in cols:
-    categories = list(scen_chars[col].cat.categories)
-    for cat in ["1: low", "2: medium", "3: high", "4: very high"]:
-        if cat not in categories:
-            scen_chars[col] = scen_chars[col].cat.add_categories(cat)
-
-scen_chars.U1 = scen_chars.U1.cat.set_categories(["1: low", "2: medium", "3: high", "4: very high"])
-scen_chars.U2 = scen_chars.U2.cat.set_categories(["1: low", "2: medium", "3: high", "4: very high"])
-scen_chars.U3 = scen_chars.U3.cat.set_categories(["1: low", "2: medium", "3: high", "4: very high"])
-scen_chars.U4 = scen_chars.U4.cat.set_categories(["1: low", "2: medium", "3: high", "4: very high"])
-
-scen_chars = scen_chars.rename(columns={'U1': uncert_names[0], 'U2': uncert_names[1],
-                                        'U3': uncert_names[2], 'U4': uncert_names[3]})
-scen_chars = st.experimental_data_editor(scen_chars)
-
-# Scenario images
-st.subheader('Scenario images')
-st.write('You can upload photos (in format JPG/JPEG/PNG) for each of the scenarios as visual support. The '
-         'sample images were created with the scenario description as prompt for Midjourney, a free text-to-image generator.')
-scen_images = []
-for i in range(no_scen):
-    default_image_path = f'data/images/scenario_0{i + 1}.png'
-    uploaded_files = st.file_uploader(f'Upload image(s) for {scen_names[i]}:', type=['jpg', 'jpeg', 'png'],
-                                      key=f'scenario{i + 1}', accept_multiple_files=True)
-    if uploaded_files:
-        scen_images.append(uploaded_files[0])
-    else:
-        scen_images.append(default_image_path)
-
-# Show scenario info
-st.subheader('Scenario information')
-st.write('Below, the defined scenarios are shown as reference for the next steps. You can also show them in the sidebar '
-         'to have them always visible. If you still want to change them, you need to go back to the previous section.')
-for i in range(no_scen):
-    st.write(f'### {scen_names[i]}')
-    if scen_images[i] is not None:
-        st.image(scen_images[i], width=300)
-    st.write(scen_desc[i])
-    st.write(scen_chars.loc[scen_names[i]])
-
-# Defining Future Personas
-st.header('Step 2: Defining future personas')
-st.write('Next, you can choose with how many personas you want to work, how they are called, and how they are described.'
-         ' The descriptions are important as they permit to image their specific needs and preferences. The sample '
-         'personas have been developed during a workshop. You can refer to a set of 16 personas developed on the '
-         'basis of the 2019 census, as well as their distributions, by clicking here <a href="https://urban-mobility-futures.notion.site/Personas-aa3b30f47c354220bc025dd7edb207cd?pvs=25">here.</a>',
-         unsafe_allow_html=True)
-
-# Number of personas
-st.subheader('Number of personas')
-no_pers = st.slider('With how many personas do you want to work?', min_value=2, max_value=8, value=4)
-
-# Persona names and descriptions
-st.subheader('Persona names and descriptions')
-pers_name = []
-pers_desc = []
-for i in range(no_pers):
-    default_name = f''
-    if i == 0:
-        default_name += 'Jacqueline'
-        default_desc = 'Jacqueline is a French woman aged 40 who works full-time at a technology company as a ' \
-                       'manager, exercises daily and stays healthy. She appreciates her privacy and has flexible ' \
-                       'work schedules. She doesn’t want to walk too much because she carries lots of bags around, ' \
-                       'she prefers to cycle. She has no children and no partner and can be described as a ' \
-                       'workaholic. She is a bit concerned with sustainability issues.'
-    elif i == 1:
-        default_name += 'Thierry'
-        default_desc = 'Thierry is a 67-year-old man who visits the campus during the day to work. He is a professor ' \
-                       'and will soon be retired. He comes to the plateau from time to time to give guest lectures ' \
-                       'and lives inside Paris. He is not in charge of children. He usually uses public transport ' \
-                       'but lately is struggling due to a leg injury. He is very concerned by sustainability.'
-    elif i == 2:
-        default_name += 'Adrian'
-        default_desc = 'Adrian is a 35-year-old French man working part-time at a local supermarket in an ' \
-                       'administrative function. He is in charge of two kindergarten and one primary school child. ' \
-                       'He has a medium income. He has many time constraints and lots of activities and scheduled ' \
-                       'meetings. He uses his car due to his complex daily movements and no possibility to deal ' \
-                       'with delays. Sustainability is not the priority in his choices due to several constraints.'
-    elif i == 3:
-        default_name += 'Rui'
-        default_desc = 'Rui is a 21-year-old female. She is an international undergrad exchange student from China, ' \
-                       'studying at CentraleSupélec. She lives on the campus in one of the student residencies. ' \
-                       'She mainly moves between her daily activities by walking and cycling because she cares about ' \
-                       'sustainability and has not many alternatives. It is also cheaper.'
-    else:
-        default_name += f'Persona {i + 1}'
-        default_desc = ''
-    pers_name.append(st.text_input(f'Name of persona {i + 1}:', value=default_name))
-    pers_desc.append(
-        st.text_area(f'Description of persona {i + 1} (max. 250 char.):', value=default_desc, max_chars=450))
-
-# Persona characteristics
-st.subheader('Persona characteristics')
-st.write('Set the number of home-work-home kilometres for a normal day for each persona and their bodyweight in '
-         'kilograms. These values are the basis for the later impact assessment of emissions, energy use, and calories burnt.')
-
-# Define default values for all personas
-default_values = {pers_name[0]: [60, 57], pers_name[1]: [40, 84], pers_name[2]: [10, 72], pers_name[3]: [4, 53]}
-for i in range(4, no_pers):
-    default_values[pers_name[i]] = [0, 0]
-default_values = dict(islice(default_values.items(), no_pers))
-
-# Create the DataFrame with the default values
-pers_chars = pd.DataFrame.from_dict(default_values, orient='index', columns=['Distance (km)', 'Bodyweight (kg)']).fillna(0)
-
-pers_chars = st.experimental_data_editor(pers_chars)
-
-# Persona images
-st.subheader('Persona images')
-st.write('You can upload photos (in format JPG/JPEG/PNG) for each of the personas as visual support. The '
-         'sample images were created with the persona description as prompt for Midjourney, a free text-to-image generator.')
-
-pers_images = []
-for i in range(no_pers):
-    default_image_path = f'data/images/persona_0{i + 1}.png'
-    uploaded_files = st.file_uploader(f'Upload image(s) for {pers_name[i]}:', type=['jpg', 'jpeg', 'png'],
-                                      key=f'persona{i + 1}', accept_multiple_files=True)
-    if uploaded_files:
-        pers_images.append(uploaded_files[0])
-    else:
-        pers_images.append(default_image_path)
-
-# Show persona info
-st.subheader('Persona information')
-st.write('Below, the established personas are shown as reference for the next steps. You can also show them in the sidebar '
-         'to have them always visible. If you still want to change them, you need to go back to the previous section.')
-for i in range(no_pers):
-    st.write(f'### {pers_name[i]}')
-    if pers_images[i] is not None:
-        st.image(pers_images[i], width=300)
-    st.write(pers_desc[i])
-    st.write(pers_chars.loc[pers_name[i]])
-
-# Likelihood of scenarios
-st.header('Step 3: Set likelihood of scenarios')
-
-# Scenario description
-st.write('Define for each of the scenarios the probability in % between 0 and 100. The sum must add up to 100. '
-         'A higher percentage means that the scenario will have a higher weight in the impact assessment.')
-
-# Default values
-default_values = [40, 15, 25, 20]
-for i in range(no_scen - 4):
-    default_values.append(0)
-
-# Scenario likelihood sliders
-total_likelihood = 0
-scen_likelihood_list = []
-for i in range(no_scen):
-    scen_likelihood = st.slider(f'Likelihood of scenario {scen_names[i]} in percent:', min_value=0, max_value=100,
-                                value=default_values[i], step=5)
-    scen_likelihood_list.append(scen_likelihood)
-    total_likelihood += scen_likelihood
-
-# Calculate total likelihood
-if total_likelihood != 100:
-    st.error("Error: The sum of likelihoods must be equal to 100.")
-
-# Display total likelihood
-st.write(f'Total likelihood: {total_likelihood}%')
-if total_likelihood != 100:
-    st.write('Please adjust the likelihoods so that the sum is 100%.', unsafe_allow_html=True)
-    st.markdown('<style>div.stError > p:first-child {color: red; font-weight: bold;}</style>', unsafe_allow_html=True)
-
-# Number of people moving to/on the plateau per day
-st.header('Step 4: Define population size')
-no_people = st.number_input('How many people move to/on the plateau per day in the future?', value=50000, step=1000)
-
-# Persona weights likelihood sliders
-st.header('Step 5: Set persona weights')
-st.write('Define for each of the personas the weight in percent between 0 and 100. 10 means that 10% of the overall '
-         'population defined above are similar to the defined persona. The weights must add up to 100.')
-pers_weights = []
-for i in range(no_pers):
-    default_weights = [20, 20, 15, 45]
-    if no_pers > 4:
-        default_weights += [0] * (no_pers - 4)
-    pers_weights.append(st.slider(f'Weight in percent of {pers_name[i]} in overall population:', min_value=0,
-                                  max_value=100, step=5, value=default_weights[i], key=f"pers_weight_{i}"))
-total_weights = sum(pers_weights)
-st.write(f'Total weight: {total_weights}%')
-if total_weights != 100:
-    st.error('Total weight must be 100%')
-
-# Mode likelihoods
-st.header('Step 6: Set likelihood to use mode per scenario/persona')
-
-# Text description
-st.write('In this section, we define for each of the scenarios the likelihood for each persona to use a certain mode. '
-         'The range of likelihood to take a mode is 0 = unlikely, 1 = rather unlikely, 2 = rather likely, 3 = likely, '
-         'and 4 = very likely. The modes are Mobility on Demand (MoD), Car, Bike, Walk, Micromobility (MM), Public '
-         'Transport and MoD (PT-MoD), Public Transport and Bike (PT-Bike), Public Transport and Walk (PT-Walk), '
-         'Public Transport and Micromobility (PT-MM), Car-Walk and Micromobility and Walk (MM-Walk). For multimodal '
-         'trips, we assume 80% to be done with the first-mentioned mode and 20% by the second.')
-st.write('This is the most time-consuming but also the most important step. You see the scenario image for reference. '
-         'Use the sidebar to retrieve the descriptions and to show the personas.')
-
-# Default values for persona likelihoods to use certain types of transport
-mode_prep_s1 = [
-    # Jacqueline
-    {'MoD': "2: Rather likely", 'Car': "3: Likely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely", 'MM': "0: Unlikely", 'PT-MoD': "3: Likely", 'PT-Bike': "1: Rather unlikely", 'PT-Walk': "3: Likely",
-     'PT-MM': "1: Rather unlikely", 'MoD-Walk': "1: Rather unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "3: Likely", 'MM-Walk': "0: Unlikely"},
-    # Thierry
-    {'MoD': "3: Likely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "3: Likely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "2: Rather likely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "3: Likely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "1: Rather unlikely", 'MM-Walk': "0: Unlikely"},
-    # Adrian
-    {'MoD': "3: Likely", 'Car': "3: Likely", 'Bike': "1: Rather unlikely", 'Walk': "1: Rather unlikely",
-     'MM': "2: Rather likely", 'PT-MoD': "2: Rather likely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "1: Rather unlikely", 'MoD-Walk': "3: Likely", 'MoD-MM': "3: Likely", 'Car-Walk': "4: Very likely", 'MM-Walk': "0: Unlikely"},
-    # Rui
-    {'MoD': "3: Likely", 'Car': "0: Unlikely", 'Bike': "4: Very likely", 'Walk': "4: Very likely",
-     'MM': "3: Likely", 'PT-MoD': "1: Rather unlikely", 'PT-Bike': "4: Very likely", 'PT-Walk': "4: Very likely",
-     'PT-MM': "4: Very likely", 'MoD-Walk': "1: Rather unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "4: Very likely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"}
-]
-mode_prep_s2 = [
-    # Jacqueline
-    {'MoD': "0: Unlikely", 'Car': "2: Rather likely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "4: Very likely", 'PT-Bike': "2: Rather likely", 'PT-Walk': "4: Very likely",
-     'PT-MM': "2: Rather likely", 'MoD-Walk': "1: Rather unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "1: Rather unlikely", 'MM-Walk': "0: Unlikely"},
-    # Thierry
-    {'MoD': "2: Rather likely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "4: Very likely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "3: Likely",
-     'PT-MM': "1: Rather unlikely", 'MoD-Walk': "3: Likely", 'MoD-MM': "1: Rather unlikely", 'Car-Walk': "1: Rather unlikely", 'MM-Walk': "0: Unlikely"},
-    # Adrian
-    {'MoD': "4: Very likely", 'Car': "3: Likely", 'Bike': "1: Rather unlikely", 'Walk': "1: Rather unlikely",
-     'MM': "2: Rather likely", 'PT-MoD': "2: Rather likely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "1: Rather unlikely", 'MoD-Walk': "3: Likely", 'MoD-MM': "4: Very likely", 'Car-Walk': "4: Very likely", 'MM-Walk': "0: Unlikely"},
-    # Rui
-    {'MoD': "3: Likely", 'Car': "0: Unlikely", 'Bike': "4: Very likely", 'Walk': "4: Very likely",
-     'MM': "3: Likely", 'PT-MoD': "1: Rather unlikely", 'PT-Bike': "4: Very likely", 'PT-Walk': "4: Very likely",
-     'PT-MM': "4: Very likely", 'MoD-Walk': "1: Rather unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "4: Very likely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"}
-]
-mode_prep_s3 = [
-    # Jacqueline
-    {'MoD': "3: Likely", 'Car': "4: Very likely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "1: Rather unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "2: Rather likely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "4: Very likely", 'MM-Walk': "0: Unlikely"},
-    # Thierry
-    {'MoD': "1: Rather unlikely", 'Car': "1: Rather unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "2: Rather likely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "1: Rather unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "2: Rather likely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "2: Rather likely", 'MM-Walk': "0: Unlikely"},
-    # Adrian
-    {'MoD': "3: Likely", 'Car': "4: Very likely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "1: Rather unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "2: Rather likely", 'MoD-MM': "2: Rather likely", 'Car-Walk': "4: Very likely", 'MM-Walk': "0: Unlikely"},
-    # Rui
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "4: Very likely", 'Walk': "3: Likely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "2: Rather likely", 'PT-Walk': "3: Likely",
-     'PT-MM': "1: Rather unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "1: Rather unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"}
-]
-mode_prep_s4 = [
-    # Jacqueline
-    {'MoD': "1: Rather unlikely", 'Car': "3: Likely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "3: Likely", 'PT-Bike': "1: Rather unlikely", 'PT-Walk': "3: Likely",
-     'PT-MM': "3: Likely", 'MoD-Walk': "1: Rather unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "4: Very likely", 'MM-Walk': "0: Unlikely"},
-    # Thierry
-    {'MoD': "1: Rather unlikely", 'Car': "1: Rather unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "2: Rather likely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "2: Rather likely",
-     'PT-MM': "1: Rather unlikely", 'MoD-Walk': "3: Likely", 'MoD-MM': "1: Rather unlikely", 'Car-Walk': "2: Rather likely", 'MM-Walk': "0: Unlikely"},
-    # Adrian
-    {'MoD': "4: Very likely", 'Car': "4: Very likely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "1: Rather unlikely", 'PT-MoD': "1: Rather unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "3: Likely", 'MoD-MM': "2: Rather likely", 'Car-Walk': "4: Very likely", 'MM-Walk': "0: Unlikely"},
-    # Rui
-    {'MoD': "3: Likely", 'Car': "2: Rather likely", 'Bike': "4: Very likely", 'Walk': "3: Likely",
-     'MM': "2: Rather likely", 'PT-MoD': "2: Rather likely", 'PT-Bike': "3: Likely", 'PT-Walk': "3: Likely",
-     'PT-MM': "2: Rather likely", 'MoD-Walk': "2: Rather likely", 'MoD-MM': "1: Rather unlikely", 'Car-Walk': "1: Rather unlikely", 'MM-Walk': "3: Likely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"}
-]
-mode_prep_s5 = [
-    # Persona n
-    {'MoD': "1: Rather unlikely", 'Car': "1: Rather unlikely", 'Bike': "1: Rather unlikely", 'Walk': "1: Rather unlikely",
-     'MM': "1: Rather unlikely", 'PT-MoD': "1: Rather unlikely", 'PT-Bike': "1: Rather unlikely", 'PT-Walk': "1: Rather unlikely",
-     'PT-MM': "1: Rather unlikely", 'MoD-Walk': "1: Rather unlikely", 'MoD-MM': "1: Rather unlikely", 'Car-Walk': "1: Rather unlikely", 'MM-Walk': "1: Rather unlikely"},
-    # Persona n
-    {'MoD': "1: Rather unlikely", 'Car': "1: Rather unlikely", 'Bike': "1: Rather unlikely", 'Walk': "1: Rather unlikely",
-     'MM': "1: Rather unlikely", 'PT-MoD': "1: Rather unlikely", 'PT-Bike': "1: Rather unlikely", 'PT-Walk': "1: Rather unlikely",
-     'PT-MM': "1: Rather unlikely", 'MoD-Walk': "1: Rather unlikely", 'MoD-MM': "1: Rather unlikely", 'Car-Walk': "1: Rather unlikely", 'MM-Walk': "1: Rather unlikely"},
-    # Persona n
-    {'MoD': "1: Rather unlikely", 'Car': "1: Rather unlikely", 'Bike': "1: Rather unlikely", 'Walk': "1: Rather unlikely",
-     'MM': "1: Rather unlikely", 'PT-MoD': "1: Rather unlikely", 'PT-Bike': "1: Rather unlikely", 'PT-Walk': "1: Rather unlikely",
-     'PT-MM': "1: Rather unlikely", 'MoD-Walk': "1: Rather unlikely", 'MoD-MM': "1: Rather unlikely", 'Car-Walk': "1: Rather unlikely", 'MM-Walk': "1: Rather unlikely"},
-    # Persona n
-    {'MoD': "1: Rather unlikely", 'Car': "1: Rather unlikely", 'Bike': "1: Rather unlikely", 'Walk': "1: Rather unlikely",
-     'MM': "1: Rather unlikely", 'PT-MoD': "1: Rather unlikely", 'PT-Bike': "1: Rather unlikely", 'PT-Walk': "1: Rather unlikely",
-     'PT-MM': "1: Rather unlikely", 'MoD-Walk': "1: Rather unlikely", 'MoD-MM': "1: Rather unlikely", 'Car-Walk': "1: Rather unlikely", 'MM-Walk': "1: Rather unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"},
-    # Persona n
-    {'MoD': "0: Unlikely", 'Car': "0: Unlikely", 'Bike': "0: Unlikely", 'Walk': "0: Unlikely",
-     'MM': "0: Unlikely", 'PT-MoD': "0: Unlikely", 'PT-Bike': "0: Unlikely", 'PT-Walk': "0: Unlikely",
-     'PT-MM': "0: Unlikely", 'MoD-Walk': "0: Unlikely", 'MoD-MM': "0: Unlikely", 'Car-Walk': "0: Unlikely", 'MM-Walk': "0: Unlikely"}
-]
-mode_prep_s6 = mode_prep_s5.copy()
-mode_prep_s7 = mode_prep_s5.copy()
-mode_prep_s8 = mode_prep_s5.copy()
-
-mode_prep = {0: mode_prep_s1, 1: mode_prep_s2, 2: mode_prep_s3, 3: mode_prep_s4,
-             4: mode_prep_s5, 5: mode_prep_s6, 6: mode_prep_s7, 7: mode_prep_s8}
-
-modes = ["MoD", "Car", "Bike", "Walk", "MM", "PT-MoD", "PT-Bike", "PT-Walk", "PT-MM", "MoD-Walk", "MoD-MM", "Car-Walk",
-         "MM-Walk"]
-
-mode_pref_list = []
-
-for i in range(no_scen):
-    mode_pref = pd.DataFrame(mode_prep[i][0:no_pers], index=(pers_name[:no_pers]))
-    for mode in modes:
-        mode_pref[mode] = mode_pref[mode].astype("category")
-        categories = list(mode_pref[mode].cat.categories)
-        missing_categories = [cat for cat in ["0: Unlikely", "1: Rather unlikely", "2: Rather likely", "3: Likely", "4: Very likely"] if cat not in categories]
-        mode_pref[mode] = mode_pref[mode].cat.add_categories(missing_categories)
-        mode_pref[mode] = mode_pref[mode].cat.set_categories(["0: Unlikely", "1: Rather unlikely", "2: Rather likely", "3: Likely", "4: Very likely"])
-        mode_pref[mode] = mode_pref[mode].cat.reorder_categories(sorted(mode_pref[mode].cat.categories))
-    st.write(f'### {scen_names[i]}')
-    if scen_images[i] is not None:
-        st.image(scen_images[i], width=300)
-    st.write(
-        f'How likely is it that each persona uses each mode in the scenario {scen_names[i]}?')
-    mode_pref = st.experimental_data_editor(mode_pref, key=f'mode_pref{i + 1}')
-    mode_pref_list.append(mode_pref)
 
-# Set values for impact assessment
-st.header('Step 7: Set values for impact assessment')
-
-# Create the input fields for individual values
-walk_calories_input = st.number_input('Adapt the value for calories burned per kg per km while walking. The standard is '
-                                      'that one calorie is burned per kilometre per kg bodyweight.', value=1)
-bike_calories_input = st.number_input('Adapt the value for calories burned per kg per km while cycling. The standard is '
-                                      'that 0.4 calories are burned per kilometre per kg bodyweight.', value=0.4)
-
-# Create editabe dataframe for inputs on emissions and energy demand per passenger kilometer
-emissions_energy = {
-    'CO2e': [15, 50, 150, 10, 0, 0],
-    'MJ': [0.2, 0.8, 1.8, 0.5, 0, 0]
+from decision_tool import (charts, defaults, engine, export, images, incremental, montecarlo, ordinal, personas,
+                           population, portfolio, profiling, sensitivity, snapshot, spatial, summary, trajectory)
+
+# Cached pipeline stages
+# Each stage is keyed on a hash of its own inputs only, so a widget change only recomputes the stages depending on
+# it, e.g. a new population size rescales the groups without redoing the modal split. max_entries bounds the cache.
+STAGE_CACHE_ENTRIES = 32
+
+
+@st.cache_data(max_entries=STAGE_CACHE_ENTRIES)
+def distance_split(pref, distance, allocation, routes=None):
+    return engine.distance_split(pref, distance, allocation=allocation, routes=routes)
+
+
+@st.cache_data(max_entries=STAGE_CACHE_ENTRIES)
+def impacts(dist, factors, bodyweight, walk_calories, bike_calories):
+    return engine.impacts(dist, factors, bodyweight, walk_calories, bike_calories)
+
+
+@st.cache_data(max_entries=STAGE_CACHE_ENTRIES)
+def group_totals(individual, weights, no_people, decimals=0):
+    return engine.group_totals(individual, weights, no_people, decimals=decimals)
+
+
+@st.cache_data(max_entries=STAGE_CACHE_ENTRIES)
+def scenario_totals(group, likelihood, decimals=None):
+    return engine.scenario_totals(group, likelihood, decimals=decimals)
+
+
+# Incremental results of Steps 8 and 10
+# The last evaluation of each step is kept in the session on top of the cached stages: a first evaluation, or one
+# that changes whole arrays, is computed by the stages and so shared by all sessions with the same inputs. Other
+# changes only recompute the scenarios, personas and interventions they touch in the session, and the totals are
+# patched by the change.
+def incremental_results(key, pref, *args, decimals=0, **kwargs):
+    stages = types.SimpleNamespace(distance_split=distance_split, impacts=impacts, group_totals=group_totals)
+    evaluation = incremental.evaluate(incremental.inputs(pref, *args, **kwargs), st.session_state.get(key),
+                                      decimals=decimals, stages=stages)
+    st.session_state[key] = evaluation
+    return evaluation
+
+
+@st.cache_data(max_entries=STAGE_CACHE_ENTRIES)
+def apply_intervention(pref, delta):
+    return engine.apply_intervention(pref, delta)
+
+
+@st.cache_data(max_entries=4)
+def simulate(pref, delta, distance, bodyweight, factors, walk_calories, bike_calories, weights, no_people, likelihood,
+             allocation, samples, uncertainty, seed, routes=None):
+    return montecarlo.simulate(pref, delta, distance, bodyweight, factors, walk_calories, bike_calories, weights,
+                               no_people, likelihood, samples=samples, uncertainty=uncertainty, seed=seed,
+                               allocation=allocation, routes=routes)
+
+
+@st.cache_data(max_entries=4)
+def sensitivity_indices(pref, distance, bodyweight, factors, walk_calories, bike_calories, weights, no_people,
+                        likelihood, personas, scenarios, codes, allocation, spread, method, indicator, routes=None):
+    problem = sensitivity.problem(pref, distance, bodyweight, factors, walk_calories, bike_calories, weights,
+                                  no_people, likelihood, personas, scenarios, codes=codes, allocation=allocation,
+                                  spread=spread, routes=routes)
+    if method == 'Morris':
+        return sensitivity.morris(problem, indicator=indicator)
+    return sensitivity.sobol(problem, indicator=indicator)
+
+
+# Rollout intensities of each intervention offered to the portfolio search
+PORTFOLIO_LEVELS = {
+    'In or out': (0, 1),
+    'In steps of 50%': (0, 0.5, 1),
+    'In steps of 25%': (0, 0.25, 0.5, 0.75, 1),
 }
 
-# Create the dataframe
-emissions_energy = pd.DataFrame(emissions_energy, index=['PT', 'Car', 'MoD', 'MM', 'Bike', 'Walk']).T
-
-# Add a title above the dataframe
-st.write('Adapt the assumed future CO2 equivalent emissions in g/passenger km and energy demand in MJ/passenger km. You can '
-         'find reference values for emissions from [ADEME](https://impactco2.fr/transport) and for '
-         'energy from [IEA](https://www.iea.org/data-and-statistics/charts/energy-intensity-of-passenger-transport-modes-2018).')
-emissions_energy = st.experimental_data_editor(emissions_energy)
-
-
-# Mode likelihoods
-st.header('Step 8a: Impacts per persona group')
-st.write('In this section, you see the distances by mode for each scenario and individual persona.')
-st.subheader('Distribution of travel distances by mode and persona')
-# Calculate kilometers per mode for each persona in scenario 1
-dist_mode_list = []
-
-for i in range(no_scen):
-    dist_mode = mode_pref_list[i]
-    dist_mode = dist_mode.apply(lambda x: x.str[0])
-    dist_mode = dist_mode.astype(float)
-    dist_mode = dist_mode.div(dist_mode.sum(axis=1), axis=0)
-    dist_mode['PT'] = 0.8 * dist_mode['PT-MoD'] + 0.8 * dist_mode['PT-Bike'] + 0.8 * dist_mode['PT-Walk'] + \
-                      0.8 * dist_mode['PT-MM']
-    dist_mode['car_n'] = dist_mode['Car'] + 0.8 * dist_mode['Car-Walk']
-    dist_mode['MoD_n'] = dist_mode['MoD'] + 0.2 * dist_mode['PT-MoD'] + 0.8 * dist_mode['MoD-Walk'] + \
-                                                                          0.8 * dist_mode['MoD-MM']
-    dist_mode['MM_n'] = dist_mode['MM'] + 0.2 * dist_mode['PT-MM'] + 0.2 * dist_mode['MoD-MM']
-    dist_mode['Bike_n'] = dist_mode['Bike'] + 0.2 * dist_mode['PT-Bike']
-    dist_mode['Walk_n'] = dist_mode['Walk'] + 0.2 * dist_mode['PT-Walk'] + 0.2 * dist_mode['MoD-Walk'] + \
-                          0.2 * dist_mode['Car-Walk'] + 0.2 * dist_mode['MM-Walk']
-    dist_mode['Car'] = dist_mode['car_n']
-    dist_mode['MoD'] = dist_mode['MoD_n']
-    dist_mode['MM'] = dist_mode['MM_n']
-    dist_mode['Bike'] = dist_mode['Bike_n']
-    dist_mode['Walk'] = dist_mode['Walk_n']
-    dist_mode = dist_mode[['PT', 'Car', 'MoD', 'MM', 'Bike', 'Walk']]
-    dist_mode = dist_mode.mul(pers_chars['Distance (km)'], axis=0).round(1)
-    dist_mode_list.append(dist_mode)
-
-# Colours
-colours_ind = ['#193f5a', '#db666e', '#eca83e', '#62548e', '#e18054', '#c65a86', '#344c79', '#975792']
-
-# Transform the dataframe to long format
-for i in range(no_scen):
-    dist_mode = dist_mode_list[i]
-    dist_mode = dist_mode.stack().reset_index()
-    dist_mode.columns = ['persona', 'Mode', 'km']
-
-    # Define the chart
-    chart_dist_mode = alt.Chart(dist_mode).mark_bar().encode(
-        x=alt.X('Mode:N', sort=["PT","Car","MoD", "MM", "Bike", "Walk"],
-            axis=alt.Axis(title=None, labelAngle=0, labelPadding=5, labelFlush=False, tickCount=4,labels=False)),
-        y=alt.Y('km:Q', axis=alt.Axis(title='Kilometres')),
-        color=alt.Color('Mode:N',
-                        scale=alt.Scale(domain=["PT","Car","MoD", "MM", "Bike", "Walk"],
-                                        range=colours_ind)),
-        column=alt.Column('persona:N', header=alt.Header(labelOrient='bottom', title=None))
-    ).properties(
-        width=140,
-        title={
-            'text': 'Modal share in km for ' + scen_names[i],
-            'fontSize': 16,
-            'fontWeight': 'bold',
-            'anchor': 'start',
-            'offset': 20}
-    ).configure_axis(
-        grid=False,
-        labelFontSize=12,
-        titleFontSize=14
-    )
-
-    # Render the chart using Streamlit
-    st.altair_chart(chart_dist_mode, use_container_width=False)
-
-
-st.header('CO2e, energy demand, and calories burned per individual persona')
-st.write('In this section, you can see the impacts by scenario for each individual persona.')
-mods = ['PT','Car','MoD','MM','Bike','Walk']
-
-# Emissions calculation
-st.subheader('CO2e emissions')
-
-emis_ind_list = []
-for i in range(no_scen):
-    emis_ind = dist_mode_list[i].copy()
-    for mod in mods:
-        emis_ind[mod] = emis_ind[mod] * emissions_energy[mod][0]/1000
-    emis_ind[scen_names[i]] = emis_ind.sum(axis=1)
-    emis_ind = emis_ind[[scen_names[i]]]
-    emis_ind_list.append(emis_ind)
-    emis_ind_concat = pd.concat(emis_ind_list, ignore_index=False, join='outer')
-    emis_ind_concat = emis_ind_concat.groupby(level=0).sum()
-emis_ind_concat = emis_ind_concat.stack().reset_index()
-emis_ind_concat.columns = ['Persona', 'Scenario', 'CO2e']
-
-# Define the chart
-chart_emis_ind = alt.Chart(emis_ind_concat).mark_bar().encode(
-    x=alt.X('Scenario:N', sort=[],
-            axis=alt.Axis(title=None, labelAngle=0, labelPadding=5, labelFlush=False, tickCount=4, labels=False)),
-    y=alt.Y('CO2e:Q', axis=alt.Axis(title='CO2 equivalent in kg')),
-    color=alt.Color('Scenario:N',
-                    scale=alt.Scale(domain=scen_names,
-                                    range=colours_ind)),
-    column=alt.Column('Persona:N', header=alt.Header(labelOrient='bottom', title=None))
-).properties(
-    width=140,
-    title={
-        'text': 'Daily emissions in CO2e per persona across scenarios',
-        'fontSize': 16,
-        'fontWeight': 'bold',
-        'anchor': 'start',
-        'offset': 20}
-).configure_axis(
-    grid=False,
-    labelFontSize=12,
-    titleFontSize=14
-)
-
-# Render the chart using Streamlit
-st.altair_chart(chart_emis_ind, use_container_width=False)
-
-# Energy calculation
-st.subheader('Energy demand')
-ener_ind_list = []
-for i in range(no_scen):
-    ener_ind = dist_mode_list[i].copy()
-    for mod in mods:
-        ener_ind[mod] = ener_ind[mod] * emissions_energy[mod][1]
-    ener_ind[scen_names[i]] = ener_ind.sum(axis=1)
-    ener_ind = ener_ind[[scen_names[i]]]
-    ener_ind_list.append(ener_ind)
-    ener_ind_concat = pd.concat(ener_ind_list, ignore_index=False, join='outer')
-    ener_ind_concat = ener_ind_concat.groupby(level=0).sum()
-ener_ind_concat = ener_ind_concat.stack().reset_index()
-ener_ind_concat.columns = ['Persona', 'Scenario', 'Energy']
-
-# Define the chart
-chart_ener_ind = alt.Chart(ener_ind_concat).mark_bar().encode(
-    x=alt.X('Scenario:N', sort=[],
-            axis=alt.Axis(title=None, labelAngle=0, labelPadding=5, labelFlush=False, tickCount=4, labels=False)),
-    y=alt.Y('Energy:Q', axis=alt.Axis(title='Energy in mega joule')),
-    color=alt.Color('Scenario:N',
-                    scale=alt.Scale(domain=scen_names,
-                                    range=colours_ind)),
-    column=alt.Column('Persona:N', header=alt.Header(labelOrient='bottom', title=None))
-).properties(
-    width=140,
-    title={
-        'text': 'Daily energy demand in MJ per persona across scenarios',
-        'fontSize': 16,
-        'fontWeight': 'bold',
-        'anchor': 'start',
-        'offset': 20}
-).configure_axis(
-    grid=False,
-    labelFontSize=12,
-    titleFontSize=14
-)
-
-# Render the chart using Streamlit
-st.altair_chart(chart_ener_ind, use_container_width=False)
-
-# Calories calculation
-st.subheader('Calories burned')
-cal_ind_list = []
-
-for i in range(no_scen):
-    dist_mode_list_cal = dist_mode_list[i].copy()
-    cal_ind = dist_mode_list_cal
-    cal_ind[scen_names[i]] = round((cal_ind['Bike'].multiply(pers_chars['Bodyweight (kg)'], axis=0) *
-                                    bike_calories_input) + (cal_ind['Walk'].multiply(pers_chars['Bodyweight (kg)'],
-                                                                                     axis=0) * walk_calories_input),0)
-    cal_ind = cal_ind[[scen_names[i]]]
-    cal_ind_list.append(cal_ind)
-    cal_ind_concat = pd.concat(cal_ind_list, ignore_index=False, join='outer')
-    cal_ind_concat = cal_ind_concat.groupby(level=0).sum()
-cal_ind_concat = cal_ind_concat.stack().reset_index()
-cal_ind_concat.columns = ['Persona', 'Scenario', 'Calories']
-
-# Define the chart
-chart_cal_ind = alt.Chart(cal_ind_concat).mark_bar().encode(
-    x=alt.X('Scenario:N', sort=[],
-            axis=alt.Axis(title=None, labelAngle=0, labelPadding=5, labelFlush=False, tickCount=4, labels=False)),
-    y=alt.Y('Calories:Q', axis=alt.Axis(title='Calories burned during commute')),
-    color=alt.Color('Scenario:N',
-                    scale=alt.Scale(domain=scen_names,
-                                    range=colours_ind)),
-    column=alt.Column('Persona:N', header=alt.Header(labelOrient='bottom', title=None))
-).properties(
-    width=140,
-    title={
-        'text': 'Daily calories burned per persona across scenarios',
-        'fontSize': 16,
-        'fontWeight': 'bold',
-        'anchor': 'start',
-        'offset': 20}
-).configure_axis(
-    grid=False,
-    labelFontSize=12,
-    titleFontSize=14
-)
-
-# Render the chart using Streamlit
-st.altair_chart(chart_cal_ind, use_container_width=False)
-
-# Impacts considering population size and persona distribution
-st.header('Step 8b: Impacts considering population size and persona distribution')
-st.write('In this section, you can see the impacts by scenario for each persona. Compared to above, the values are '
-         f'multiplied by the set population size of {no_people} and the set weight for each persona.')
-st.subheader('Emissions')
-emis_group_list = []
-
-for i in range(no_scen):
-    emis_group = emis_ind_list[i].copy()
-    emis_group = emis_group[0:no_pers]
-    # Divided by 100 for percentage of population, by 1000 for emissions in tons instead of kg
-    emis_group = round((emis_group.multiply(pers_weights, axis=0)) * no_people / 100000)
-    emis_group = emis_group[[scen_names[i]]]
-    emis_group_list.append(emis_group)
-    emis_group_concat = pd.concat(emis_group_list, ignore_index=False, join='outer')
-    emis_group_concat = emis_group_concat.groupby(level=0).sum()
-emis_group_concat = emis_group_concat.stack().reset_index()
-emis_group_concat.columns = ['Persona', 'Scenario', 'CO2e']
-
-# Define the chart
-chart_emis_group = alt.Chart(emis_group_concat).mark_bar().encode(
-    x=alt.X('Scenario:N', sort=[],
-            axis=alt.Axis(title=None, labelAngle=0, labelPadding=5, labelFlush=False, tickCount=4, labels=False)),
-    y=alt.Y('CO2e:Q', axis=alt.Axis(title='CO2e per group and scenario in tons (t)')),
-    color=alt.Color('Scenario:N',
-                    scale=alt.Scale(domain=scen_names,
-                                    range=colours_ind)),
-    column=alt.Column('Persona:N', header=alt.Header(labelOrient='bottom', title=None))
-).properties(
-    width=140,
-    title={
-        'text': 'CO2 equivalent in tons for aggregated persona group',
-        'fontSize': 16,
-        'fontWeight': 'bold',
-        'anchor': 'start',
-        'offset': 20}
-).configure_axis(
-    grid=False,
-    labelFontSize=12,
-    titleFontSize=14
-)
-
-# Render the chart using Streamlit
-st.altair_chart(chart_emis_group, use_container_width=False)
-
-st.subheader('Energy demand')
-ener_group_list = []
-
-for i in range(no_scen):
-    ener_group = ener_ind_list[i].copy()
-    ener_group = ener_group[0:no_pers]
-    # Divided by 100 for percentage of population, by 1000 for energy in giga joule
-    ener_group = round((ener_group.multiply(pers_weights, axis=0)) * no_people / 100000)
-    ener_group = ener_group[[scen_names[i]]]
-    ener_group_list.append(ener_group)
-    ener_group_concat = pd.concat(ener_group_list, ignore_index=False, join='outer')
-    ener_group_concat = ener_group_concat.groupby(level=0).sum()
-ener_group_concat = ener_group_concat.stack().reset_index()
-ener_group_concat.columns = ['Persona', 'Scenario', 'Energy']
-
-# Define the chart
-chart_ener_group = alt.Chart(ener_group_concat).mark_bar().encode(
-    x=alt.X('Scenario:N', sort=[],
-            axis=alt.Axis(title=None, labelAngle=0, labelPadding=5, labelFlush=False, tickCount=4, labels=False)),
-    y=alt.Y('Energy:Q', axis=alt.Axis(title='Energy demand per group and scenario in tons (t)')),
-    color=alt.Color('Scenario:N',
-                    scale=alt.Scale(domain=scen_names,
-                                    range=colours_ind)),
-    column=alt.Column('Persona:N', header=alt.Header(labelOrient='bottom', title=None))
-).properties(
-    width=140,
-    title={
-        'text': 'Energy demand in giga joule (MJ*1000)',
-        'fontSize': 16,
-        'fontWeight': 'bold',
-        'anchor': 'start',
-        'offset': 20}
-).configure_axis(
-    grid=False,
-    labelFontSize=12,
-    titleFontSize=14
-)
-
-# Render the chart using Streamlit
-st.altair_chart(chart_ener_group, use_container_width=False)
-
-st.subheader('Calories burned')
-cal_group_list = []
-
-for i in range(no_scen):
-    cal_group = cal_ind_list[i].copy()
-    cal_group = cal_group[0:no_pers]
-    # Divided by 100 for percentage of population and 1000 for pizza
-    cal_group = round((cal_group.multiply(pers_weights, axis=0)) * no_people / 100000)
-    cal_group = cal_group[[scen_names[i]]]
-    cal_group_list.append(cal_group)
-    cal_group_concat = pd.concat(cal_group_list, ignore_index=False, join='outer')
-    cal_group_concat = cal_group_concat.groupby(level=0).sum()
-cal_group_concat = cal_group_concat.stack().reset_index()
-cal_group_concat.columns = ['Persona', 'Scenario', 'Calories']
-
-# Define the chart
-chart_cal_group = alt.Chart(cal_group_concat).mark_bar().encode(
-    x=alt.X('Scenario:N', sort=[],
-            axis=alt.Axis(title=None, labelAngle=0, labelPadding=5, labelFlush=False, tickCount=4, labels=False)),
-    y=alt.Y('Calories:Q', axis=alt.Axis(title='Calories burned per group and scenario')),
-    color=alt.Color('Scenario:N',
-                    scale=alt.Scale(domain=scen_names,
-                                    range=colours_ind)),
-    column=alt.Column('Persona:N', header=alt.Header(labelOrient='bottom', title=None))
-).properties(
-    width=140,
-    title={
-        'text': 'Pizzas burned per persona group (1 pizza = 1000 cal)',
-        'fontSize': 16,
-        'fontWeight': 'bold',
-        'anchor': 'start',
-        'offset': 20}
-).configure_axis(
-    grid=False,
-    labelFontSize=12,
-    titleFontSize=14
-)
-
-# Render the chart using Streamlit
-st.altair_chart(chart_cal_group, use_container_width=False)
-
-# Aggregated impacts considering scenario likelihood
-st.header('Step 8c: Analysis of results')
-
-emis_aggr = emis_group_concat.groupby('Scenario').sum().copy()
-emis_aggr = round((emis_aggr.multiply(scen_likelihood_list, axis=0)) / 100)
-
-indic_aggr = {}
-indic_aggr = emis_aggr.sum()
-
-ener_aggr = ener_group_concat.groupby('Scenario').sum().copy()
-ener_aggr = round((ener_aggr.multiply(scen_likelihood_list, axis=0)) / 100)
-ener_aggr = ener_aggr.sum()
-indic_aggr = indic_aggr.append(ener_aggr, ignore_index=False)
-
-cal_aggr = cal_group_concat.groupby('Scenario').sum().copy()
-cal_aggr = round((cal_aggr.multiply(scen_likelihood_list, axis=0)) / 100)
-cal_aggr = cal_aggr.sum()
-indic_aggr = indic_aggr.append(cal_aggr, ignore_index=False)
-
-# individual scenario values
-emis_scen_max_name = emis_aggr.sort_values('CO2e', ascending=False).reset_index()['Scenario'].iloc[0]
-emis_scen_max_val = emis_aggr.sort_values('CO2e', ascending=False).reset_index()['CO2e'].iloc[0]
-
-emis_scen_min_name = emis_aggr.sort_values('CO2e', ascending=True).reset_index()['Scenario'].iloc[0]
-emis_scen_min_val = emis_aggr.sort_values('CO2e', ascending=True).reset_index()['CO2e'].iloc[0]
-
-# Individual for personas
-emis_pers_ind_max_name_group = emis_ind_concat.groupby('Persona').mean().sort_values('CO2e', ascending=False).reset_index()['Persona'].iloc[0]
-emis_pers_ind_max_val_group = emis_ind_concat.groupby('Persona').mean().sort_values('CO2e', ascending=False).reset_index()['CO2e'].iloc[0].round(1)
-
-emis_pers_ind_min_name_group = emis_ind_concat.groupby('Persona').mean().sort_values('CO2e').reset_index()['Persona'].iloc[0]
-emis_pers_ind_min_val_group = emis_ind_concat.groupby('Persona').mean().sort_values('CO2e').reset_index()['CO2e'].iloc[0].round(1)
-
-max_emitter_ind_name = emis_ind_concat.sort_values('CO2e', ascending=False).reset_index()['Persona'].iloc[0]
-max_emitter_ind_scen = emis_ind_concat.sort_values('CO2e', ascending=False).reset_index()['Scenario'].iloc[0]
-max_emitter_ind_max_value = emis_ind_concat.sort_values('CO2e', ascending=False).reset_index()['CO2e'].iloc[0].round(1)
-max_emitter_ind_min_value = emis_ind_concat[emis_ind_concat['Persona'] == max_emitter_ind_name].sort_values('CO2e')['CO2e'].iloc[0].round(1)
-max_emitter_ind_scen_min = emis_ind_concat[emis_ind_concat['Persona'] == max_emitter_ind_name].sort_values('CO2e')['Scenario'].iloc[0]
-
-min_emitter_ind_name = emis_ind_concat.sort_values('CO2e').reset_index()['Persona'].iloc[0]
-min_emitter_ind_max_value = emis_ind_concat[emis_ind_concat['Persona'] == min_emitter_ind_name].sort_values('CO2e', ascending=False)['CO2e'].iloc[0].round(2)
-min_emitter_ind_min_value = emis_ind_concat[emis_ind_concat['Persona'] == min_emitter_ind_name].sort_values('CO2e')['CO2e'].iloc[0].round(2)
-
-# Aggregated by personas
-emis_pers_aggr_max_name_group = emis_group_concat.groupby('Persona').mean().sort_values('CO2e', ascending=False).reset_index()['Persona'].iloc[0]
-emis_pers_aggr_max_val_group = emis_group_concat.groupby('Persona').mean().sort_values('CO2e', ascending=False).reset_index()['CO2e'].iloc[0].round(1)
-
-emis_pers_aggr_min_name_group = emis_group_concat.groupby('Persona').mean().sort_values('CO2e').reset_index()['Persona'].iloc[0]
-emis_pers_aggr_min_val_group = emis_group_concat.groupby('Persona').mean().sort_values('CO2e').reset_index()['CO2e'].iloc[0].round(1)
-
-max_emitter_aggr_name = emis_group_concat.sort_values('CO2e', ascending=False).reset_index()['Persona'].iloc[0]
-max_emitter_aggr_scen = emis_group_concat.sort_values('CO2e', ascending=False).reset_index()['Scenario'].iloc[0]
-max_emitter_aggr_max_value = emis_group_concat.sort_values('CO2e', ascending=False).reset_index()['CO2e'].iloc[0].round(1)
-max_emitter_aggr_min_value = emis_group_concat[emis_group_concat['Persona'] == max_emitter_aggr_name].sort_values('CO2e')['CO2e'].iloc[0].round(1)
-max_emitter_aggr_scen_min = emis_group_concat[emis_group_concat['Persona'] == max_emitter_aggr_name].sort_values('CO2e')['Scenario'].iloc[0]
-
-min_emitter_aggr_name = emis_group_concat.sort_values('CO2e').reset_index()['Persona'].iloc[0]
-min_emitter_aggr_max_value = emis_group_concat[emis_group_concat['Persona'] == min_emitter_aggr_name].sort_values('CO2e', ascending=False)['CO2e'].iloc[0].round(2)
-min_emitter_aggr_min_value = emis_group_concat[emis_group_concat['Persona'] == min_emitter_aggr_name].sort_values('CO2e')['CO2e'].iloc[0].round(2)
-
-st.write('Building on the earlier established likelihood of each scenario, we can anticipate a daily '
-         f'footprint of __{round(indic_aggr[0])} tons CO2 equivalent__. This makes it about __{round(indic_aggr[0] * 0.365)} '
-         f'kilotons__ per year. Further, we assume an energy demand of __{round(indic_aggr[1])} gigajoules per day__ and '
-         f'about __{round(indic_aggr[1] * 0.365)} terajoules per year__. On the positive side, the commutes help to burn '
-         f'a total of __{round(indic_aggr[2])} pizzas (=1000 calories) per day__ or __{round(indic_aggr[1] * 365)} pizzas__ per year.')
-
-st.write('More interesting insights can be generated when we look at the differences between the scenarios. '
-         f'The highest emitting scenario is __{emis_scen_max_name}__ with __{int(emis_scen_max_val)} tons CO2e per day__. '
-         f'This is __{int(emis_scen_max_val-emis_scen_min_val)} tons CO2e__ more than the most sustainable scenario '
-         f'__{emis_scen_min_name}__ which only emits __{int(emis_scen_min_val)} tons CO2e per day__.')
-
-st.write(f'The highest emitter (average across scenarios) is __{emis_pers_ind_max_name_group}__ with '
-         f'__{emis_pers_ind_max_val_group} kg CO2e per day__ compared to __{emis_pers_ind_min_name_group}__ who only '
-         f'emits __{emis_pers_ind_min_val_group} kg CO2e per day__. When zooming in on the scenarios, the differences '
-         f'become even stronger. For example, __{max_emitter_ind_name}__ has the highest overall emissions for the '
-         f'scenario __{max_emitter_ind_scen}__ with __{max_emitter_ind_max_value} kg CO2e__, '
-         f'__{(max_emitter_ind_max_value/max_emitter_ind_min_value).round(1)} times__ more than the same persona for scenario '
-         f'__{max_emitter_ind_scen_min}__. On the other extreme, __{min_emitter_ind_name}__ emits only between '
-         f' __{min_emitter_ind_min_value} and {min_emitter_ind_max_value} kg CO2e per day__.')
-
-st.write(f'Finally, we can look at the emissions taking into consideration the population size and persona occurrence. '
-         f'The highest emitter in this case (average across scenarios) is all __{emis_pers_aggr_max_name_group}s__ with '
-         f'__{emis_pers_aggr_max_val_group} tons CO2e per day__ compared to all __{emis_pers_aggr_min_name_group}s__ who only '
-         f'emit __{emis_pers_aggr_min_val_group} tons CO2e per day__. When zooming in on the scenarios, the differences '
-         f'become even stronger. For example, all__{max_emitter_aggr_name}s__ have the highest overall emissions for the '
-         f'scenario __{max_emitter_aggr_scen}__ with __{max_emitter_aggr_max_value} tons CO2e__, '
-         f'__{(max_emitter_aggr_max_value/max_emitter_aggr_min_value).round(1)} times__ more than the same persona for scenario '
-         f'__{max_emitter_aggr_scen_min}__. On the other extreme, all __{min_emitter_aggr_name}s__ emit only between '
-         f' __{min_emitter_aggr_min_value} and {min_emitter_aggr_max_value} tons CO2e per day__.')
+# Default anchor years of the trajectory, in the order they are added
+TRAJECTORY_ANCHORS = [2025, 2030, 2050, 2040, 2035, 2045]
 
-# Defining potential interventions
-st.header('Step 9a: Defining potential interventions')
-st.write('You can use this tool to compare the impact of two interventions. For inspiration, have a look at our '
-         '<a href="https://urban-mobility-futures.notion.site/3b4cb3e4fccd48a38cda6149a0d6ffa1?v=8ce1115a24e7436f8c31bdd58a3c74ef">Urban Mobility Solution Database.</a>', unsafe_allow_html=True)
-
-interv_name_1 = 'On demand shuttles'
-interv_acr_1 = 'MoD'
-interv_desc_1 = 'Shared electric on demand shuttles that move on demand between key destinations.'
-st.text_input(f'Intervention 1:', value=interv_name_1, key='intervention-name-1')
-st.text_input(f'Intervention 1 acronym:', value=interv_acr_1, max_chars=5, key='intervention-acronym-1')
-st.text_area(f'Intervention 1 description (max. 250 characters):', value=interv_desc_1, max_chars=250, key='intervention-description-1')
-
-interv_name_2 = 'E-Bike sharing service'
-interv_acr_2 = 'eBike'
-interv_desc_2 = 'Affordable e-bikes for rent connecting the plateau, stations, the villages in the valley, and Massy-Palaiseau.'
-st.text_input(f'Intervention 2:', value=interv_name_2, key='intervention-name-2')
-st.text_input(f'Intervention 2 acronym:', value=interv_acr_2, max_chars=5, key='intervention-acronym-2')
-st.text_area(f'Intervention 2 description (max. 250 characters):', value=interv_desc_2, max_chars=250, key='intervention-description-2')
-
-
-# Estimating impact of interventions
-st.header('Step 9b: Estimating impact of interventions')
-st.write('Set the assumed impact the two interventions might have across scenarios and personas. The values go from -2 to +2.'
-         ' -2 means that after the intervention, a certain mode is much less likely. 0 means nothing changes. +2'
-         ' means that the likelihood to use a certain mode increases strongly. The acronyms stand for: MoD: Mobility '
-         'on Demand, MM: Micromobility, PT: Public Transport.')
-
-# Input collection for intervention 1 and 2
-interv_1_impact = {
-        0:{
-        'MoD': ['+1: Slight increase','+2: Strong increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['-1: Slight decrease','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','+2: Strong increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['+1: Slight increase','+1: Slight increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        1:{
-        'MoD': ['+1: Slight increase','+1: Slight increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','+1: Slight increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['+2: Strong increase','+2: Strong increase','+2: Strong increase','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        2:{
-        'MoD': ['+1: Slight increase','+2: Strong increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['-1: Slight decrease','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','+1: Slight increase','0: No change','+1: Slight increase','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['0: No change','0: No change','+1: Slight increase','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        3:{
-        'MoD': ['+1: Slight increase','+1: Slight increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['+1: Slight increase','+2: Strong increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['+2: Strong increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        4:{
-        'MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        5:{
-        'MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        6:{
-        'MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        7:{
-        'MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        }
 
-interv_2_impact = {
-        0:{
-        'MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['+2: Strong increase','0: No change','+1: Slight increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['+2: Strong increase','0: No change','+1: Slight increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['-1: Slight decrease','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        1:{
-        'MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['+1: Slight increase','0: No change','+1: Slight increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['+1: Slight increase','0: No change','0: No change','+1: Slight increase','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        2:{
-        'MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['+2: Strong increase','0: No change','+1: Slight increase','+2: Strong increase','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['+2: Strong increase','0: No change','+1: Slight increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['-1: Slight decrease','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        3:{
-        'MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['-1: Slight decrease','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['+1: Slight increase','0: No change','+1: Slight increase','+1: Slight increase','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['+2: Strong increase','0: No change','0: No change','+1: Slight increase','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','-1: Slight decrease','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        4:{
-        'MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        5:{
-        'MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        6:{
-        'MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        7:{
-        'MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MoD': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Bike': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'PT-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MoD-MM': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'Car-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        'MM-Walk': ['0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change','0: No change'],
-        },
-        }
+@st.cache_data(max_entries=4)
+def portfolio_search(pref, delta, distance, bodyweight, factors, walk_calories, bike_calories, weights, no_people,
+                     likelihood, allocation, costs, names, indicator, budget, levels, max_size, protect, routes=None):
+    problem = portfolio.problem(pref, delta, distance, bodyweight, factors, walk_calories, bike_calories, weights,
+                                no_people, likelihood, allocation=allocation, costs=costs, names=names,
+                                routes=routes)
+    return portfolio.search(problem, indicator=indicator, budget=budget, levels=levels, max_size=max_size,
+                            protect=protect)
 
-# Set df to be used below
-interv_1_impact_list = []
-interv_1_impact_result_list = []
-interv_2_impact_list = []
-interv_2_impact_result_list = []
 
-#### START WORKING AREA
+# All years of the trajectory are interpolated and evaluated at once, as a leading axis of the engine arrays
+@st.cache_data(max_entries=4)
+def trajectory_totals(pref, anchors, years, distance, bodyweight, factors, walk_calories, bike_calories, weights,
+                      no_people, allocation, routes=None):
+    return trajectory.annual_totals(pref, anchors, years, distance, bodyweight, factors, walk_calories, bike_calories,
+                                    weights, no_people, allocation=allocation, routes=routes)
 
-# st.write('Two methods are available to evaluate the impact of interventions across scenarios and personas. The checkbox '
-#          'below allows you to switch on the simplified mode.')
-# # Create the button
-button_state = False
-# button_state = st.checkbox('Simplified method')
-#
 
-if button_state == False:
-    st.subheader(f'Impact of intervention 1: {interv_name_1}')
-    for i in range(no_scen):
-        # Create editabe dataframe for inputs on emissions and energy demand per passenger kilometer
-        interv_1_impact_temp = interv_1_impact[i]
-        interv_1_impact_temp = pd.DataFrame(interv_1_impact_temp)
-        interv_1_impact_temp = interv_1_impact_temp[:no_pers]
-        interv_1_impact_temp.set_index(pd.Index(pers_name), inplace=True)
-        interv_1_impact_temp = interv_1_impact_temp.apply(lambda col: pd.Categorical(col, categories=['-2: Strong decrease', '-1: Slight decrease', '0: No change', '+1: Slight increase', '+2: Strong increase'], ordered=True))
-        st.write('Define the estimated impact for scenario ' + scen_names[i])
-        interv_1_impact_temp = st.experimental_data_editor(interv_1_impact_temp, key=f'interv_1_impact{i + 1}')
-        interv_1_impact_list.append(interv_1_impact_temp)
-
-    # Editable df for intervention 1
+@st.cache_data(max_entries=4)
+def persona_catalog(digest, _data, scenarios):
+    return personas.read_catalog(io.BytesIO(_data), scenarios)
+
+
+# The shortest paths between the zones are also kept on disk, for other sessions and server restarts
+@st.cache_data(max_entries=2)
+def zone_paths(network_digest, zones_digest, _network, _zones):
+    return spatial.zone_paths(_network, _zones)
+
+
+# The synthetic population is shared read-only between sessions instead of being copied out of the cache
+@st.cache_resource(max_entries=2)
+def synthetic_population(weights, distance, bodyweight, no_people, seed):
+    return population.synthesize(weights, distance, bodyweight, no_people, seed=seed)
+
+
+@st.cache_data(max_entries=4)
+def population_impacts(population_key, _population, pref, factors, walk_calories, bike_calories, likelihood,
+                       allocation, routes=None):
+    return population.evaluate(_population, pref, factors, walk_calories, bike_calories, likelihood,
+                               allocation=allocation, routes=routes)
+
+
+# Results dataset of the charts, built once per change of the results
+@st.cache_data(max_entries=STAGE_CACHE_ENTRIES)
+def results_frame(dist, individual, group, labels, scenarios, personas):
+    return charts.results_frame(dist, individual, group, labels, scenarios, personas)
+
+
+# Cached image thumbnails
+# Images are decoded and resized once per content, defaults and uploads alike are keyed by their content hash, so a
+# changed file gets a new thumbnail. Only the small thumbnails are sent to the browser on reruns.
+IMAGE_CACHE_ENTRIES = 64
+
+
+@st.cache_data(max_entries=IMAGE_CACHE_ENTRIES)
+def thumbnail(digest, _data, width=images.THUMBNAIL_WIDTH):
+    return images.thumbnail(_data, width=width)
+
+
+def file_thumbnail(path, width=images.THUMBNAIL_WIDTH):
+    with open(path, 'rb') as file:
+        data = file.read()
+    return thumbnail(images.content_hash(data), data, width=width)
+
+
+def image_thumbnail(uploaded_file, default_path):
+    if uploaded_file is None:
+        return file_thumbnail(default_path)
+    data = uploaded_file.getvalue()
+    return thumbnail(images.content_hash(data), data)
+
+
+# Step navigation
+# Only the widgets of the shown step are built and only the results on screen are computed. The inputs of all steps
+# are kept in st.session_state['inputs']: steps that are not shown read their last values from there and a widget
+# that is built again starts from its last value.
+STEPS = {
+    'All steps': 'All steps on one page',
+    'Step 1': 'Step 1: Scenarios',
+    'Step 2': 'Step 2: Personas',
+    'Steps 3-5': 'Steps 3-5: Likelihoods, population size and weights',
+    'Step 6': 'Step 6: Mode likelihoods',
+    'Step 7': 'Step 7: Impact values',
+    'Step 8': 'Step 8: Results',
+    'Step 9': 'Step 9: Interventions',
+    'Step 10': 'Step 10: Results with interventions',
+}
+
+
+def _conform(value, default):
+    # Tables keep their edited cells where the default changed shape or labels (e.g. a renamed persona), restored
+    # snapshots give the cells as arrays
+    if isinstance(default, pd.DataFrame) and isinstance(value, (pd.DataFrame, np.ndarray)):
+        cells = value.to_numpy() if isinstance(value, pd.DataFrame) else value
+        rows, cols = min(len(cells), len(default)), min(cells.shape[1], len(default.columns))
+        result = default.copy()
+        for j in range(cols):
+            result.iloc[:rows, j] = cells[:rows, j]
+        return result
+    return value
+
+
+def step_input(shown, widget, key, default, *args, field='value', **kwargs):
+    """Value of the input ``key``, built with ``widget`` if its step is ``shown``.
+
+    ``default`` is passed to the widget as ``field`` (``None`` for file uploaders, which keep their last upload while
+    they start empty).
+    """
+    inputs = st.session_state.setdefault('inputs', {})
+    # Widget keys change with every restored snapshot, so no widget keeps its state from before
+    generation = st.session_state.get('input-generation', 0)
+    widget_key = f'{key}-{generation}' if generation else key
+    fresh = widget_key not in st.session_state
+    # Default tables are shared by all sessions, a session only keeps how its values differ from them
+    default = defaults.share(default)
+    entry = inputs.setdefault(key, {'default': default, 'base': defaults.SAME, 'value': defaults.SAME})
+    if fresh or not defaults.same(entry['default'], default):
+        # The widget is (re)created, it starts from the last value instead of the default
+        value = _conform(defaults.patch(entry['default'], entry['value']), default)
+        entry['base'] = entry['value'] = defaults.diff(value, default)
+    entry['default'] = default
+    if shown:
+        if field is not None:
+            kwargs[field] = defaults.patch(default, entry['base'])
+        value = widget(*args, key=widget_key, **kwargs)
+        if not (field is None and fresh and not value):
+            entry['value'] = defaults.diff(value, default)
+    return defaults.patch(default, entry['value'])
+
+
+# Batched edits
+# The inputs of a shown step are built in a form of their own, so that editing a cell does not rerun the script. The
+# edits of the step are sent together when they are applied, the results are computed once per apply.
+@contextlib.contextmanager
+def batch_form(step, enabled):
+    """Block of the inputs of ``step``, built in a form with an apply button if ``enabled``."""
+    if not enabled:
+        yield
+        return
+    with st.form(f'batch-{step}'):
+        yield
+        st.form_submit_button('Apply the edits', help='Recompute the results with all edits of this step.')
+
+
+def restore_snapshot(state):
+    """Put the values of a loaded snapshot into the input store, the widgets are built from them in the same run."""
+    scenarios, interventions = state['scenarios'], state['interventions']
+    values = {
+        'no-scenarios': len(scenarios['names']),
+        'scenario-characteristics': ordinal.CHARACTERISTIC.label(scenarios['characteristics']),
+        'no-people': state['population'],
+        'synthetic-population': state['synthetic_population'],
+        'walk-calories': state['walk_calories'],
+        'bike-calories': state['bike_calories'],
+        'emissions-energy': np.stack([state['factors'][key] for key in engine.FACTORS]),
+        'mode-allocation': state['allocation'] * 100,
+        'no-interventions': len(interventions['names']),
+    }
+    for i, name in enumerate(scenarios['names']):
+        values[f'scenario-name-{i + 1}'] = name
+        values[f'scenario-description-{i + 1}'] = scenarios['descriptions'][i]
+        values[f'scenario-likelihood-{i + 1}'] = int(round(scenarios['likelihood'][i]))
+        allocation = state['scenario_allocation'][i]
+        values[f'allocation-own-{i + 1}'] = allocation is not None
+        if allocation is not None:
+            values[f'mode-allocation{i + 1}'] = allocation * 100
+    for j, name in enumerate(state['uncertainties']['names']):
+        values[f'uncertainty-name-{j + 1}'] = name
+        values[f'uncertainty-description-{j + 1}'] = state['uncertainties']['descriptions'][j]
+    if 'personas' in state:
+        pers = state['personas']
+        values['no-personas'] = len(pers['names'])
+        values['persona-characteristics'] = np.stack([pers['distance'], pers['bodyweight']], axis=-1)
+        for i, name in enumerate(pers['names']):
+            values[f'persona-name-{i + 1}'] = name
+            values[f'persona-description-{i + 1}'] = pers['descriptions'][i]
+            values[f'pers_weight_{i}'] = int(round(pers['weights'][i]))
+        for i, pref in enumerate(state['preferences']):
+            values[f'mode_pref{i + 1}'] = ordinal.PREFERENCE.label(pref)
+    for k, name in enumerate(interventions['names']):
+        values[f'intervention-name-{k + 1}'] = name
+        values[f'intervention-acronym-{k + 1}'] = interventions['acronyms'][k]
+        values[f'intervention-description-{k + 1}'] = interventions['descriptions'][k]
+        for i, impact in enumerate(interventions['impacts'][k]):
+            values[f'interv_{k + 1}_impact{i + 1}'] = ordinal.IMPACT.label(impact)
+
+    inputs = st.session_state.setdefault('inputs', {})
+    for key, value in values.items():
+        inputs[key] = {'default': None, 'base': value, 'value': value}
+    st.session_state['input-generation'] = st.session_state.get('input-generation', 0) + 1
+
+
+st.sidebar.title("Info Sidebar")
+st.sidebar.write("You can use this sidebar to show key info during the process. Everything is also included in the "
+                 "main text on the right. The width of the sidebar can changed by dragging its border.")
+page = st.sidebar.radio('Show', list(STEPS), format_func=STEPS.get, key='page',
+                        help='Show all steps on one page or one step at a time. Showing one step is faster, the '
+                             'values of the other steps are kept.')
+show = {step: page in ('All steps', step) for step in STEPS}
+batch_edits = st.sidebar.checkbox('Batch edits', value=False, key='batch-edits',
+                                  help='Collect the edits of a step and recompute the results only when they are '
+                                       'applied. Results of invalid inputs (e.g. likelihoods not adding up to 100%) '
+                                       'are held back.')
+
+# Optional timings of the steps
+# Each step is a section of the run: the cached stages are booked as computation, building and sending the charts as
+# charts and the rest of the step as widgets. The last runs are kept in the session for a trace file.
+profile_box = st.sidebar.expander('Time the steps')
+profiler = profiling.Profiler(profile_box.checkbox('Time each run', value=False, key='profiling',
+                                                   help='Shows the time of each step of the last run below and '
+                                                        'offers a trace of the last runs for chrome://tracing or '
+                                                        'ui.perfetto.dev.'))
+if profiler.enabled:
+    profile_runs_kept = profile_box.number_input('Runs in the trace', min_value=1, max_value=100, value=10,
+                                                 key='profile-runs-kept')
+    (distance_split, impacts, group_totals, scenario_totals, incremental_results, apply_intervention, simulate,
+     sensitivity_indices, portfolio_search, trajectory_totals, persona_catalog, zone_paths, synthetic_population,
+     population_impacts, results_frame, thumbnail) = [
+        profiler.timed(func, 'computation') for func in (
+            distance_split, impacts, group_totals, scenario_totals, incremental_results, apply_intervention, simulate,
+            sensitivity_indices, portfolio_search, trajectory_totals, persona_catalog, zone_paths,
+            synthetic_population, population_impacts, results_frame, thumbnail)]
+profiler.section('Sidebar')
+
+# Session snapshots
+# A snapshot holds all inputs as one small file. It is restored before any widget is built, so the whole session
+# comes back in one run.
+snapshot_box = st.sidebar.expander('Save or restore all values')
+snapshot_file = snapshot_box.file_uploader('Restore a snapshot:', type=['json'], key='snapshot')
+if snapshot_file is None:
+    st.session_state['snapshot-restored'] = None
+else:
+    snapshot_data = snapshot_file.getvalue()
+    snapshot_digest = images.content_hash(snapshot_data)
+    if st.session_state.get('snapshot-restored') != snapshot_digest:
+        try:
+            restore_snapshot(snapshot.loads(snapshot_data))
+            st.session_state['snapshot-restored'] = snapshot_digest
+        except ValueError as error:
+            snapshot_box.error(f'Error: {error}')
+st.sidebar.markdown("---")
+
+profiler.section('Step 1')
+with batch_form('Step 1', batch_edits and show['Step 1']):
+    if show['Step 1']:
+        # Introduction
+        st.title('Urban Mobility Impact Assessment and Comparison Tool')
+        st.write('This is a prototype of a tool to compare impacts of potential interventions on a local urban mobility '
+                 'system. It provides an interface to compare impacts across user groups (personas) and across '
+                 'future scenarios. Standard values are defined as reference values. This '
+                 'application compares the impact of an intervention (e.g., policy/technology) for different '
+                 'persona groups and across 2030 scenarios, measured by CO2 equivalent (CO2e) emissions, energy demand in '
+                 'megajoules (MJ), and calories burned.')
+        st.write('As a prototype, some of the input fields are not as intuitive as they should be in a final version. We hope '
+                 'that it is clear nevertheless and are looking forward to any feedback.')
+
+        # Information
+        st.subheader('Information')
+        st.write('You can reset the form by refreshing the website. No values or uploaded images are stored, but you can '
+                 'save all values as a snapshot file in the sidebar and restore them later. The code is available on '
+                 'Github: https://github.com/TjarkGall/decision-tool-interface')
+        st.write('The concept was developed as part of the Institute Pascal research programme 2022 and has been continued as '
+                 'part of the work of the <a href="http://www.chaire-anthropolis.fr/">Anthropolis Chair.</a>',
+                 unsafe_allow_html=True)
+        st.subheader('Questions?')
+        st.write('Contact Tjark Gall | tjark.gall@irt-systemx.fr')
+
+        # Anthropolis logo
+        st.image(file_thumbnail('data/images/Anthropolis_logo_colour.png', width=1400), use_column_width=True)
+
+    # Defining Future Scenarios
+    if show['Step 1']:
+        st.header('Step 1: Defining future scenarios')
+
+        # Number of scenarios
+        st.subheader('Number of scenarios')
+    no_scen = step_input(show['Step 1'], st.slider, 'no-scenarios', 4, 'With how many scenarios do you want to work?',
+                         *snapshot.COUNTS['scenarios'])
+
+    # Scenario names and descriptions
+    if show['Step 1']:
+        st.subheader('Scenario names and descriptions')
+        st.write('You can keep the standard scenario names and descriptions or change them. If you chose more scenarios, '
+                 'you should name and describe them.')
+    scen_names = []
+    scen_desc = []
     for i in range(no_scen):
-        # Add corresponding values from both dataframes
-        df1 = mode_pref_list[i]
-        df1 = df1.apply(lambda x: x.str[0])
-        df1 = df1.astype(int)
-        df2 = interv_1_impact_list[i]
-        df2 = df2.apply(lambda x: x.str.split(':', 1).str[0])
-        df2 = df2.astype(int)
-        result = pd.DataFrame(index=df1.index, columns=df2.columns)
-        for p in range(no_pers):
-            for j in range(13):
-                value = df1.iloc[p, j] + df2.iloc[p, j]
-                result.iloc[p, j] = max(min(value, 4), 0)
-        interv_1_impact_result_list.append(result)
-
-    st.subheader(f'Impact of intervention 2: {interv_name_2}')
-
-    # Editable df for intervention 2
+        default_name, default_desc = defaults.texts(defaults.SCENARIOS, i, f'S{i + 1}: Scenario {i + 1}')
+        scen_names.append(step_input(show['Step 1'], st.text_input, f'scenario-name-{i + 1}', default_name,
+                                     f'Scenario {i + 1} name:'))
+        scen_desc.append(step_input(show['Step 1'], st.text_area, f'scenario-description-{i + 1}', default_desc,
+                                    f'Scenario {i + 1} description (max. 750 characters):', max_chars=750))
+
+    if show['Step 1']:
+        # Scenario characteristics
+        st.subheader('Scenario characteristics')
+        st.write('Scenarios help to integrate future uncertainties (= unknown developments). They shall be distinct from each '
+                 'other. To ensure this, four uncertainties are defined as examples here: Intermodality, Mixed Use, '
+                 'Density, and Public Transport. For each of the scenarios, they are ranked between low to very high. '
+                 'While these numbers are not taken into consideration in the calculation, they shall help to distinguish '
+                 'the scenarios during the following steps.')
+
+    uncert_names = []
+    uncert_desc = []
+
+    for j, (default_name, default_desc) in enumerate(defaults.UNCERTAINTIES):
+        uncert_names.append(step_input(show['Step 1'], st.text_input, f'uncertainty-name-{j + 1}', default_name,
+                                       f'Uncertainty {j + 1} (U{j + 1}):'))
+        uncert_desc.append(step_input(show['Step 1'], st.text_area, f'uncertainty-description-{j + 1}', default_desc,
+                                      f'U{j + 1} description (max. 250 characters):', max_chars=250))
+
+    # Default characteristics of U1-U4 per scenario as codes 1 (low) to 4 (very high)
+    scen_chars_prep = defaults.CHARACTERISTICS[0:no_scen]
+
+    scen_chars = ordinal.CHARACTERISTIC.table(scen_chars_prep, scen_names, uncert_names)
+    scen_chars = step_input(show['Step 1'], st.experimental_data_editor, 'scenario-characteristics', scen_chars,
+                            field='data')
+    scen_chars_codes = ordinal.CHARACTERISTIC.codes(scen_chars)
+
+    # Scenario images
+    if show['Step 1']:
+        st.subheader('Scenario images')
+        st.write('You can upload photos (in format JPG/JPEG/PNG) for each of the scenarios as visual support. The '
+                 'sample images were created with the scenario description as prompt for Midjourney, a free text-to-image generator.')
+    scen_images = []
     for i in range(no_scen):
-        # Create editabe dataframe for inputs on emissions and energy demand per passenger kilometer
-        interv_2_impact_temp = interv_2_impact[i]
-        interv_2_impact_temp = pd.DataFrame(interv_2_impact_temp)
-        interv_2_impact_temp = interv_2_impact_temp[:no_pers]
-        interv_2_impact_temp.set_index(pd.Index(pers_name), inplace=True)
-        interv_2_impact_temp = interv_2_impact_temp.apply(lambda col: pd.Categorical(col, categories=['-2: Strong decrease', '-1: Slight decrease', '0: No change', '+1: Slight increase', '+2: Strong increase'], ordered=True))
-        st.write('Define the estimated impact for scenario ' + scen_names[i])
-        interv_2_impact_temp = st.experimental_data_editor(interv_2_impact_temp, key=f'interv_2_impact{i + 1}')
-        interv_2_impact_list.append(interv_2_impact_temp)
+        default_image_path = f'data/images/scenario_0{i + 1}.png'
+        uploaded_files = step_input(show['Step 1'], st.file_uploader, f'scenario{i + 1}', [],
+                                    f'Upload image(s) for {scen_names[i]}:', field=None, type=['jpg', 'jpeg', 'png'],
+                                    accept_multiple_files=True)
+        scen_images.append(image_thumbnail(uploaded_files[0] if uploaded_files else None, default_image_path))
+
+    if show['Step 1']:
+        # Show scenario info
+        st.subheader('Scenario information')
+        st.write('Below, the defined scenarios are shown as reference for the next steps. You can also show them in the sidebar '
+                 'to have them always visible. If you still want to change them, you need to go back to the previous section.')
+        for i in range(no_scen):
+            st.write(f'### {scen_names[i]}')
+            if scen_images[i] is not None:
+                st.image(scen_images[i], width=300)
+            st.write(scen_desc[i])
+            st.write(scen_chars.loc[scen_names[i]])
 
+profiler.section('Step 2')
+with batch_form('Step 2', batch_edits and show['Step 2']):
+    if show['Step 2']:
+        # Defining Future Personas
+        st.header('Step 2: Defining future personas')
+        st.write('Next, you can choose with how many personas you want to work, how they are called, and how they are described.'
+                 ' The descriptions are important as they permit to image their specific needs and preferences. The sample '
+                 'personas have been developed during a workshop. You can refer to a set of 16 personas developed on the '
+                 'basis of the 2019 census, as well as their distributions, by clicking here <a href="https://urban-mobility-futures.notion.site/Personas-aa3b30f47c354220bc025dd7edb207cd?pvs=25">here.</a>',
+                 unsafe_allow_html=True)
+
+        # Persona catalog
+        st.subheader('Persona catalog')
+        st.write('Instead of defining the personas one by one, you can load a catalog with many personas (e.g. derived from '
+                 'census data) as a CSV file. It holds one row per persona with the columns Persona, Group, Weight, '
+                 'Distance (km), Bodyweight (kg) and one column per mode with the likelihood to use it (0 to 4), optionally '
+                 'with a Scenario column for preferences per scenario. The personas are evaluated individually and the '
+                 'results are shown per group.')
+    pers_catalog_file = step_input(show['Step 2'], st.file_uploader, 'persona-catalog', None,
+                                   'Upload a persona catalog (optional):', field=None, type=['csv'])
+    pers_catalog = None
+    if pers_catalog_file is not None:
+        pers_catalog_data = pers_catalog_file.getvalue()
+        try:
+            pers_catalog = persona_catalog(images.content_hash(pers_catalog_data), pers_catalog_data, scen_names)
+        except ValueError as error:
+            st.error(f'Error: {error}')
+
+    if pers_catalog is None:
+        # Number of personas
+        if show['Step 2']:
+            st.subheader('Number of personas')
+        no_pers = step_input(show['Step 2'], st.slider, 'no-personas', 4, 'With how many personas do you want to work?',
+                             *snapshot.COUNTS['personas'])
+
+        # Persona names and descriptions
+        if show['Step 2']:
+            st.subheader('Persona names and descriptions')
+        pers_name = []
+        pers_desc = []
+        for i in range(no_pers):
+            default_name, default_desc = defaults.texts(defaults.PERSONAS, i, f'Persona {i + 1}')
+            pers_name.append(step_input(show['Step 2'], st.text_input, f'persona-name-{i + 1}', default_name,
+                                        f'Name of persona {i + 1}:'))
+            pers_desc.append(step_input(show['Step 2'], st.text_area, f'persona-description-{i + 1}', default_desc,
+                                        f'Description of persona {i + 1} (max. 250 char.):', max_chars=450))
+
+        # Persona characteristics
+        if show['Step 2']:
+            st.subheader('Persona characteristics')
+            st.write('Set the number of home-work-home kilometres for a normal day for each persona and their bodyweight in '
+                     'kilograms. These values are the basis for the later impact assessment of emissions, energy use, and calories burnt.')
+
+        # Default distances and bodyweights, further personas start at zero
+        pers_chars = pd.DataFrame(defaults.pad(defaults.PERSONA_CHARACTERISTICS, (no_pers, 2)), index=pers_name,
+                                  columns=['Distance (km)', 'Bodyweight (kg)'])
+
+        pers_chars = step_input(show['Step 2'], st.experimental_data_editor, 'persona-characteristics', pers_chars,
+                                field='data')
+
+        # Distances from home and work zones on a network
+        # The paths between all zones are searched once per set of files, placing a persona in a zone is a lookup
+        if show['Step 2']:
+            st.subheader('Distances from zones (optional)')
+            st.write('Instead of entering the distances, you can load the zones and the street and transit network of the '
+                     'plateau (GeoJSON or CSV files, see decision_tool/spatial.py for the formats) and place each persona '
+                     'in a home and a work zone. The distance of a persona is then its shortest home-work-home trip, and '
+                     'each mode travels the length of its own shortest trip. The distances of the personas placed in '
+                     'zones replace those entered above.')
+        spatial_network_file = step_input(show['Step 2'], st.file_uploader, 'spatial-network', None,
+                                          'Upload a network (optional):', field=None, type=['geojson', 'json', 'csv'])
+        spatial_zones_file = step_input(show['Step 2'], st.file_uploader, 'spatial-zones', None,
+                                        'Upload the zones (optional):', field=None, type=['geojson', 'json', 'csv'])
+        pers_routes = None
+        if spatial_network_file is not None and spatial_zones_file is not None:
+            spatial_network_data, spatial_zones_data = spatial_network_file.getvalue(), spatial_zones_file.getvalue()
+            try:
+                spatial_paths = zone_paths(images.content_hash(spatial_network_data),
+                                           images.content_hash(spatial_zones_data), spatial_network_data,
+                                           spatial_zones_data)
+            except ValueError as error:
+                st.error(f'Error: {error}')
+            else:
+                if show['Step 2']:
+                    st.write(f'The network connects {len(spatial_paths["names"])} zones: '
+                             f'{", ".join(spatial_paths["names"])}. Enter the home and work zone of each persona, '
+                             f'personas without zones keep their distance.')
+                pers_zones = pd.DataFrame({'Home zone': [''] * no_pers, 'Work zone': [''] * no_pers}, index=pers_name)
+                pers_zones = step_input(show['Step 2'], st.experimental_data_editor, 'persona-zones', pers_zones,
+                                        field='data')
+                zones_home = pers_zones['Home zone'].fillna('').astype(str).str.strip().to_numpy()
+                zones_work = pers_zones['Work zone'].fillna('').astype(str).str.strip().to_numpy()
+                zones_placed = np.flatnonzero((zones_home != '') & (zones_work != ''))
+                if len(zones_placed):
+                    try:
+                        zones_distance, zones_routes = spatial.persona_distances(spatial_paths, zones_home[zones_placed],
+                                                                                 zones_work[zones_placed])
+                    except ValueError as error:
+                        st.error(f'Error: {error}')
+                    else:
+                        pers_chars = pers_chars.copy()
+                        pers_chars.iloc[zones_placed, 0] = zones_distance.round(1)
+                        pers_routes = np.ones((no_pers, len(engine.IMPACT_MODES)))
+                        pers_routes[zones_placed] = zones_routes
+                        if show['Step 2']:
+                            st.write('Daily kilometres of the personas placed in zones if they only used one mode:')
+                            st.dataframe(pd.DataFrame(zones_distance[:, np.newaxis] * zones_routes,
+                                                      index=np.asarray(pers_name)[zones_placed],
+                                                      columns=engine.IMPACT_MODES).round(1))
+
+        # Persona images
+        if show['Step 2']:
+            st.subheader('Persona images')
+            st.write('You can upload photos (in format JPG/JPEG/PNG) for each of the personas as visual support. The '
+                     'sample images were created with the persona description as prompt for Midjourney, a free text-to-image generator.')
+
+        pers_images = []
+        for i in range(no_pers):
+            default_image_path = f'data/images/persona_0{i + 1}.png'
+            uploaded_files = step_input(show['Step 2'], st.file_uploader, f'persona{i + 1}', [],
+                                        f'Upload image(s) for {pers_name[i]}:', field=None, type=['jpg', 'jpeg', 'png'],
+                                        accept_multiple_files=True)
+            pers_images.append(image_thumbnail(uploaded_files[0] if uploaded_files else None, default_image_path))
+
+    else:
+        # Persona groups take the place of the individual personas in the steps below
+        pers_groups = personas.group_table(pers_catalog)
+        no_pers = len(pers_catalog['groups'])
+        pers_name = pers_catalog['groups']
+        pers_desc = [f'Group of {count} personas from the catalog.' for count in pers_groups['Personas']]
+        pers_chars = pers_groups[['Distance (km)', 'Bodyweight (kg)']].round(1)
+        pers_routes = None
+        pers_images = [None] * no_pers
+        if show['Step 2']:
+            st.write(f'The catalog holds {len(pers_catalog["names"])} personas in {no_pers} groups.')
+            st.dataframe(pers_groups.round(1))
+
+    if show['Step 2']:
+        # Show persona info
+        st.subheader('Persona information')
+        st.write('Below, the established personas are shown as reference for the next steps. You can also show them in the sidebar '
+                 'to have them always visible. If you still want to change them, you need to go back to the previous section.')
+        for i in range(no_pers):
+            st.write(f'### {pers_name[i]}')
+            if pers_images[i] is not None:
+                st.image(pers_images[i], width=300)
+            st.write(pers_desc[i])
+            st.write(pers_chars.loc[pers_name[i]])
+
+profiler.section('Steps 3-5')
+with batch_form('Steps 3-5', batch_edits and show['Steps 3-5']):
+    if show['Steps 3-5']:
+        # Likelihood of scenarios
+        st.header('Step 3: Set likelihood of scenarios')
+
+        # Scenario description
+        st.write('Define for each of the scenarios the probability in % between 0 and 100. The sum must add up to 100. '
+                 'A higher percentage means that the scenario will have a higher weight in the impact assessment.')
+
+    # Default values
+    default_values = [40, 15, 25, 20]
+    for i in range(no_scen - 4):
+        default_values.append(0)
+
+    # Scenario likelihood sliders
+    total_likelihood = 0
+    scen_likelihood_list = []
     for i in range(no_scen):
-        # Add corresponding values from both dataframes
-        df1 = mode_pref_list[i]
-        df1 = df1.apply(lambda x: x.str[0])
-        df1 = df1.astype(int)
-        df2 = interv_2_impact_list[i]
-        df2 = df2.apply(lambda x: x.str.split(':', 1).str[0])
-        df2 = df2.astype(int)
-        result = pd.DataFrame(index=df1.index, columns=df2.columns)
-        for p in range(no_pers):
-            for j in range(13):
-                value = df1.iloc[p, j] + df2.iloc[p, j]
-                result.iloc[p, j] = max(min(value, 4), 0)
-        interv_2_impact_result_list.append(result)
+        scen_likelihood = step_input(show['Steps 3-5'], st.slider, f'scenario-likelihood-{i + 1}', default_values[i],
+                                     f'Likelihood of scenario {scen_names[i]} in percent:', min_value=0, max_value=100,
+                                     step=5)
+        scen_likelihood_list.append(scen_likelihood)
+        total_likelihood += scen_likelihood
+
+    # Inputs the results cannot be computed with, held back in batch mode
+    invalid_inputs = []
+    if total_likelihood != 100:
+        invalid_inputs.append(f'the likelihoods of the scenarios add up to {total_likelihood}%')
+
+    if show['Steps 3-5']:
+        # Calculate total likelihood
+        if total_likelihood != 100:
+            st.error("Error: The sum of likelihoods must be equal to 100.")
+
+        # Display total likelihood
+        st.write(f'Total likelihood: {total_likelihood}%')
+        if total_likelihood != 100:
+            st.write('Please adjust the likelihoods so that the sum is 100%.', unsafe_allow_html=True)
+            st.markdown('<style>div.stError > p:first-child {color: red; font-weight: bold;}</style>', unsafe_allow_html=True)
+
+        # Number of people moving to/on the plateau per day
+        st.header('Step 4: Define population size')
+    no_people = step_input(show['Steps 3-5'], st.number_input, 'no-people', 50000,
+                           'How many people move to/on the plateau per day in the future?', step=1000)
+    if show['Steps 3-5']:
+        st.write('By default, the population size scales the impacts of the personas. Optionally, the tool also generates a '
+                 'synthetic population of individual travellers with varying distances, bodyweights and mode choices based on '
+                 'the personas. This shows the spread of the impacts across travellers (Step 10e).')
+    pop_mode = step_input(show['Steps 3-5'], st.checkbox, 'synthetic-population', False, 'Simulate individual travellers')
+
+    # Persona weights likelihood sliders
+    if show['Steps 3-5']:
+        st.header('Step 5: Set persona weights')
+        st.write('Define for each of the personas the weight in percent between 0 and 100. 10 means that 10% of the overall '
+                 'population defined above are similar to the defined persona. The weights must add up to 100.')
+    pers_weights = []
+    if pers_catalog is None:
+        for i in range(no_pers):
+            default_weights = [20, 20, 15, 45]
+            if no_pers > 4:
+                default_weights += [0] * (no_pers - 4)
+            pers_weights.append(step_input(show['Steps 3-5'], st.slider, f'pers_weight_{i}', default_weights[i],
+                                           f'Weight in percent of {pers_name[i]} in overall population:', min_value=0,
+                                           max_value=100, step=5))
+    else:
+        # The weights are only rounded for display, e.g. three equal groups of 33.3% still add up to 100%
+        pers_weights = pers_groups['Weight'].tolist()
+        if show['Steps 3-5']:
+            st.write('The weights of the personas are taken from the catalog. Per group, they add up to:')
+            st.dataframe(pers_groups['Weight'].round(1))
+    total_weights = sum(pers_weights)
+    weights_valid = np.isclose(total_weights, 100)
+    if not weights_valid:
+        invalid_inputs.append(f'the persona weights add up to {round(total_weights, 1):g}%')
+    if show['Steps 3-5']:
+        st.write(f'Total weight: {round(total_weights, 1):g}%')
+        if not weights_valid:
+            st.error('Total weight must be 100%')
+
+profiler.section('Step 6')
+with batch_form('Step 6', batch_edits and show['Step 6']):
+    if show['Step 6']:
+        # Mode likelihoods
+        st.header('Step 6: Set likelihood to use mode per scenario/persona')
+
+        # Text description
+        st.write('In this section, we define for each of the scenarios the likelihood for each persona to use a certain mode. '
+                 'The range of likelihood to take a mode is 0 = unlikely, 1 = rather unlikely, 2 = rather likely, 3 = likely, '
+                 'and 4 = very likely. The modes are Mobility on Demand (MoD), Car, Bike, Walk, Micromobility (MM), Public '
+                 'Transport and MoD (PT-MoD), Public Transport and Bike (PT-Bike), Public Transport and Walk (PT-Walk), '
+                 'Public Transport and Micromobility (PT-MM), Car-Walk and Micromobility and Walk (MM-Walk). For multimodal '
+                 'trips, we assume 80% to be done with the first-mentioned mode and 20% by the second (adaptable in Step '
+                 '7).')
+        st.write('This is the most time-consuming but also the most important step. You see the scenario image for reference. '
+                 'Use the sidebar to retrieve the descriptions and to show the personas.')
+
+    # Default codes [scenario, persona, mode] of the likelihoods to use each mode, further personas are unlikely to use
+    # any mode
+    mode_prep_codes = defaults.pad(defaults.PREFERENCES, (no_scen, no_pers, len(engine.MODES)))
+
+    mode_pref_list = []
+    mode_pref_codes = []
+
+    if pers_catalog is None:
+        for i in range(no_scen):
+            mode_pref = ordinal.PREFERENCE.table(mode_prep_codes[i], pers_name[:no_pers], engine.MODES)
+            if show['Step 6']:
+                st.write(f'### {scen_names[i]}')
+                if scen_images[i] is not None:
+                    st.image(scen_images[i], width=300)
+                st.write(
+                    f'How likely is it that each persona uses each mode in the scenario {scen_names[i]}?')
+            mode_pref = step_input(show['Step 6'], st.experimental_data_editor, f'mode_pref{i + 1}', mode_pref,
+                                   field='data')
+            mode_pref_list.append(mode_pref)
+            mode_pref_codes.append(ordinal.PREFERENCE.codes(mode_pref, engine.MODES))
+    elif show['Step 6']:
+        st.write('The likelihoods to use each mode are taken from the persona catalog.')
 
-else:
-    st.write("<span style='color:red'>Not finalised yet. Please change back to the extended one.</span>", unsafe_allow_html=True)
-    st.subheader(f'Impact of intervention 1: {interv_name_1}')
-    # Create an empty DataFrame to store the results
-    results_dict = {}
+# Set values for impact assessment
+profiler.section('Step 7')
+with batch_form('Step 7', batch_edits and show['Step 7']):
+    if show['Step 7']:
+        st.header('Step 7: Set values for impact assessment')
+
+    # Create the input fields for individual values
+    walk_calories_input = step_input(show['Step 7'], st.number_input, 'walk-calories', engine.WALK_CALORIES,
+                                     'Adapt the value for calories burned per kg per km while walking. The standard is '
+                                     'that one calorie is burned per kilometre per kg bodyweight.')
+    bike_calories_input = step_input(show['Step 7'], st.number_input, 'bike-calories', engine.BIKE_CALORIES,
+                                     'Adapt the value for calories burned per kg per km while cycling. The standard is '
+                                     'that 0.4 calories are burned per kilometre per kg bodyweight.')
+
+    # Create editabe dataframe for inputs on emissions and energy demand per passenger kilometer
+    emissions_energy = defaults.FACTORS
+
+    # Add a title above the dataframe
+    if show['Step 7']:
+        st.write('Adapt the assumed future CO2 equivalent emissions in g/passenger km and energy demand in MJ/passenger km. You can '
+                 'find reference values for emissions from [ADEME](https://impactco2.fr/transport) and for '
+                 'energy from [IEA](https://www.iea.org/data-and-statistics/charts/energy-intensity-of-passenger-transport-modes-2018).')
+    emissions_energy = step_input(show['Step 7'], st.experimental_data_editor, 'emissions-energy', emissions_energy,
+                                  field='data')
+
+    # Editable allocation of the kilometres of each mode to the modes with emission and energy values, in percent
+    if show['Step 7']:
+        st.write('Adapt the share of the kilometres of each mode (rows) that is travelled with the modes above (columns), '
+                 'in percent. By default, multimodal trips are split 80/20 between the first- and the second-mentioned '
+                 'mode. Each row should add up to 100%. Scenarios can have their own allocation.')
+    mode_allocation = pd.DataFrame(engine.MODE_ALLOCATION * 100, index=engine.MODES, columns=engine.IMPACT_MODES)
+    mode_allocation = step_input(show['Step 7'], st.experimental_data_editor, 'mode-allocation', mode_allocation,
+                                 field='data')
+    scen_allocation_own = []
+    scen_allocation = []
     for i in range(no_scen):
-        st.subheader(scen_names[i])
-        for p in range(no_pers):
-            st.write(f"__Estimate the impact of {interv_name_1} on {pers_name[p]}__")
-            # Create a slider with range -2 to 2 and default value 0
-            slider_value = st.slider(f"Choose between more individual car use and micromobility on the left (-2) and "
-                                     f"more active modes and public transport on the right (+2)",
-                                     -2, 2, 0, key=f"{i}-{p}")
-
-            # Store the result in the dictionary
-            results_dict[f"({i}, {p})"] = slider_value
-
-    # Display the results
-    st.write(results_dict)
-    st.write(mode_pref_list)
-    st.write(interv_1_impact_result_list)
-
-##### END WORKING AREA
-
-
-# Preparation for charts
-scen_acr = ['S1', 'S2', 'S3', 'S4', 'S5', 'S6', 'S7', 'S8']
-scen_acr_temp = scen_acr[:no_scen]
-scen_acr_interv = [f'{s}a' for s in scen_acr_temp] + [f'{s}b: {interv_acr_1}' for s in scen_acr_temp] + [f'{s}c: {interv_acr_2}' for s in scen_acr_temp]
-scen_acr_interv.sort()
-
-# Colours + color scale for chart
-colours_int = ['#193f5a', '#45667b', '#8b9eab',
-               '#db666e', '#e1858b', '#ebb2b7',
-               '#eca83e', '#f1b964', '#f6d49e',
-               '#62548e', '#8177a5', '#afa9c5',
-               '#e18054', '#e79a76', '#f0bfa9',
-               '#c65a86', '#d37ba0', '#e2acc2',
-               '#344c79', '#596f95', '#97a5bb',
-               '#975792', '#ac79a8', '#cbaac8']
-color_scale = alt.Scale(domain=scen_acr_interv, range=colours_int)
-
-# New modal shares
-# Intervention 1
-# Calculate kilometers per mode for each persona in scenario 1
-dist_mode_list_interv_1 = []
-for i in range(no_scen):
-    dist_mode = interv_1_impact_result_list[i].copy()
-    dist_mode = dist_mode.astype(float)
-    dist_mode = dist_mode.div(dist_mode.sum(axis=1), axis=0)
-    dist_mode['PT'] = 0.8 * dist_mode['PT-MoD'] + 0.8 * dist_mode['PT-Bike'] + 0.8 * dist_mode['PT-Walk'] + \
-                      0.8 * dist_mode['PT-MM']
-    dist_mode['car_n'] = dist_mode['Car'] + 0.8 * dist_mode['Car-Walk']
-    dist_mode['MoD_n'] = dist_mode['MoD'] + 0.2 * dist_mode['PT-MoD'] + 0.8 * dist_mode['MoD-Walk'] + \
-                                                                          0.8 * dist_mode['MoD-MM']
-    dist_mode['MM_n'] = dist_mode['MM'] + 0.2 * dist_mode['PT-MM'] + 0.2 * dist_mode['MoD-MM']
-    dist_mode['Bike_n'] = dist_mode['Bike'] + 0.2 * dist_mode['PT-Bike']
-    dist_mode['Walk_n'] = dist_mode['Walk'] + 0.2 * dist_mode['PT-Walk'] + 0.2 * dist_mode['MoD-Walk'] + \
-                          0.2 * dist_mode['Car-Walk'] + 0.2 * dist_mode['MM-Walk']
-    dist_mode['Car'] = dist_mode['car_n']
-    dist_mode['MoD'] = dist_mode['MoD_n']
-    dist_mode['MM'] = dist_mode['MM_n']
-    dist_mode['Bike'] = dist_mode['Bike_n']
-    dist_mode['Walk'] = dist_mode['Walk_n']
-    dist_mode = dist_mode[['PT', 'Car', 'MoD', 'MM', 'Bike', 'Walk']]
-    dist_mode = dist_mode.mul(pers_chars['Distance (km)'], axis=0).round(1)
-    dist_mode_list_interv_1.append(dist_mode)
-# Transform the dataframe to long format
-for i in range(no_scen):
-    dist_mode_interv_1 = dist_mode_list_interv_1[i]
-    dist_mode_interv_1 = dist_mode_interv_1.stack().reset_index()
-    dist_mode_interv_1.columns = ['persona', 'Mode', 'km']
-
-# Intervention 2
-dist_mode_list_interv_2 = []
-for i in range(no_scen):
-    dist_mode = interv_2_impact_result_list[i].copy()
-    dist_mode = dist_mode.astype(float)
-    dist_mode = dist_mode.div(dist_mode.sum(axis=1), axis=0)
-    dist_mode['PT'] = 0.8 * dist_mode['PT-MoD'] + 0.8 * dist_mode['PT-Bike'] + 0.8 * dist_mode['PT-Walk'] + \
-                      0.8 * dist_mode['PT-MM']
-    dist_mode['car_n'] = dist_mode['Car'] + 0.8 * dist_mode['Car-Walk']
-    dist_mode['MoD_n'] = dist_mode['MoD'] + 0.2 * dist_mode['PT-MoD'] + 0.8 * dist_mode['MoD-Walk'] + \
-                                                                          0.8 * dist_mode['MoD-MM']
-    dist_mode['MM_n'] = dist_mode['MM'] + 0.2 * dist_mode['PT-MM'] + 0.2 * dist_mode['MoD-MM']
-    dist_mode['Bike_n'] = dist_mode['Bike'] + 0.2 * dist_mode['PT-Bike']
-    dist_mode['Walk_n'] = dist_mode['Walk'] + 0.2 * dist_mode['PT-Walk'] + 0.2 * dist_mode['MoD-Walk'] + \
-                          0.2 * dist_mode['Car-Walk'] + 0.2 * dist_mode['MM-Walk']
-    dist_mode['Car'] = dist_mode['car_n']
-    dist_mode['MoD'] = dist_mode['MoD_n']
-    dist_mode['MM'] = dist_mode['MM_n']
-    dist_mode['Bike'] = dist_mode['Bike_n']
-    dist_mode['Walk'] = dist_mode['Walk_n']
-    dist_mode = dist_mode[['PT', 'Car', 'MoD', 'MM', 'Bike', 'Walk']]
-    dist_mode = dist_mode.mul(pers_chars['Distance (km)'], axis=0).round(1)
-    dist_mode_list_interv_2.append(dist_mode)
-
-# Transform the dataframe to long format
-for i in range(no_scen):
-    dist_mode_interv_2 = dist_mode_list_interv_2[i]
-    dist_mode_interv_2 = dist_mode_interv_2.stack().reset_index()
-    dist_mode_interv_2.columns = ['persona', 'Mode', 'km']
-
-# New emissions
-# Intervention 1
-emis_ind_list_interv_1 = []
-for i in range(no_scen):
-    emis_ind = dist_mode_list_interv_1[i].copy()
-    for mod in mods:
-        emis_ind[mod] = emis_ind[mod] * emissions_energy[mod][0]/1000
-    emis_ind[scen_names[i]] = emis_ind.sum(axis=1)
-    emis_ind = emis_ind[[scen_names[i]]]
-    emis_ind_list_interv_1.append(emis_ind)
-    emis_ind_concat_interv_1 = pd.concat(emis_ind_list_interv_1, ignore_index=False, join='outer')
-    emis_ind_concat_interv_1 = emis_ind_concat_interv_1.groupby(level=0).sum()
-emis_ind_concat_interv_1 = emis_ind_concat_interv_1.stack().reset_index()
-emis_ind_concat_interv_1.columns = ['Persona', 'Scenario', 'CO2e']
-
-# Intervention 2
-emis_ind_list_interv_2 = []
-for i in range(no_scen):
-    emis_ind = dist_mode_list_interv_2[i].copy()
-    for mod in mods:
-        emis_ind[mod] = emis_ind[mod] * emissions_energy[mod][0]/1000
-    emis_ind[scen_names[i]] = emis_ind.sum(axis=1)
-    emis_ind = emis_ind[[scen_names[i]]]
-    emis_ind_list_interv_2.append(emis_ind)
-    emis_ind_concat_interv_2 = pd.concat(emis_ind_list_interv_2, ignore_index=False, join='outer')
-    emis_ind_concat_interv_2 = emis_ind_concat_interv_2.groupby(level=0).sum()
-emis_ind_concat_interv_2 = emis_ind_concat_interv_2.stack().reset_index()
-emis_ind_concat_interv_2.columns = ['Persona', 'Scenario', 'CO2e']
-
-# Dataframe preparation combining base and intervention scenarios
-emis_ind_concat['Scenario'] = emis_ind_concat['Scenario'].str[:2] + 'a'
-emis_ind_concat_interv_1['Scenario'] = emis_ind_concat_interv_1['Scenario'].str[:2] + f'b: {interv_acr_1}'
-emis_ind_concat_interv_2['Scenario'] = emis_ind_concat_interv_2['Scenario'].str[:2] + f'c: {interv_acr_2}'
-
-emis_ind_interv = pd.concat([emis_ind_concat, emis_ind_concat_interv_1, emis_ind_concat_interv_2])
-emis_ind_interv = emis_ind_interv.sort_values(by=['Persona','Scenario'])
-
-# New energy calculation
-# Intervention 1
-ener_ind_list_interv_1 = []
-for i in range(no_scen):
-    ener_ind = dist_mode_list_interv_1[i].copy()
-    for mod in mods:
-        ener_ind[mod] = ener_ind[mod] * emissions_energy[mod][1]
-    ener_ind[scen_names[i]] = ener_ind.sum(axis=1)
-    ener_ind = ener_ind[[scen_names[i]]]
-    ener_ind_list_interv_1.append(ener_ind)
-    ener_ind_concat_interv_1 = pd.concat(ener_ind_list_interv_1, ignore_index=False, join='outer')
-    ener_ind_concat_interv_1 = ener_ind_concat_interv_1.groupby(level=0).sum()
-ener_ind_concat_interv_1 = ener_ind_concat_interv_1.stack().reset_index()
-ener_ind_concat_interv_1.columns = ['Persona', 'Scenario', 'Energy']
-# Intervention 2
-ener_ind_list_interv_2 = []
-for i in range(no_scen):
-    ener_ind = dist_mode_list_interv_2[i].copy()
-    for mod in mods:
-        ener_ind[mod] = ener_ind[mod] * emissions_energy[mod][1]
-    ener_ind[scen_names[i]] = ener_ind.sum(axis=1)
-    ener_ind = ener_ind[[scen_names[i]]]
-    ener_ind_list_interv_2.append(ener_ind)
-    ener_ind_concat_interv_2 = pd.concat(ener_ind_list_interv_2, ignore_index=False, join='outer')
-    ener_ind_concat_interv_2 = ener_ind_concat_interv_2.groupby(level=0).sum()
-ener_ind_concat_interv_2 = ener_ind_concat_interv_2.stack().reset_index()
-ener_ind_concat_interv_2.columns = ['Persona', 'Scenario', 'Energy']
-
-# Dataframe preparation combining base and intervention scenarios
-ener_ind_concat['Scenario'] = ener_ind_concat['Scenario'].str[:2] + 'a'
-ener_ind_concat_interv_1['Scenario'] = ener_ind_concat_interv_1['Scenario'].str[:2] + f'b: {interv_acr_1}'
-ener_ind_concat_interv_2['Scenario'] = ener_ind_concat_interv_2['Scenario'].str[:2] + f'c: {interv_acr_2}'
-
-ener_ind_interv = pd.concat([ener_ind_concat, ener_ind_concat_interv_1, ener_ind_concat_interv_2])
-ener_ind_interv = ener_ind_interv.sort_values(by=['Persona','Scenario'])
-
-# New calories calculation
-# Intervention 1
-cal_ind_list_interv_1 = []
-for i in range(no_scen):
-    dist_mode_list_cal = dist_mode_list_interv_1[i].copy()
-    cal_ind = dist_mode_list_cal
-    cal_ind[scen_names[i]] = round((cal_ind['Bike'].multiply(pers_chars['Bodyweight (kg)'], axis=0) *
-                                    bike_calories_input) + (cal_ind['Walk'].multiply(pers_chars['Bodyweight (kg)'],
-                                                                                     axis=0) * walk_calories_input),0)
-    cal_ind = cal_ind[[scen_names[i]]]
-    cal_ind_list_interv_1.append(cal_ind)
-    cal_ind_concat_interv_1 = pd.concat(cal_ind_list_interv_1, ignore_index=False, join='outer')
-    cal_ind_concat_interv_1 = cal_ind_concat_interv_1.groupby(level=0).sum()
-cal_ind_concat_interv_1 = cal_ind_concat_interv_1.stack().reset_index()
-cal_ind_concat_interv_1.columns = ['Persona', 'Scenario', 'Calories']
-# Intervention 2
-cal_ind_list_interv_2 = []
-for i in range(no_scen):
-    dist_mode_list_cal = dist_mode_list_interv_2[i].copy()
-    cal_ind = dist_mode_list_cal
-    cal_ind[scen_names[i]] = round((cal_ind['Bike'].multiply(pers_chars['Bodyweight (kg)'], axis=0) *
-                                    bike_calories_input) + (cal_ind['Walk'].multiply(pers_chars['Bodyweight (kg)'],
-                                                                                     axis=0) * walk_calories_input),0)
-    cal_ind = cal_ind[[scen_names[i]]]
-    cal_ind_list_interv_2.append(cal_ind)
-    cal_ind_concat_interv_2 = pd.concat(cal_ind_list_interv_2, ignore_index=False, join='outer')
-    cal_ind_concat_interv_2 = cal_ind_concat_interv_2.groupby(level=0).sum()
-cal_ind_concat_interv_2 = cal_ind_concat_interv_2.stack().reset_index()
-cal_ind_concat_interv_2.columns = ['Persona', 'Scenario', 'Calories']
-
-# Dataframe preparation combining base and intervention scenarios
-cal_ind_concat['Scenario'] = cal_ind_concat['Scenario'].str[:2] + 'a'
-cal_ind_concat_interv_1['Scenario'] = cal_ind_concat_interv_1['Scenario'].str[:2] + f'b: {interv_acr_1}'
-cal_ind_concat_interv_2['Scenario'] = cal_ind_concat_interv_2['Scenario'].str[:2] + f'c: {interv_acr_2}'
-
-cal_ind_interv = pd.concat([cal_ind_concat, cal_ind_concat_interv_1, cal_ind_concat_interv_2])
-cal_ind_interv = cal_ind_interv.sort_values(by=['Persona','Scenario'])
-
-# New emissions with pop size
-# Intervention 1
-emis_group_list_interv_1 = []
-for i in range(no_scen):
-    emis_group = emis_ind_list_interv_1[i].copy()
-    emis_group = emis_group[0:no_pers]
-    # Divided by 100 for percentage of population, by 1000 for emissions in tons instead of kg
-    emis_group = (emis_group.multiply(pers_weights, axis=0)) * no_people / 100000
-    emis_group = emis_group[[scen_names[i]]]
-    emis_group_list_interv_1.append(emis_group)
-    emis_group_concat_interv_1 = pd.concat(emis_group_list_interv_1, ignore_index=False, join='outer')
-    emis_group_concat_interv_1 = emis_group_concat_interv_1.groupby(level=0).sum()
-emis_group_concat_interv_1 = emis_group_concat_interv_1.stack().reset_index()
-emis_group_concat_interv_1.columns = ['Persona', 'Scenario', 'CO2e']
-
-# Intervention 2
-emis_group_list_interv_2 = []
-for i in range(no_scen):
-    emis_group = emis_ind_list_interv_2[i].copy()
-    emis_group = emis_group[0:no_pers]
-    # Divided by 100 for percentage of population, by 1000 for emissions in tons instead of kg
-    emis_group = (emis_group.multiply(pers_weights, axis=0)) * no_people / 100000
-    emis_group = emis_group[[scen_names[i]]]
-    emis_group_list_interv_2.append(emis_group)
-    emis_group_concat_interv_2 = pd.concat(emis_group_list_interv_2, ignore_index=False, join='outer')
-    emis_group_concat_interv_2 = emis_group_concat_interv_2.groupby(level=0).sum()
-emis_group_concat_interv_2 = emis_group_concat_interv_2.stack().reset_index()
-emis_group_concat_interv_2.columns = ['Persona', 'Scenario', 'CO2e']
-
-# Dataframe preparation combining base and intervention scenarios
-emis_group_concat['Scenario'] = emis_group_concat['Scenario'].str[:2] + 'a'
-emis_group_concat_interv_1['Scenario'] = emis_group_concat_interv_1['Scenario'].str[:2] + f'b: {interv_acr_1}'
-emis_group_concat_interv_2['Scenario'] = emis_group_concat_interv_2['Scenario'].str[:2] + f'c: {interv_acr_2}'
-
-emis_group_interv = pd.concat([emis_group_concat, emis_group_concat_interv_1, emis_group_concat_interv_2])
-emis_group_interv = emis_group_interv.sort_values(by=['Persona','Scenario'])
-
-# New energy with pop size
-# Intervention 1
-ener_group_list_interv_1 = []
-for i in range(no_scen):
-    ener_group = ener_ind_list_interv_1[i].copy()
-    ener_group = ener_group[0:no_pers]
-    # Divided by 100 for percentage of population, by 1000 for energy in giga joule
-    ener_group = round((ener_group.multiply(pers_weights, axis=0)) * no_people / 100000)
-    ener_group = ener_group[[scen_names[i]]]
-    ener_group_list_interv_1.append(ener_group)
-    ener_group_concat_interv_1 = pd.concat(ener_group_list_interv_1, ignore_index=False, join='outer')
-    ener_group_concat_interv_1 = ener_group_concat_interv_1.groupby(level=0).sum()
-ener_group_concat_interv_1 = ener_group_concat_interv_1.stack().reset_index()
-ener_group_concat_interv_1.columns = ['Persona', 'Scenario', 'Energy']
-# Intervention 2
-ener_group_list_interv_2 = []
-for i in range(no_scen):
-    ener_group = ener_ind_list_interv_2[i].copy()
-    ener_group = ener_group[0:no_pers]
-    # Divided by 100 for percentage of population, by 1000 for energy in giga joule
-    ener_group = round((ener_group.multiply(pers_weights, axis=0)) * no_people / 100000)
-    ener_group = ener_group[[scen_names[i]]]
-    ener_group_list_interv_2.append(ener_group)
-    ener_group_concat_interv_2 = pd.concat(ener_group_list_interv_2, ignore_index=False, join='outer')
-    ener_group_concat_interv_2 = ener_group_concat_interv_2.groupby(level=0).sum()
-ener_group_concat_interv_2 = ener_group_concat_interv_2.stack().reset_index()
-ener_group_concat_interv_2.columns = ['Persona', 'Scenario', 'Energy']
-
-# Dataframe preparation combining base and intervention scenarios
-ener_group_concat['Scenario'] = ener_group_concat['Scenario'].str[:2] + 'a'
-ener_group_concat_interv_1['Scenario'] = ener_group_concat_interv_1['Scenario'].str[:2] + f'b: {interv_acr_1}'
-ener_group_concat_interv_2['Scenario'] = ener_group_concat_interv_2['Scenario'].str[:2] + f'c: {interv_acr_2}'
-
-ener_group_interv = pd.concat([ener_group_concat, ener_group_concat_interv_1, ener_group_concat_interv_2])
-ener_group_interv = ener_group_interv.sort_values(by=['Persona','Scenario'])
-
-# New calories with pop size
-# Intervention 1
-cal_group_list_interv_1 = []
-for i in range(no_scen):
-    cal_group = cal_ind_list_interv_1[i].copy()
-    cal_group = cal_group[0:no_pers]
-    # Divided by 100 for percentage of population and 1000 for pizza
-    cal_group = round((cal_group.multiply(pers_weights, axis=0)) * no_people / 100000)
-    cal_group = cal_group[[scen_names[i]]]
-    cal_group_list_interv_1.append(cal_group)
-    cal_group_concat_interv_1 = pd.concat(cal_group_list_interv_1, ignore_index=False, join='outer')
-    cal_group_concat_interv_1 = cal_group_concat_interv_1.groupby(level=0).sum()
-cal_group_concat_interv_1 = cal_group_concat_interv_1.stack().reset_index()
-cal_group_concat_interv_1.columns = ['Persona', 'Scenario', 'Calories']
-# Intervention 2
-cal_group_list_interv_2 = []
-for i in range(no_scen):
-    cal_group = cal_ind_list_interv_2[i].copy()
-    cal_group = cal_group[0:no_pers]
-    # Divided by 100 for percentage of population and 1000 for pizza
-    cal_group = round((cal_group.multiply(pers_weights, axis=0)) * no_people / 100000)
-    cal_group = cal_group[[scen_names[i]]]
-    cal_ind_list_interv_2.append(cal_group)
-    cal_group_concat_interv_2 = pd.concat(cal_ind_list_interv_2, ignore_index=False, join='outer')
-    cal_group_concat_interv_2 = cal_group_concat_interv_2.groupby(level=0).sum()
-cal_group_concat_interv_2 = cal_group_concat_interv_2.stack().reset_index()
-cal_group_concat_interv_2.columns = ['Persona', 'Scenario', 'Calories']
-
-# Dataframe preparation combining base and intervention scenarios
-cal_group_concat['Scenario'] = cal_group_concat['Scenario'].str[:2] + 'a'
-cal_group_concat_interv_1['Scenario'] = cal_group_concat_interv_1['Scenario'].str[:2] + f'b: {interv_acr_1}'
-cal_group_concat_interv_2['Scenario'] = cal_group_concat_interv_2['Scenario'].str[:2] + f'c: {interv_acr_2}'
-
-cal_group_interv = pd.concat([cal_group_concat, cal_group_concat_interv_1, cal_group_concat_interv_2])
-cal_group_interv = cal_group_interv.sort_values(by=['Persona','Scenario'])
-
-# Graphs
-st.header('Step 10a: Impacts per persona group with interventions')
-st.write('The following charts show for each persona and scenario the emissions, energy demand, and calories burned.'
-         f'Each time, the base scenario is compared to the interventions {interv_name_1} and {interv_name_2}.')
-st.subheader('CO2e emissions')
-# Chart for emissions comparison
-chart_emis_ind_interv = alt.Chart(emis_ind_interv).mark_bar().encode(
-    x=alt.X('Scenario', title='Scenario'),
-    y=alt.Y('CO2e', title='CO2e in kg per day'),
-    color=alt.Color('Scenario', scale=color_scale),
-    column='Persona'
-).properties(width=600 / no_pers)
-chart_emis_ind_interv
-
-st.subheader('Energy demand')
-# Chart for energy comparison
-chart_ener_ind_interv = alt.Chart(ener_ind_interv).mark_bar().encode(
-    x=alt.X('Scenario', title='Scenario'),
-    y=alt.Y('Energy', title='Energy demand in MJ per day'),
-    color=alt.Color('Scenario', scale=color_scale),
-    column='Persona'
-).properties(width=600 / no_pers)
-chart_ener_ind_interv
-
-st.subheader('Calories burned')
-# Chart for energy comparison
-chart_cal_ind_interv = alt.Chart(cal_ind_interv).mark_bar().encode(
-    x=alt.X('Scenario', title='Scenario'),
-    y=alt.Y('Calories', title='Calories burned per day'),
-    color=alt.Color('Scenario', scale=color_scale),
-    column='Persona'
-).properties(width=600 / no_pers)
-chart_cal_ind_interv
-
-st.header('Step 10b: Impacts considering population size and persona distribution with interventions')
-st.write('The following charts show for each scenario the emissions, energy demand, and calories burned. '
-         'Compared to the previous charts, the numbers are scaled by the population size and the persona weights. '
-         f'Each time, the base scenario is compared to the interventions {interv_name_1} and {interv_name_2}.')
-st.subheader('Emissions')
-# Chart for aggregated emissions comparison
-chart_emis_group_interv = alt.Chart(emis_group_interv).mark_bar().encode(
-    x=alt.X('Scenario', title='Scenario'),
-    y=alt.Y('CO2e', title='CO2e per group and scenario in tons (t)'),
-    color=alt.Color('Scenario', scale=color_scale),
-    column='Persona'
-).properties(width=600 / no_pers)
-chart_emis_group_interv
-
-st.subheader('Energy demand')
-# Chart for aggregated energy comparison
-chart_ener_group_interv = alt.Chart(ener_group_interv).mark_bar().encode(
-    x=alt.X('Scenario', title='Scenario'),
-    y=alt.Y('Energy', title='Energy demand per group and scenario in Gigajoule (MJ*1000)'),
-    color=alt.Color('Scenario', scale=color_scale),
-    column='Persona'
-).properties(width=600 / no_pers)
-chart_ener_group_interv
-
-st.subheader('Calories burned')
-# Chart for aggregated calories comparison
-chart_cal_group_interv = alt.Chart(cal_group_interv).mark_bar().encode(
-    x=alt.X('Scenario', title='Scenario'),
-    y=alt.Y('Calories', title='Pizzas burned per persona group (1 pizza = 1000 cal)'),
-    color=alt.Color('Scenario', scale=color_scale),
-    column='Persona'
-).properties(width=600 / no_pers)
-chart_cal_group_interv
-
-# Last step, written summary
-st.header('Step 10c: Analysis of results with interventions')
-# Emissions aggregation
-emis_aggr = emis_group_concat.groupby('Scenario').sum().copy()
-emis_aggr = ((emis_aggr.multiply(scen_likelihood_list, axis=0)) / 100).sum()
-# Intervention 1
-emis_aggr_interv_1 = emis_group_concat_interv_1.groupby('Scenario').sum().copy()
-emis_aggr_interv_1 = ((emis_aggr_interv_1.multiply(scen_likelihood_list, axis=0)) / 100).sum()
-emis_aggr = emis_aggr.append(emis_aggr_interv_1)
-# Intervention 2
-emis_aggr_interv_2 = emis_group_concat_interv_2.groupby('Scenario').sum().copy()
-emis_aggr_interv_2 = ((emis_aggr_interv_2.multiply(scen_likelihood_list, axis=0)) / 100).sum()
-emis_aggr = emis_aggr.append(emis_aggr_interv_2)
-
-# Energy aggregation
-ener_aggr = ener_group_concat.groupby('Scenario').sum().copy()
-ener_aggr = ((ener_aggr.multiply(scen_likelihood_list, axis=0)) / 100).sum()
-# Intervention 1
-ener_aggr_interv_1 = ener_group_concat_interv_1.groupby('Scenario').sum().copy()
-ener_aggr_interv_1 = ((ener_aggr_interv_1.multiply(scen_likelihood_list, axis=0)) / 100).sum()
-ener_aggr = ener_aggr.append(ener_aggr_interv_1)
-# Intervention 2
-ener_aggr_interv_2 = ener_group_concat_interv_2.groupby('Scenario').sum().copy()
-ener_aggr_interv_2 = ((ener_aggr_interv_2.multiply(scen_likelihood_list, axis=0)) / 100).sum()
-ener_aggr = ener_aggr.append(ener_aggr_interv_2)
-
-# Calories aggregation
-cal_aggr = cal_group_concat.groupby('Scenario').sum().copy()
-cal_aggr = ((cal_aggr.multiply(scen_likelihood_list, axis=0)) / 100).sum()
-# Intervention 1
-cal_aggr_interv_1 = cal_group_concat_interv_1.groupby('Scenario').sum().copy()
-cal_aggr_interv_1 = ((cal_aggr_interv_1.multiply(scen_likelihood_list, axis=0)) / 100).sum()
-cal_aggr = cal_aggr.append(cal_aggr_interv_1)
-# Intervention 2
-cal_aggr_interv_2 = cal_group_concat_interv_2.groupby('Scenario').sum().copy()
-cal_aggr_interv_2 = ((cal_aggr_interv_2.multiply(scen_likelihood_list, axis=0)) / 100).sum()
-cal_aggr = cal_aggr.append(cal_aggr_interv_2)
-
-st.write('Considering the likelihood of each scenario, we have an anticipated daily'
-         f' footprint of __{round((emis_aggr[0]))} tons CO2e__ without intervention, '
-         f'__{round(emis_aggr[1])} tons CO2e__ with the intervention __"{interv_name_1}"__ and '
-         f'__{round(emis_aggr[2])} tons CO2e__ with the intervention __"{interv_name_2}"__. '
-         f'Without any intervention, we have a daily energy demand of __{round(ener_aggr[0])}__ giga joule per day. '
-         f'With the intervention __"{interv_name_1}"__, the enery demand changes to __{round(ener_aggr[1])}__ giga joule per day '
-         f'and with __"{interv_name_2}"__ to __{round(ener_aggr[2])}__ giga joule per day. '
-         f'Currently, __{round(cal_aggr[0])}__ pizzas (1000 calories) are burned. After the intervention __"{interv_name_1}"__, __{round(cal_aggr[1])}__ '
-         f'are burned while __"{interv_name_2}"__ changes it to __{round(cal_aggr[2])}__.'
-         )
-
-st.write('Similar as before, we can zoom in on the detailed differences and impacts. This allows us to say, for example, '
-         f'which intervention has the highest impact for which scenario and by how much it can reduce the emissions. '
-         f'Lastly, we can use the graphs to analyse which personas are affected how to see if the interventions '
-         f'serve those which are targeted.')
+        scen_allocation_own.append(step_input(show['Step 7'], st.checkbox, f'allocation-own-{i + 1}', False,
+                                              f'Own allocation for {scen_names[i]}'))
+        if scen_allocation_own[i]:
+            scen_allocation.append(step_input(show['Step 7'], st.experimental_data_editor, f'mode-allocation{i + 1}',
+                                              mode_allocation, field='data'))
+        else:
+            scen_allocation.append(mode_allocation)
+    # Allocation matrix per scenario as shares, [scenario, mode, impact mode]
+    model_allocation = np.stack([allocation[engine.IMPACT_MODES].to_numpy(dtype=float)
+                                 for allocation in scen_allocation]) / 100
+    allocation_off = np.abs(model_allocation.sum(axis=-1) - 1) > 1e-6
+    if allocation_off.any():
+        invalid_inputs.append('the allocation of some modes does not add up to 100%')
+    if show['Step 7'] and allocation_off.any():
+        st.warning('The allocation does not add up to 100% for ' + ', '.join(
+            f'{engine.MODES[m]} ({scen_names[i]})' for i, m in zip(*np.nonzero(allocation_off))) + '.')
+
+
+# Inputs of the model, the results below are only computed when their step is shown
+# In batch mode, the results of invalid inputs are held back instead of being computed and charted
+held_back = batch_edits and bool(invalid_inputs)
+results_shown = {step: show[step] and not held_back for step in ['Step 8', 'Step 10']}
+profiler.section('Step 8')
+# The model runs per persona, with a catalog the results are aggregated to the persona groups afterwards
+if pers_catalog is None:
+    mode_pref_codes = np.stack(mode_pref_codes)
+    model_distance = pers_chars['Distance (km)'].to_numpy()
+    model_bodyweight = pers_chars['Bodyweight (kg)'].to_numpy()
+    model_weights = pers_weights
+    model_routes = pers_routes
+else:
+    mode_pref_codes = pers_catalog['pref']
+    model_distance = pers_catalog['distance']
+    model_bodyweight = pers_catalog['bodyweight']
+    model_weights = pers_catalog['weights']
+    model_routes = None
+impact_factors = emissions_energy[engine.IMPACT_MODES].to_numpy()
+
+# Wording of the written analysis per indicator (Steps 8c and 10c)
+narrative_words = {
+    'CO2e': {'quantity': 'emissions', 'noun': 'emitter', 'verb': 'emits', 'verb_plural': 'emit',
+             'unit_ind': 'kg CO2e', 'unit_group': 'tons CO2e', 'scen_high': 'highest emitting scenario',
+             'scen_low': 'most sustainable scenario'},
+    'Energy': {'quantity': 'energy demand', 'noun': 'energy user', 'verb': 'uses', 'verb_plural': 'use',
+               'unit_ind': 'MJ', 'unit_group': 'gigajoules', 'scen_high': 'scenario with the highest energy demand',
+               'scen_low': 'most efficient scenario'},
+    'Calories': {'quantity': 'calories burned', 'noun': 'calorie burner', 'verb': 'burns', 'verb_plural': 'burn',
+                 'unit_ind': 'calories', 'unit_group': 'pizzas', 'scen_high': 'most active scenario',
+                 'scen_low': 'least active scenario'},
+}
+if show['Step 8'] and held_back:
+    st.header('Step 8: Results')
+    st.warning('The results are held back until the inputs are valid: ' + '; '.join(invalid_inputs) + '.')
+if results_shown['Step 8']:
+    # Mode likelihoods
+    st.header('Step 8a: Impacts per persona group')
+    st.write('In this section, you see the distances by mode for each scenario and individual persona.')
+    st.subheader('Distribution of travel distances by mode and persona')
+    # Kilometers per mode for each persona and scenario, individual impacts and impacts scaled by population size and
+    # persona weight. With a catalog, the group totals are only rounded after summing the personas of a group
+    results_step8 = incremental_results('results-step-8', mode_pref_codes[np.newaxis], model_distance,
+                                        model_bodyweight, impact_factors, walk_calories_input, bike_calories_input,
+                                        model_weights, no_people, scen_likelihood_list, model_allocation,
+                                        model_routes, decimals=0 if pers_catalog is None else None)
+    dist_mode_all = results_step8['dist'][0]
+    impact_ind = {indicator: values[0] for indicator, values in results_step8['individual'].items()}
+    impact_group = {indicator: values[0] for indicator, values in results_step8['group'].items()}
+    if pers_catalog is not None:
+        dist_mode_all, impact_ind, impact_group = personas.aggregate(dist_mode_all, impact_ind, impact_group,
+                                                                     pers_catalog)
+
+    # Results of the base scenarios as one dataset, the charts below show slices of it
+    results_base = results_frame(dist_mode_all[np.newaxis], {k: v[np.newaxis] for k, v in impact_ind.items()},
+                                 {k: v[np.newaxis] for k, v in impact_group.items()}, [scen_names], scen_names, pers_name)
+
+    chart_scen = st.selectbox('Scenario', scen_names, key='chart-scenario')
+    with profiler.span('charts', 'Step 8a modal shares'):
+        st.altair_chart(charts.modal_share_chart(results_base, chart_scen), use_container_width=False)
+
+
+    st.header('CO2e, energy demand, and calories burned per individual persona')
+    st.write('In this section, you can see the impacts by scenario for each individual persona.')
+
+    chart_indicator_ind = st.selectbox('Indicator', engine.INDICATORS, key='chart-indicator-8a')
+    with profiler.span('charts', 'Step 8a impacts'):
+        st.altair_chart(charts.impact_chart(results_base, chart_indicator_ind, 'individual', scen_names,
+                                            charts.COLOURS[:no_scen]), use_container_width=False)
+
+    # Impacts considering population size and persona distribution
+    st.header('Step 8b: Impacts considering population size and persona distribution')
+    st.write('In this section, you can see the impacts by scenario for each persona. Compared to above, the values are '
+             f'multiplied by the set population size of {no_people} and the set weight for each persona.')
+    chart_indicator_group = st.selectbox('Indicator', engine.INDICATORS, key='chart-indicator-8b')
+    with profiler.span('charts', 'Step 8b impacts'):
+        st.altair_chart(charts.impact_chart(results_base, chart_indicator_group, 'group', scen_names,
+                                            charts.COLOURS[:no_scen]), use_container_width=False)
+
+    # Aggregated impacts considering scenario likelihood
+    st.header('Step 8c: Analysis of results')
+
+    if pers_catalog is None:
+        impact_aggr = {indicator: np.round(values[0]) for indicator, values in results_step8['totals'].items()}
+    else:
+        impact_aggr = scenario_totals(impact_group, scen_likelihood_list, decimals=0)
+    indic_aggr = [impact_aggr[indicator].sum() for indicator in engine.INDICATORS]
+
+    st.write('Building on the earlier established likelihood of each scenario, we can anticipate a daily '
+             f'footprint of __{round(indic_aggr[0])} tons CO2 equivalent__. This makes it about __{round(indic_aggr[0] * 0.365)} '
+             f'kilotons__ per year. Further, we assume an energy demand of __{round(indic_aggr[1])} gigajoules per day__ and '
+             f'about __{round(indic_aggr[1] * 0.365)} terajoules per year__. On the positive side, the commutes help to burn '
+             f'a total of __{round(indic_aggr[2])} pizzas (=1000 calories) per day__ or __{round(indic_aggr[2] * 365)} pizzas__ per year.')
+
+    # Extremes of all indicators, per scenario and per persona, from one reduction each
+    for indicator in engine.INDICATORS:
+        words = narrative_words[indicator]
+        scen_ext = summary.scenario_extremes(impact_aggr[indicator])
+        ind_ext = summary.extremes(impact_ind[indicator])
+        group_ext = summary.extremes(impact_group[indicator])
+
+        st.subheader(words['quantity'].capitalize())
+        st.write(('More interesting insights can be generated when we look at the differences between the scenarios. '
+                  if indicator == 'CO2e' else '') +
+                 f'The {words["scen_high"]} is __{scen_names[scen_ext["max_scenario"]]}__ with '
+                 f'__{int(scen_ext["max"])} {words["unit_group"]} per day__. This is '
+                 f'__{int(scen_ext["max"] - scen_ext["min"])} {words["unit_group"]}__ more than the {words["scen_low"]} '
+                 f'__{scen_names[scen_ext["min_scenario"]]}__ which only {words["verb"]} '
+                 f'__{int(scen_ext["min"])} {words["unit_group"]} per day__.')
+
+        for ext, unit, group_text in [(ind_ext, words['unit_ind'], False), (group_ext, words['unit_group'], True)]:
+            mean_max = ext['mean'][ext['mean_max']].round(1)
+            mean_min = ext['mean'][ext['mean_min']].round(1)
+            high, high_low = ext['max'].round(1), ext['max_low'].round(1)
+            low, low_high = ext['min'].round(2), ext['min_high'].round(2)
+            if not group_text:
+                st.write(f'The highest {words["noun"]} (average across scenarios) is __{pers_name[ext["mean_max"]]}__ with '
+                         f'__{mean_max} {unit} per day__ compared to __{pers_name[ext["mean_min"]]}__ who only '
+                         f'{words["verb"]} __{mean_min} {unit} per day__. When zooming in on the scenarios, the '
+                         f'differences become even stronger. For example, __{pers_name[ext["max_persona"]]}__ has the '
+                         f'highest overall {words["quantity"]} for the scenario __{scen_names[ext["max_scenario"]]}__ '
+                         f'with __{high} {unit}__, __{summary.ratio(high, high_low).round(1)} times__ more than the same '
+                         f'persona for scenario __{scen_names[ext["max_low_scenario"]]}__. On the other extreme, '
+                         f'__{pers_name[ext["min_persona"]]}__ {words["verb"]} only between '
+                         f' __{low} and {low_high} {unit} per day__.')
+            else:
+                st.write(f'Finally, we can look at the {words["quantity"]} taking into consideration the population size '
+                         f'and persona occurrence. The highest {words["noun"]} in this case (average across scenarios) is '
+                         f'all __{pers_name[ext["mean_max"]]}s__ with __{mean_max} {unit} per day__ compared to all '
+                         f'__{pers_name[ext["mean_min"]]}s__ who only {words["verb_plural"]} __{mean_min} {unit} per '
+                         f'day__. When zooming in on the scenarios, the differences become even stronger. For example, '
+                         f'all __{pers_name[ext["max_persona"]]}s__ have the highest overall {words["quantity"]} for the '
+                         f'scenario __{scen_names[ext["max_scenario"]]}__ with __{high} {unit}__, '
+                         f'__{summary.ratio(high, high_low).round(1)} times__ more than the same persona for scenario '
+                         f'__{scen_names[ext["max_low_scenario"]]}__. On the other extreme, all '
+                         f'__{pers_name[ext["min_persona"]]}s__ {words["verb_plural"]} only between '
+                         f' __{low} and {low_high} {unit} per day__.')
+
+    # Optional global sensitivity analysis of the likelihood-weighted totals
+    st.write('Which of the inputs drive these results? The sensitivity analysis varies the emission and energy factors, '
+             'the calories burned, the 80/20 split of multimodal trips, the persona distances and weights and the scenario '
+             'likelihoods within a range around the values set above and ranks them by their influence on the daily total.')
+    if st.checkbox('Run sensitivity analysis', value=False, key='sensitivity'):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sens_method = st.selectbox('Method', ['Morris', 'Sobol'], key='sensitivity-method')
+        with col2:
+            sens_indicator = st.selectbox('Indicator', engine.INDICATORS, key='sensitivity-indicator')
+        with col3:
+            sens_spread = st.slider('Range of inputs (+/- %)', 5, 100, round(sensitivity.SPREAD * 100),
+                                    key='sensitivity-spread')
+        sens_result = sensitivity_indices(mode_pref_codes, model_distance, model_bodyweight, impact_factors,
+                                          walk_calories_input, bike_calories_input, model_weights, no_people,
+                                          scen_likelihood_list, pers_name, scen_names,
+                                          None if pers_catalog is None else pers_catalog['codes'], model_allocation,
+                                          sens_spread / 100, sens_method, sens_indicator, model_routes)
+        if sens_method == 'Morris':
+            sens_measure, sens_title = 'mu_star', 'Mean absolute elementary effect (mu*)'
+        else:
+            sens_measure, sens_title = 'ST', 'Total Sobol index'
+        chart_sens = alt.Chart(sens_result.reset_index()).mark_bar(color='#193f5a').encode(
+            x=alt.X(sens_measure, title=sens_title),
+            y=alt.Y('Input', sort='-x', title=None),
+        ).properties(width=600)
+        with profiler.span('charts', 'Step 8c sensitivity'):
+            st.altair_chart(chart_sens, use_container_width=False)
+        st.dataframe(sens_result.sort_values(sens_measure, ascending=False).round(3))
 
-# Sidebar
-# Set the title and description
-st.sidebar.title("Info Sidebar")
-st.sidebar.write("You can use this sidebar to show key info during the process. Everything is also included in the "
-                 "main text on the right. The width of the sidebar can changed by dragging its border.")
+# Defining potential interventions
+profiler.section('Step 9')
+with batch_form('Step 9', batch_edits and show['Step 9']):
+    if show['Step 9']:
+        st.header('Step 9a: Defining potential interventions')
+        st.write('You can use this tool to compare the impact of several interventions. For inspiration, have a look at our '
+                 '<a href="https://urban-mobility-futures.notion.site/3b4cb3e4fccd48a38cda6149a0d6ffa1?v=8ce1115a24e7436f8c31bdd58a3c74ef">Urban Mobility Solution Database.</a>', unsafe_allow_html=True)
+
+    # Number of interventions
+    no_interv = step_input(show['Step 9'], st.slider, 'no-interventions', 2,
+                           'How many interventions do you want to compare?', *snapshot.COUNTS['interventions'])
+
+    interv_names = []
+    interv_acrs = []
+    interv_descs = []
+    for k in range(no_interv):
+        default_name, default_acr, default_desc = defaults.texts(defaults.INTERVENTIONS, k, f'Intervention {k + 1}',
+                                                                 f'I{k + 1}')
+        interv_names.append(step_input(show['Step 9'], st.text_input, f'intervention-name-{k + 1}', default_name,
+                                       f'Intervention {k + 1}:'))
+        interv_acrs.append(step_input(show['Step 9'], st.text_input, f'intervention-acronym-{k + 1}', default_acr,
+                                      f'Intervention {k + 1} acronym:', max_chars=5))
+        interv_descs.append(step_input(show['Step 9'], st.text_area, f'intervention-description-{k + 1}', default_desc,
+                                       f'Intervention {k + 1} description (max. 250 characters):', max_chars=250))
+
+
+    if show['Step 9']:
+        # Estimating impact of interventions
+        st.header('Step 9b: Estimating impact of interventions')
+        st.write('Set the assumed impact the interventions might have across scenarios and personas. The values go from -2 to +2.'
+                 ' -2 means that after the intervention, a certain mode is much less likely. 0 means nothing changes. +2'
+                 ' means that the likelihood to use a certain mode increases strongly. The acronyms stand for: MoD: Mobility '
+                 'on Demand, MM: Micromobility, PT: Public Transport.')
+
+    # Default impact codes [intervention, scenario, persona, mode], further interventions start without any change
+    interv_impact_prep = defaults.pad(defaults.IMPACTS, (no_interv, no_scen, no_pers, len(engine.MODES)))
+
+    # Set df to be used below
+    interv_impact_list = []
+
+    #### START WORKING AREA
+
+    # st.write('Two methods are available to evaluate the impact of interventions across scenarios and personas. The checkbox '
+    #          'below allows you to switch on the simplified mode.')
+    # # Create the button
+    button_state = False
+    # button_state = st.checkbox('Simplified method')
+    #
+
+    if button_state == False:
+        # Codes of all intervention impacts, [intervention, scenario, persona, mode]
+        interv_impact_codes = np.zeros_like(interv_impact_prep)
+        for k in range(no_interv):
+            if show['Step 9']:
+                st.subheader(f'Impact of intervention {k + 1}: {interv_names[k]}')
+            interv_impact_scen = []
+            for i in range(no_scen):
+                # Create editabe dataframe for the impact of the intervention on each persona and mode
+                interv_impact_temp = ordinal.IMPACT.table(interv_impact_prep[k, i], pers_name, engine.MODES)
+                if show['Step 9']:
+                    st.write('Define the estimated impact for scenario ' + scen_names[i])
+                interv_impact_temp = step_input(show['Step 9'], st.experimental_data_editor,
+                                                f'interv_{k + 1}_impact{i + 1}', interv_impact_temp, field='data')
+                interv_impact_scen.append(interv_impact_temp)
+                interv_impact_codes[k, i] = ordinal.IMPACT.codes(interv_impact_temp, engine.MODES)
+            interv_impact_list.append(interv_impact_scen)
 
+    else:
+        st.write("<span style='color:red'>Not finalised yet. Please change back to the extended one.</span>", unsafe_allow_html=True)
+        st.subheader(f'Impact of intervention 1: {interv_names[0]}')
+        # Create an empty DataFrame to store the results
+        results_dict = {}
+        for i in range(no_scen):
+            st.subheader(scen_names[i])
+            for p in range(no_pers):
+                st.write(f"__Estimate the impact of {interv_names[0]} on {pers_name[p]}__")
+                # Create a slider with range -2 to 2 and default value 0
+                slider_value = st.slider(f"Choose between more individual car use and micromobility on the left (-2) and "
+                                         f"more active modes and public transport on the right (+2)",
+                                         -2, 2, 0, key=f"{i}-{p}")
+
+                # Store the result in the dictionary
+                results_dict[f"({i}, {p})"] = slider_value
+
+        # Display the results
+        st.write(results_dict)
+        st.write(mode_pref_list)
+
+    ##### END WORKING AREA
+
+profiler.section('Step 10')
+if show['Step 10'] and held_back:
+    st.header('Step 10: Results with interventions')
+    st.warning('The results are held back until the inputs are valid: ' + '; '.join(invalid_inputs) + '.')
+if results_shown['Step 10']:
+    # Apply all interventions to all scenarios, personas and modes at once
+    # With a catalog, the impacts are set per persona group and apply to all personas of the group
+    model_impact_codes = (interv_impact_codes if pers_catalog is None
+                          else interv_impact_codes[..., pers_catalog['codes'], :])
+    interv_impact_result = apply_intervention(mode_pref_codes, model_impact_codes)
+
+    # Preparation for charts
+    scen_acr = ['S1', 'S2', 'S3', 'S4', 'S5', 'S6', 'S7', 'S8']
+    scen_acr_temp = scen_acr[:no_scen]
+    # Suffix a for the base scenario, b, c, ... for the interventions
+    scen_acr_variants = [[f'{s}a' for s in scen_acr_temp]]
+    for k in range(no_interv):
+        scen_acr_variants.append([f'{s}{chr(ord("b") + k)}: {interv_acrs[k]}' for s in scen_acr_temp])
+    scen_acr_interv = sorted(label for variant in scen_acr_variants for label in variant)
+
+    # Colours + color scale for chart
+    colours_int = charts.shades(charts.COLOURS[:no_scen], no_interv + 1)
+    color_scale = alt.Scale(domain=scen_acr_interv, range=colours_int)
+
+    # New modal shares and impacts for the base scenarios (a) and all interventions (b, c, ...), evaluated together
+    mode_pref_interv = np.concatenate([mode_pref_codes[np.newaxis], interv_impact_result])
+    # Only the interventions, scenarios and personas changed since the last run are recomputed
+    results_step10 = incremental_results('results-step-10', mode_pref_interv, model_distance, model_bodyweight,
+                                         impact_factors, walk_calories_input, bike_calories_input, model_weights,
+                                         no_people, scen_likelihood_list, model_allocation, model_routes,
+                                         decimals=0 if pers_catalog is None else None)
+    dist_mode_interv = results_step10['dist']
+    impact_ind_interv = results_step10['individual']
+    impact_group_interv = results_step10['group']
+    if pers_catalog is not None:
+        dist_mode_interv, impact_ind_interv, impact_group_interv = personas.aggregate(
+            dist_mode_interv, impact_ind_interv, impact_group_interv, pers_catalog)
+
+    # Results of the base scenarios and all interventions as one dataset for the charts
+    results_interv = results_frame(dist_mode_interv, impact_ind_interv, impact_group_interv, scen_acr_variants,
+                                   scen_names, pers_name)
+
+    # Graphs
+    st.header('Step 10a: Impacts per persona group with interventions')
+    st.write('The following chart shows for each persona and scenario the emissions, energy demand, or calories burned. '
+             f'Each time, the base scenario is compared to the interventions {", ".join(interv_names)}.')
+    chart_indicator_ind_interv = st.selectbox('Indicator', engine.INDICATORS, key='chart-indicator-10a')
+    with profiler.span('charts', 'Step 10a impacts'):
+        st.altair_chart(charts.impact_chart(results_interv, chart_indicator_ind_interv, 'individual', scen_acr_interv,
+                                            colours_int, width=600 / no_pers, labels=True), use_container_width=False)
+
+    st.header('Step 10b: Impacts considering population size and persona distribution with interventions')
+    st.write('The following chart shows for each scenario the emissions, energy demand, or calories burned. '
+             'Compared to the previous chart, the numbers are scaled by the population size and the persona weights. '
+             f'Each time, the base scenario is compared to the interventions {", ".join(interv_names)}.')
+    chart_indicator_group_interv = st.selectbox('Indicator', engine.INDICATORS, key='chart-indicator-10b')
+    with profiler.span('charts', 'Step 10b impacts'):
+        st.altair_chart(charts.impact_chart(results_interv, chart_indicator_group_interv, 'group', scen_acr_interv,
+                                            colours_int, width=600 / no_pers, labels=True), use_container_width=False)
+
+    # Last step, written summary
+    st.header('Step 10c: Analysis of results with interventions')
+    # Likelihood-weighted totals for the base scenarios and all interventions
+    aggr_interv = (results_step10['totals'] if pers_catalog is None
+                   else scenario_totals(impact_group_interv, scen_likelihood_list))
+    emis_aggr = aggr_interv['CO2e'].sum(axis=-1)
+    ener_aggr = aggr_interv['Energy'].sum(axis=-1)
+    cal_aggr = aggr_interv['Calories'].sum(axis=-1)
+
+    emis_aggr_text = ', '.join(f'__{round(emis_aggr[k + 1])} tons CO2e__ with the intervention __"{interv_names[k]}"__'
+                               for k in range(no_interv))
+    ener_aggr_text = ', '.join(f'__{round(ener_aggr[k + 1])}__ giga joule per day with __"{interv_names[k]}"__'
+                               for k in range(no_interv))
+    cal_aggr_text = ', '.join(f'__{round(cal_aggr[k + 1])}__ with __"{interv_names[k]}"__' for k in range(no_interv))
+    st.write('Considering the likelihood of each scenario, we have an anticipated daily'
+             f' footprint of __{round((emis_aggr[0]))} tons CO2e__ without intervention, compared to {emis_aggr_text}. '
+             f'Without any intervention, we have a daily energy demand of __{round(ener_aggr[0])}__ giga joule per day. '
+             f'With the interventions, the energy demand changes to {ener_aggr_text}. '
+             f'Currently, __{round(cal_aggr[0])}__ pizzas (1000 calories) are burned. With the interventions, this changes to '
+             f'{cal_aggr_text}.'
+             )
+
+    st.write('Similar as before, we can zoom in on the detailed differences and impacts. This allows us to say, for example, '
+             f'which intervention has the highest impact for which scenario and by how much it can reduce the emissions. '
+             f'Lastly, we can use the graphs to analyse which personas are affected how to see if the interventions '
+             f'serve those which are targeted.')
+
+    # Largest change per intervention, all interventions and indicators summarised at once
+    change_interv = {indicator: summary.extremes(impact_group_interv[indicator][1:] - impact_group_interv[indicator][0])
+                     for indicator in engine.INDICATORS}
+    for k in range(no_interv):
+        change_text = []
+        for indicator in engine.INDICATORS:
+            words, change = narrative_words[indicator], change_interv[indicator]
+            if change['min'][k] < 0:
+                change_text.append(f'the largest reduction of {words["quantity"]} is for all '
+                                   f'__{pers_name[change["min_persona"][k]]}s__ in scenario '
+                                   f'__{scen_names[change["min_scenario"][k]]}__ with '
+                                   f'__{-change["min"][k].round(1)} {words["unit_group"]} per day__')
+            elif change['max'][k] > 0:
+                change_text.append(f'there is no reduction of {words["quantity"]}, the largest increase is for all '
+                                   f'__{pers_name[change["max_persona"][k]]}s__ in scenario '
+                                   f'__{scen_names[change["max_scenario"][k]]}__ with '
+                                   f'__{change["max"][k].round(1)} {words["unit_group"]} per day__')
+            else:
+                change_text.append(f'there is no change of {words["quantity"]}')
+        st.write(f'With the intervention __"{interv_names[k]}"__, ' + '; '.join(change_text) + '.')
+
+    # Optional view of the inputs and totals changed since the last evaluation
+    if st.checkbox('Show what changed since the last evaluation', value=False, key='what-changed'):
+        # With a catalog, the personas of the catalog are evaluated rather than their groups
+        changed_inputs = incremental.summary(results_step10, ['No intervention'] + interv_names, scen_names,
+                                             pers_name if pers_catalog is None else pers_catalog['names'])
+        if changed_inputs is None:
+            st.write('There is no earlier evaluation of the same scenarios and personas to compare with.')
+        else:
+            st.write('Since the last evaluation, ' + ('; '.join(changed_inputs) or 'nothing') + ' changed. The '
+                     'table lists the likelihood-weighted totals which changed, per scenario and as expected total.')
+            st.dataframe(incremental.delta(results_step10, ['No intervention'] + interv_names, scen_names).round(1))
+
+    # Optional Monte Carlo analysis of the input uncertainty
+    st.header('Step 10d: Uncertainty of results')
+    st.write('All values above are point estimates. The Monte Carlo analysis repeats the calculation many times with '
+             'randomly varied inputs: preferences and intervention impacts move by one step with the given probability, '
+             'distances, bodyweights and emission/energy factors vary within the given ranges. The result is a band of '
+             'likely outcomes (5th to 95th percentile) around the median.')
+    mc_total = None
+    if st.checkbox('Run Monte Carlo analysis', value=False, key='monte-carlo'):
+        col1, col2 = st.columns(2)
+        with col1:
+            mc_samples = st.select_slider('Number of samples', options=[1000, 10000, 50000, 100000, 200000], value=10000)
+            mc_seed = st.number_input('Random seed', min_value=0, value=0, step=1)
+            mc_preference = st.slider('Probability that a preference changes by one step', 0.0, 1.0,
+                                      montecarlo.UNCERTAINTY['preference'])
+            mc_impact = st.slider('Probability that an intervention impact changes by one step', 0.0, 1.0,
+                                  montecarlo.UNCERTAINTY['impact'])
+        with col2:
+            mc_distance = st.slider('Range of distances (+/- %)', 0, 100, round(montecarlo.UNCERTAINTY['distance'] * 100))
+            mc_bodyweight = st.slider('Range of bodyweights (+/- %)', 0, 100,
+                                      round(montecarlo.UNCERTAINTY['bodyweight'] * 100))
+            mc_factors = st.slider('Range of emission and energy factors (+/- %)', 0, 100,
+                                   round(montecarlo.UNCERTAINTY['factors'] * 100))
+        mc_uncertainty = {'preference': mc_preference, 'impact': mc_impact, 'distance': mc_distance / 100,
+                          'bodyweight': mc_bodyweight / 100, 'factors': mc_factors / 100}
+        mc_result = simulate(mode_pref_codes, model_impact_codes, model_distance, model_bodyweight, impact_factors,
+                             walk_calories_input, bike_calories_input, model_weights, no_people, scen_likelihood_list,
+                             model_allocation, mc_samples, mc_uncertainty, mc_seed, model_routes)
+
+        # Likelihood-weighted totals per variant with their percentile bands
+        mc_variants = ['No intervention'] + interv_names
+        mc_total = pd.concat([pd.DataFrame({
+            'Intervention': mc_variants,
+            'Indicator': indicator,
+            'Low': mc_result['total'][indicator][0],
+            'Median': mc_result['total'][indicator][1],
+            'High': mc_result['total'][indicator][2],
+        }) for indicator in engine.INDICATORS], ignore_index=True)
+        mc_indicator = st.selectbox('Indicator', engine.INDICATORS, key='monte-carlo-indicator')
+        mc_total_indicator = mc_total[mc_total['Indicator'] == mc_indicator]
+        chart_mc_band = alt.Chart(mc_total_indicator).mark_rule(size=3).encode(
+            x=alt.X('Intervention', sort=mc_variants),
+            y=alt.Y('Low', title=f'Daily {mc_indicator} of the population (5th-95th percentile)'),
+            y2='High',
+        )
+        chart_mc_median = alt.Chart(mc_total_indicator).mark_point(filled=True, size=80, color='#193f5a').encode(
+            x=alt.X('Intervention', sort=mc_variants),
+            y='Median',
+        )
+        with profiler.span('charts', 'Step 10d uncertainty'):
+            st.altair_chart((chart_mc_band + chart_mc_median).properties(width=600), use_container_width=False)
+        st.dataframe(mc_total.round(1))
+
+    # Optional synthetic population of individual travellers
+    if pop_mode:
+        st.header('Step 10e: Impacts across individual travellers')
+        st.write(f'The synthetic population consists of {int(no_people)} travellers. Each of them belongs to a persona, '
+                 f'travels a distance and has a bodyweight that vary around the persona values, and chooses one mode per '
+                 f'day according to the likelihoods of the persona. The same travellers are used for all scenarios and '
+                 f'interventions.')
+        pop_seed = st.number_input('Random seed of the population', min_value=0, value=0, step=1)
+        pop_key = (tuple(np.asarray(model_weights, dtype=float)), tuple(np.asarray(model_distance, dtype=float)),
+                   tuple(np.asarray(model_bodyweight, dtype=float)), int(no_people), int(pop_seed))
+        pop = synthetic_population(*pop_key)
+        pop_result = population_impacts(pop_key, pop, mode_pref_interv, impact_factors, walk_calories_input,
+                                        bike_calories_input, scen_likelihood_list, model_allocation, model_routes)
+
+        # Totals of the travellers next to the persona-based totals of Step 10c
+        pop_variants = ['No intervention'] + interv_names
+        pop_totals = pd.DataFrame({
+            'Intervention': pop_variants,
+            'CO2e personas (t)': emis_aggr,
+            'CO2e travellers (t)': pop_result['CO2e']['aggregate'],
+            'Energy personas (GJ)': ener_aggr,
+            'Energy travellers (GJ)': pop_result['Energy']['aggregate'],
+            'Calories personas (pizzas)': cal_aggr,
+            'Calories travellers (pizzas)': pop_result['Calories']['aggregate'],
+        }).set_index('Intervention')
+        st.dataframe(pop_totals.round(1))
+
+        # Spread of the individual daily impacts per scenario and intervention
+        pop_indicator = st.selectbox('Indicator', engine.INDICATORS, key='synthetic-population-indicator')
+        pop_units = {'CO2e': 'kg CO2e', 'Energy': 'MJ', 'Calories': 'calories'}
+        pop_bands = pop_result[pop_indicator]['percentiles']
+        pop_spread = pd.DataFrame({
+            'Scenario': [label for variant in scen_acr_variants for label in variant],
+            'P5': pop_bands[0].reshape(-1),
+            'P25': pop_bands[1].reshape(-1),
+            'Median': pop_bands[2].reshape(-1),
+            'P75': pop_bands[3].reshape(-1),
+            'P95': pop_bands[4].reshape(-1),
+        })
+        chart_pop_whisker = alt.Chart(pop_spread).mark_rule().encode(
+            x=alt.X('Scenario', sort=scen_acr_interv),
+            y=alt.Y('P5', title=f'Daily {pop_units[pop_indicator]} per traveller (5th to 95th percentile)'),
+            y2='P95',
+            color=alt.Color('Scenario', scale=color_scale, legend=None),
+        )
+        chart_pop_box = alt.Chart(pop_spread).mark_bar(size=14).encode(
+            x=alt.X('Scenario', sort=scen_acr_interv),
+            y='P25',
+            y2='P75',
+            color=alt.Color('Scenario', scale=color_scale, legend=None),
+        )
+        chart_pop_median = alt.Chart(pop_spread).mark_tick(color='white', size=14).encode(
+            x=alt.X('Scenario', sort=scen_acr_interv),
+            y='Median',
+        )
+        with profiler.span('charts', 'Step 10e travellers'):
+            st.altair_chart((chart_pop_whisker + chart_pop_box + chart_pop_median).properties(width=600),
+                            use_container_width=False)
+        st.write(f'The population arrays take {population.nbytes(pop) / 1e6:.1f} MB of memory.')
+
+    # Optional search for the best combination of interventions
+    st.header('Step 10f: Portfolio of interventions')
+    st.write('The search combines the interventions of Step 9 (fully or partly rolled out) and finds the portfolios '
+             'with the lowest likelihood-weighted daily impact within a budget. Portfolios in which any persona is worse '
+             'off in one of the protected indicators, e.g. burns fewer calories in any scenario, are left out.')
+    if st.checkbox('Search intervention portfolios', value=False, key='portfolio'):
+        col1, col2 = st.columns(2)
+        with col1:
+            port_indicator = st.selectbox('Indicator to improve', engine.INDICATORS, key='portfolio-indicator')
+            port_protect = st.multiselect('No persona may be worse off in', engine.INDICATORS, default=['Calories'],
+                                          key='portfolio-protect')
+            port_levels = st.selectbox('Rollout of an intervention', list(PORTFOLIO_LEVELS), key='portfolio-levels')
+        with col2:
+            port_budget = st.number_input('Budget (0 = no limit)', min_value=0.0, value=0.0, key='portfolio-budget')
+            port_size = st.slider('Maximum number of combined interventions', 1, max(no_interv, 2), no_interv,
+                                  key='portfolio-size')
+        st.write('Costs of the interventions, in the unit of the budget:')
+        port_costs = st.experimental_data_editor(pd.DataFrame({'Cost': np.zeros(no_interv)}, index=interv_names),
+                                                 key='portfolio-costs')
+        port_result = portfolio_search(mode_pref_codes, model_impact_codes, model_distance, model_bodyweight,
+                                       impact_factors, walk_calories_input, bike_calories_input, model_weights,
+                                       no_people, scen_likelihood_list, model_allocation,
+                                       np.maximum(port_costs['Cost'].fillna(0).to_numpy(dtype=float), 0),
+                                       interv_names, port_indicator, port_budget or np.inf,
+                                       PORTFOLIO_LEVELS[port_levels], port_size, port_protect, model_routes)
+
+        port_best = port_result['portfolios']
+        st.write(f'{port_result["evaluated"]} portfolios were evaluated, {port_result["pruned"]} were over the budget '
+                 f'and {port_result["unfair"]} left out because a persona would be worse off.' +
+                 ('' if port_result['complete'] else ' The search stopped early, reduce the number of combined '
+                                                     'interventions or the rollout steps to search all portfolios.'))
+        port_used = [f'__{name}__ ({port_best.iloc[0, k]:.0%})' for k, name in enumerate(interv_names)
+                     if port_best.iloc[0, k] > 0]
+        if port_used:
+            st.write(f'The best portfolio combines {", ".join(port_used)} at a cost of '
+                     f'__{port_best["Cost"].iloc[0]:g}__ and changes the daily {port_indicator} by '
+                     f'__{port_best[f"{port_indicator} change (%)"].iloc[0]:.1f}%__.')
+        else:
+            st.write(f'No combination of the interventions improves the daily {port_indicator} within the budget and '
+                     f'the protected indicators.')
+        port_table = port_best.copy()
+        port_table.iloc[:, :no_interv] *= 100
+        st.dataframe(port_table.round(1))
+
+    # Optional yearly trajectory of the impacts
+    st.header('Step 10g: Trajectory of the impacts')
+    st.write('The results above are a snapshot of one year. The trajectory lets the population size, the emission and '
+             'energy factors and the likelihoods to use each mode change over the years: they are set at a few anchor '
+             'years, relative to the values above, and interpolated for the years in between. The impacts are added up '
+             'per year and over the years.')
+    traj_table = None
+    if st.checkbox('Show a trajectory over the years', value=False, key='trajectory'):
+        col1, col2 = st.columns(2)
+        with col1:
+            traj_first, traj_last = st.slider('Years', 2020, 2070, trajectory.YEARS, key='trajectory-years')
+        with col2:
+            traj_count = st.number_input('Number of anchor years', min_value=1, max_value=len(TRAJECTORY_ANCHORS),
+                                         value=3, key='trajectory-anchor-count')
+        st.write('Population size and emission and energy factors at each anchor year, in percent of the values of '
+                 'Steps 4 and 7:')
+        traj_anchors = st.experimental_data_editor(pd.DataFrame(dict(
+            {'Year': TRAJECTORY_ANCHORS[:traj_count], 'Population (%)': 100.0},
+            **{f'{factor} {mode} (%)': 100.0 for factor in engine.FACTORS for mode in engine.IMPACT_MODES})),
+            key=f'trajectory-anchors-{traj_count}')
+        traj_anchor_years = traj_anchors['Year'].to_numpy(dtype=float)
+        traj_percent = traj_anchors.iloc[:, 1:].fillna(100).to_numpy(dtype=float) / 100
+
+        # Change of the likelihoods at each anchor year, per scenario and mode for all personas of the scenario
+        st.write('Change of the likelihood to use each mode at each anchor year, compared to Step 6, for all personas '
+                 'of a scenario:')
+        traj_shift = []
+        for j, year in enumerate(traj_anchor_years):
+            st.write(f'__{year:.0f}__' if np.isfinite(year) else f'__Anchor year {j + 1}__')
+            traj_shift_table = st.experimental_data_editor(
+                ordinal.IMPACT.table(np.zeros((no_scen, len(engine.MODES))), scen_names, engine.MODES),
+                key=f'trajectory-preferences-{j + 1}')
+            traj_shift.append(ordinal.IMPACT.codes(traj_shift_table, engine.MODES))
+
+        # Preference codes of the base scenarios and all interventions at each anchor year, as
+        # [variant, anchor, scenario, persona, mode]
+        traj_pref = apply_intervention(mode_pref_codes, np.stack(traj_shift)[:, :, np.newaxis, :])
+        traj_pref_interv = np.concatenate([traj_pref[np.newaxis],
+                                           apply_intervention(traj_pref, model_impact_codes[:, np.newaxis])])
+        traj_years = np.arange(traj_first, traj_last + 1)
+        try:
+            traj_annual = trajectory_totals(traj_pref_interv, traj_anchor_years, traj_years, model_distance,
+                                            model_bodyweight, impact_factors * traj_percent[:, 1:].reshape(-1, 2, 6),
+                                            walk_calories_input, bike_calories_input, model_weights,
+                                            no_people * traj_percent[:, 0], model_allocation, model_routes)
+        except ValueError as error:
+            st.error(f'Error: {error}')
+        else:
+            traj_variants = ['No intervention'] + interv_names
+            traj_table = trajectory.frame(traj_annual, scen_likelihood_list, traj_years, traj_variants, scen_names)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                traj_indicator = st.selectbox('Indicator', engine.INDICATORS, key='trajectory-indicator')
+            with col2:
+                traj_level = st.selectbox('Totals', ['annual', 'cumulative'], key='trajectory-level',
+                                          format_func={'annual': 'Per year', 'cumulative': 'Up to the year'}.get)
+            with col3:
+                traj_scenario = st.selectbox('Scenario', ['Expected'] + scen_names, key='trajectory-scenario',
+                                             help='Expected: the scenarios weighted by their likelihood.')
+            with profiler.span('charts', 'Step 10g trajectory'):
+                st.altair_chart(charts.trajectory_chart(traj_table, traj_indicator, traj_level, traj_scenario,
+                                                        traj_variants, (charts.COLOURS * 3)[:no_interv + 1]),
+                                use_container_width=False)
+
+            # Expected totals over all years per intervention
+            traj_sum = traj_table[(traj_table['Scenario'] == 'Expected') & (traj_table['Year'] == traj_last)]
+            words = narrative_words[traj_indicator]
+            unit = {'CO2e': 'tons CO2e', 'Energy': 'gigajoules', 'Calories': 'pizzas'}[traj_indicator]
+            traj_text = ', '.join(f'__{traj_sum[f"{traj_indicator} cumulative"].iloc[k + 1]:,.0f} {unit}__ with the '
+                                  f'intervention __"{interv_names[k]}"__' for k in range(no_interv))
+            st.write(f'From {traj_first} to {traj_last}, the expected total of {words["quantity"]} is '
+                     f'__{traj_sum[f"{traj_indicator} cumulative"].iloc[0]:,.0f} {unit}__ without intervention, '
+                     f'compared to {traj_text}.')
+
+# Snapshot of all inputs, offered for download in the sidebar
+profiler.section('Sidebar')
+snapshot_state = {
+    'scenarios': {
+        'names': scen_names,
+        'descriptions': scen_desc,
+        'likelihood': scen_likelihood_list,
+        'characteristics': scen_chars_codes,
+    },
+    'uncertainties': {'names': uncert_names, 'descriptions': uncert_desc},
+    'population': no_people,
+    'synthetic_population': pop_mode,
+    'walk_calories': walk_calories_input,
+    'bike_calories': bike_calories_input,
+    'factors': {key: impact_factors[j] for j, key in enumerate(engine.FACTORS)},
+    'allocation': mode_allocation[engine.IMPACT_MODES].to_numpy(dtype=float) / 100,
+    'scenario_allocation': [model_allocation[i] if own else None for i, own in enumerate(scen_allocation_own)],
+    'interventions': {'names': interv_names, 'acronyms': interv_acrs, 'descriptions': interv_descs,
+                      'impacts': interv_impact_codes},
+}
+if pers_catalog is None:
+    snapshot_state['personas'] = {'names': pers_name, 'descriptions': pers_desc,
+                                  'distance': pers_chars['Distance (km)'].to_numpy(),
+                                  'bodyweight': pers_chars['Bodyweight (kg)'].to_numpy(), 'weights': pers_weights}
+    snapshot_state['preferences'] = mode_pref_codes
+snapshot_box.download_button('Save a snapshot', snapshot.dumps(snapshot_state), file_name='decision-tool-snapshot.json',
+                             mime='application/json')
+
+# Export of all results and their inputs, only written on request
+# The long tables are written chunk by chunk, the results of the personas are exported per impact mode and, with a
+# catalog, per persona of the catalog.
+profiler.section('Step 10')
+if results_shown['Step 10']:
+    st.header('Step 10h: Export of results')
+    st.write('All results can be downloaded as tables: the distances and impacts per intervention, scenario, persona '
+             'and mode, the totals per scenario and, if shown above, the individual travellers, the uncertainty '
+             'bands and the trajectory. The inputs are included as tables and as a snapshot file that can be restored '
+             'in the sidebar.')
+    export_format = st.selectbox('Format', list(export.FORMATS), key='export-format',
+                                 help='Parquet and CSV files are downloaded as one zip archive.')
+    if st.button('Prepare the export', key='export'):
+        export_variants = ['No intervention'] + interv_names
+        if pers_catalog is None:
+            export_personas, export_groups = pers_name, None
+        else:
+            export_personas, export_groups = pers_catalog['names'], [pers_name[c] for c in pers_catalog['codes']]
+        export_tables = {
+            'results': export.results(mode_pref_interv, model_distance, model_bodyweight, model_weights, no_people,
+                                      impact_factors, walk_calories_input, bike_calories_input, scen_likelihood_list,
+                                      model_allocation, export_variants, scen_names, export_personas, export_groups,
+                                      routes=model_routes),
+            'totals': export.totals(impact_group_interv, scen_likelihood_list, export_variants, scen_names),
+        }
+        if pop_mode:
+            export_tables['travellers'] = export.travellers(pop, mode_pref_interv, impact_factors, walk_calories_input,
+                                                            bike_calories_input, model_allocation, export_variants,
+                                                            scen_names, export_personas, routes=model_routes)
+        if mc_total is not None:
+            export_tables['uncertainty'] = mc_total
+        if traj_table is not None:
+            export_tables['trajectory'] = traj_table
+        export_tables.update(export.inputs(snapshot_state, pers_name))
+        export_file = io.BytesIO()
+        try:
+            export.write(export_file, export_tables, export_format,
+                         files={'inputs.json': snapshot.dumps(snapshot_state)})
+            st.download_button('Download the results', export_file.getvalue(),
+                               file_name=f'decision-tool-results.{export.FORMATS[export_format]}',
+                               mime=export.MIME_TYPES[export.FORMATS[export_format]])
+        except ValueError as error:
+            st.error(f'Error: {error}')
+profiler.section('Sidebar')
+
+# Sidebar
 # Create the dropdown menu with options
 selected_option = st.sidebar.selectbox("I want to see the:", ("Process & Glossary",
                                                              "Scenario overview",
@@ -1787,6 +1461,11 @@ if selected_option == "Process & Glossary":
        - [Step 10a: Impacts per persona group with interventions](#step-10a-impacts-per-persona-group-with-interventions)
        - [Step 10b: Impacts considering population size and persona distribution with interventions](#step-10b-impacts-considering-population-size-and-persona-distribution-with-interventions)
        - [Step 10c: Analysis of results with interventions](#step-10c-analysis-of-results-with-interventions)
+       - [Step 10d: Uncertainty of results](#step-10d-uncertainty-of-results)
+       - [Step 10e: Impacts across individual travellers](#step-10e-impacts-across-individual-travellers)
+       - [Step 10f: Portfolio of interventions](#step-10f-portfolio-of-interventions)
+       - [Step 10g: Trajectory of the impacts](#step-10g-trajectory-of-the-impacts)
+       - [Step 10h: Export of results](#step-10h-export-of-results)
        ''', unsafe_allow_html=True)
        st.header("Glossary")
        st.write("Scenarios are distinct alternative futures that help considering uncertain future developments.")
@@ -1808,4 +1487,18 @@ elif selected_option == "Persona overview":
             if pers_images[i] is not None:
                 st.image(pers_images[i], width=300)
             st.write(pers_desc[i])
-            st.write(pers_chars.loc[pers_name[i]])
\ No newline at end of file
+            st.write(pers_chars.loc[pers_name[i]])
+
+# Timings of this run, shown in the sidebar and kept for the trace of the last runs
+profile_run = profiler.finish()
+if profile_run is not None:
+    profile_runs = st.session_state.setdefault('profile-runs', [])
+    profile_runs.append(profile_run)
+    del profile_runs[:-profile_runs_kept]
+    profile_count = st.session_state['profile-count'] = st.session_state.get('profile-count', 0) + 1
+    profile_table = profiling.breakdown(profile_run)
+    profile_box.write(f'Run {profile_count} took {profile_table["total"].sum():.0f} ms, per step in ms:')
+    profile_box.dataframe(profile_table.round(1))
+    profile_box.download_button('Download a trace of the last runs',
+                                json.dumps(profiling.trace(profile_runs, profile_count - len(profile_runs) + 1)),
+                                file_name='decision-tool-trace.json', mime='application/json')
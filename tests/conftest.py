@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from decision_tool import engine
+
+
+@pytest.fixture
+def synthetic_inputs():
+    """Random inputs of the engine functions with ``no_scen`` scenarios, ``no_pers`` personas and ``no_interv``
+    interventions, drawn like those of ``decision_tool.benchmark`` without importing its charts."""
+    def make(no_scen, no_pers, no_interv=2, seed=0):
+        rng = np.random.default_rng(seed)
+        pref = rng.integers(0, 5, (no_scen, no_pers, len(engine.MODES)), dtype=np.int8)
+        weights = rng.random(no_pers)
+        likelihood = rng.random(no_scen)
+        return {
+            'pref': pref,
+            'delta': rng.integers(-1, 2, (no_interv, no_scen, no_pers, len(engine.MODES)), dtype=np.int8),
+            'distance': rng.uniform(1, 60, no_pers),
+            'bodyweight': rng.uniform(50, 90, no_pers),
+            'weights': weights / weights.sum() * 100,
+            'likelihood': likelihood / likelihood.sum() * 100,
+            'factors': np.array([engine.FACTORS[key] for key in engine.FACTORS], dtype=float),
+            'allocation': np.broadcast_to(engine.MODE_ALLOCATION, (no_scen,) + engine.MODE_ALLOCATION.shape),
+            'scenarios': [f'S{i + 1}' for i in range(no_scen)],
+            'personas': [f'P{i + 1}' for i in range(no_pers)],
+        }
+    return make
@@ -0,0 +1,84 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from decision_tool import batch, engine
+
+
+def config():
+    return {
+        'name': 'workshop',
+        'scenarios': [{'name': 'S1', 'likelihood': 60}, {'name': 'S2', 'likelihood': 40}],
+        'personas': [{'name': 'P1', 'distance': 10, 'bodyweight': 70, 'weight': 50},
+                     {'name': 'P2', 'distance': 20, 'bodyweight': 80, 'weight': 50}],
+        'population': 1000,
+        'preferences': [{'Car': ['3: Likely', 4], 'Bike': [1, 0]}, {'Walk': [2, 2]}],
+        'interventions': [{'name': 'Bikes', 'impacts': [{'Bike': ['+1: Slight increase', 2]}, {}]}],
+    }
+
+
+def test_parse_config():
+    arrays = batch.parse_config(config())
+    assert arrays['variants'] == [batch.BASE_VARIANT, 'Bikes']
+    assert arrays['pref'][0, :, engine.MODES.index('Car')].tolist() == [3, 4]
+    assert arrays['delta'][0, 0, :, engine.MODES.index('Bike')].tolist() == [1, 2]
+    assert not arrays['delta'][0, 1].any()
+
+
+def test_evaluate():
+    result = batch.evaluate(config())
+    assert len(result) == 2 * 2 * 2
+    bikes = result[(result['intervention'] == 'Bikes') & (result['scenario'] == 'S1')]
+    base = result[(result['intervention'] == batch.BASE_VARIANT) & (result['scenario'] == 'S1')]
+    assert (bikes['Calories'].to_numpy() > base['Calories'].to_numpy()).all()
+    np.testing.assert_array_equal(result.loc[result['scenario'] == 'S2', 'CO2e'], 0)
+
+
+@pytest.mark.parametrize('change, message', [
+    (lambda c: c['preferences'][0]['Car'].__setitem__(0, 7), "'Car': 7 is not a code from 0 to 4"),
+    (lambda c: c['preferences'][0]['Car'].__setitem__(0, '5: Always'), "'5: Always' is not a code from 0 to 4"),
+    (lambda c: c['preferences'][0]['Car'].__setitem__(0, 1.5), 'is not a code from 0 to 4'),
+    (lambda c: c['preferences'][0]['Car'].__setitem__(0, 'often'), "'often' is not a code"),
+    (lambda c: c['interventions'][0]['impacts'][0]['Bike'].__setitem__(0, -5), 'workshop, Bikes, mode .* from -2 to 2'),
+    (lambda c: c['interventions'][0]['impacts'].append({}), 'workshop, Bikes: 3 impact tables for 2 scenarios'),
+    (lambda c: c['preferences'].pop(), 'workshop: 1 preference tables for 2 scenarios'),
+    (lambda c: c['preferences'][0].update(Plane=[0, 0]), "unknown mode 'Plane'"),
+    (lambda c: c.pop('population'), "workshop: missing 'population'"),
+    (lambda c: c['personas'][1].pop('bodyweight'), "workshop, persona 2: missing 'bodyweight'"),
+    (lambda c: c['interventions'][0].pop('name'), "workshop, intervention 1: missing 'name'"),
+])
+def test_invalid_config(change, message):
+    invalid = config()
+    change(invalid)
+    with pytest.raises(ValueError, match=message):
+        batch.parse_config(invalid)
+
+
+def write_configs(path, configs):
+    path.write_text('\n'.join(json.dumps(c) for c in configs) + '\n')
+    return str(path)
+
+
+@pytest.mark.parametrize('output', ['results.parquet', 'results.csv'])
+def test_main(tmp_path, capsys, output):
+    second = dict(config(), name='workshop-2')
+    configs = write_configs(tmp_path / 'configs.jsonl', [config(), second])
+    batch.main([configs, str(tmp_path / output), '--workers', '1'])
+    read = pd.read_csv if output.endswith('.csv') else pd.read_parquet
+    results = read(tmp_path / output)
+    assert results['config'].tolist() == ['workshop'] * 8 + ['workshop-2'] * 8
+    np.testing.assert_allclose(results['CO2e group'], pd.concat([batch.evaluate(config())] * 2)['CO2e group'])
+    assert capsys.readouterr().out.startswith('2 configurations, 16 rows written')
+
+
+def test_main_reports_invalid_configs(tmp_path, capsys):
+    invalid = config()
+    del invalid['personas'][0]['weight']
+    configs = write_configs(tmp_path / 'configs.jsonl', [config(), invalid])
+    with pytest.raises(SystemExit) as exit:
+        batch.main([configs, str(tmp_path / 'results.parquet'), '--workers', '1'])
+    assert exit.value.code == 1
+    assert capsys.readouterr().err == "Error: workshop, persona 1: missing 'weight'\n"
+    assert not (tmp_path / 'results.parquet').exists()
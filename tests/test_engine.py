@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from decision_tool import defaults, engine
+
+# Default inputs of the interface: four scenarios and personas (Jacqueline, Thierry, Adrian, Rui), two interventions
+PREF = defaults.PREFERENCES[:4]
+DISTANCE = defaults.PERSONA_CHARACTERISTICS[:, 0]
+BODYWEIGHT = defaults.PERSONA_CHARACTERISTICS[:, 1]
+FACTORS = defaults.FACTORS.to_numpy(dtype=float)
+WEIGHTS = np.array([20, 20, 15, 45])
+LIKELIHOOD = np.array([40, 15, 25, 20])
+NO_PEOPLE = 50000
+
+# Allocation of the original script, whose MM-Walk row only held the 20% walking share
+ORIGINAL_ALLOCATION = engine.MODE_ALLOCATION.copy()
+ORIGINAL_ALLOCATION[engine.MODES.index('MM-Walk')] = [0, 0, 0, 0, 0, 0.2]
+
+# Step 8 group totals of the original script, [scenario, persona]
+ORIGINAL_GROUPS = {
+    'CO2e': [[31, 33, 5, 2], [20, 28, 6, 2], [46, 27, 6, 0], [25, 27, 6, 3]],
+    'Energy': [[418, 408, 71, 32], [272, 344, 75, 32], [609, 354, 82, 7], [354, 350, 84, 43]],
+    'Calories': [[2950, 3360, 630, 1125], [2910, 3110, 630, 1125], [3420, 3700, 435, 1935], [3040, 3610, 375, 1012]],
+}
+
+
+def results(allocation=engine.MODE_ALLOCATION):
+    """Group totals and likelihood-weighted totals per variant of the defaults, as in Steps 8 and 10."""
+    pref = np.concatenate([PREF[np.newaxis], engine.apply_intervention(PREF, defaults.IMPACTS)])
+    dist = engine.distance_split(pref, DISTANCE, allocation=allocation)
+    individual = engine.impacts(dist, FACTORS, BODYWEIGHT, engine.WALK_CALORIES, engine.BIKE_CALORIES)
+    group = engine.group_totals(individual, WEIGHTS, NO_PEOPLE)
+    totals = engine.scenario_totals(group, LIKELIHOOD)
+    return group, {indicator: values.sum(axis=-1) for indicator, values in totals.items()}
+
+
+def test_original_step_8():
+    group, _ = results(ORIGINAL_ALLOCATION)
+    for indicator, expected in ORIGINAL_GROUPS.items():
+        np.testing.assert_array_equal(group[indicator][0], expected)
+
+
+def test_original_step_10():
+    # The energy of both interventions and the calories of the first one are those of the original script; its CO2e
+    # of the interventions was not rounded per group and its second intervention added the individual calories
+    _, aggregate = results(ORIGINAL_ALLOCATION)
+    np.testing.assert_allclose(aggregate['Energy'], [909.25, 1002.2, 844.2])
+    np.testing.assert_allclose(aggregate['Calories'][:2], [8372.15, 7952.65])
+    np.testing.assert_allclose(aggregate['CO2e'][0], 68.75)
+
+
+def test_default_results():
+    # Unlike the original script, MM-Walk trips count their micromobility share, which raises the CO2e and energy of
+    # the personas using MM-Walk
+    group, aggregate = results()
+    np.testing.assert_array_equal(group['CO2e'][0, :, 3], [2, 2, 1, 3])
+    np.testing.assert_array_equal(group['Energy'][0, :, 3], [36, 36, 10, 47])
+    np.testing.assert_allclose(aggregate['CO2e'], [69, 77.8, 64.95])
+    np.testing.assert_allclose(aggregate['Energy'], [913, 1005.7, 848.15])
+    np.testing.assert_allclose(aggregate['Calories'], [8372.15, 7952.65, 9158.85])
+
+
+def test_apply_intervention_clips():
+    pref = np.array([[0, 1, 4, 3]], dtype=np.int8)
+    delta = np.array([[[-2, 2, 1, -1]], [[2, -2, -2, 2]]], dtype=np.int8)
+    np.testing.assert_array_equal(engine.apply_intervention(pref, delta), [[[0, 3, 4, 2]], [[2, 0, 2, 4]]])
+
+
+def test_leading_axes():
+    # The variants evaluated together equal one evaluation per variant
+    pref = np.concatenate([PREF[np.newaxis], engine.apply_intervention(PREF, defaults.IMPACTS)])
+    dist = engine.distance_split(pref, DISTANCE)
+    for k in range(len(pref)):
+        np.testing.assert_array_equal(dist[k], engine.distance_split(pref[k], DISTANCE))
+
+
+def test_distance_split_keeps_the_distance():
+    dist = engine.distance_split(PREF, DISTANCE, decimals=None)
+    travelled = PREF.sum(axis=-1) > 0
+    np.testing.assert_allclose(dist.sum(axis=-1)[travelled], np.broadcast_to(DISTANCE, PREF.shape[:2])[travelled])
+    # Personas without any preference do not travel
+    np.testing.assert_array_equal(engine.distance_split(np.zeros((1, 13)), [10], decimals=None), 0)
+
+
+@pytest.mark.parametrize('split', [0.5, 0.8, 1])
+def test_mode_allocation_keeps_row_totals(split):
+    allocation = engine.mode_allocation(split)
+    np.testing.assert_allclose(allocation.sum(axis=-1), engine.MODE_ALLOCATION.sum(axis=-1))
+    multimodal = np.flatnonzero(engine.MULTIMODAL_FIRST >= 0)
+    first = engine.MULTIMODAL_FIRST[multimodal]
+    np.testing.assert_allclose(allocation[multimodal, first],
+                               engine.MODE_ALLOCATION[multimodal, first] * split / engine.MULTIMODAL_SPLIT)
+
+
+def test_routes_scale_the_kilometres():
+    routes = np.ones((4, len(engine.IMPACT_MODES)))
+    routes[1] = 1.5
+    dist = engine.distance_split(PREF, DISTANCE, decimals=None)
+    np.testing.assert_allclose(engine.distance_split(PREF, DISTANCE, decimals=None, routes=routes),
+                               dist * routes)
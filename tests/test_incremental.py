@@ -0,0 +1,120 @@
+import types
+
+import numpy as np
+import pytest
+
+from decision_tool import engine, incremental
+
+
+def pipeline_inputs(synthetic_inputs, seed=0):
+    data = synthetic_inputs(4, 6, 3, seed=seed)
+    pref = np.concatenate([data['pref'][np.newaxis], engine.apply_intervention(data['pref'], data['delta'])])
+    return dict(pref=pref, distance=data['distance'], bodyweight=data['bodyweight'], factors=data['factors'],
+                walk_calories=engine.WALK_CALORIES, bike_calories=engine.BIKE_CALORIES, weights=data['weights'],
+                no_people=50000, likelihood=data['likelihood'], allocation=data['allocation'])
+
+
+def edit(args, rng):
+    """``args`` with one random edit of the kind a widget makes."""
+    args = dict(args)
+    kind = rng.integers(11)
+    if kind == 0:
+        args['pref'] = args['pref'].copy()
+        args['pref'][tuple(rng.integers(args['pref'].shape))] = rng.integers(5)
+    elif kind in (1, 2):
+        key = ['distance', 'bodyweight'][kind - 1]
+        args[key] = args[key].copy()
+        args[key][rng.integers(len(args[key]))] += rng.uniform(1, 10)
+    elif kind == 3:
+        args['weights'] = args['weights'].copy()
+        args['weights'][rng.choice(len(args['weights']), 2, replace=False)] += [2, -2]
+    elif kind == 4:
+        routes = np.ones((len(args['distance']), len(engine.IMPACT_MODES)))
+        routes[rng.integers(len(routes))] = rng.uniform(0.5, 2, len(engine.IMPACT_MODES))
+        args['routes'] = routes
+    elif kind == 5:
+        args['allocation'] = np.array(args['allocation'])
+        args['allocation'][rng.integers(len(args['allocation']))] = engine.mode_allocation(rng.uniform(0.5, 1))
+    elif kind == 6:
+        args['likelihood'] = rng.permutation(args['likelihood'])
+    elif kind == 7:
+        args['factors'] = args['factors'] * rng.uniform(0.8, 1.2, args['factors'].shape)
+    elif kind == 8:
+        args['no_people'] = int(rng.integers(10000, 100000))
+    elif kind == 9:
+        shift = rng.integers(-1, 2, args['pref'].shape[1:], dtype=np.int8)
+        args['pref'] = np.concatenate([args['pref'], engine.apply_intervention(args['pref'][:1], shift)])
+    elif len(args['pref']) > 1:
+        args['pref'] = args['pref'][:-1]
+    return args
+
+
+def assert_same(evaluation, data, decimals):
+    dist, individual, group, sums = incremental._full(data, decimals)
+    np.testing.assert_array_equal(evaluation['dist'], dist)
+    for indicator in engine.INDICATORS:
+        np.testing.assert_array_equal(evaluation['individual'][indicator], individual[indicator])
+        np.testing.assert_array_equal(evaluation['group'][indicator], group[indicator])
+        # The patched sums only differ from the full ones in the order of the floating point additions
+        np.testing.assert_allclose(evaluation['sums'][indicator], sums[indicator], rtol=1e-12, atol=1e-9)
+        totals = sums[indicator] * data['likelihood'] / 100
+        np.testing.assert_allclose(evaluation['totals'][indicator], totals, rtol=1e-12, atol=1e-9)
+        np.testing.assert_allclose(evaluation['aggregate'][indicator], totals.sum(axis=-1), rtol=1e-12, atol=1e-9)
+
+
+def test_full_evaluation_equals_engine(synthetic_inputs):
+    args = pipeline_inputs(synthetic_inputs)
+    evaluation = incremental.evaluate(incremental.inputs(**args))
+    dist = engine.distance_split(args['pref'], args['distance'], allocation=args['allocation'])
+    individual = engine.impacts(dist, args['factors'], args['bodyweight'], args['walk_calories'],
+                                args['bike_calories'])
+    group = engine.group_totals(individual, args['weights'], args['no_people'])
+    totals = engine.scenario_totals(group, args['likelihood'])
+    assert evaluation['changes'] is None
+    np.testing.assert_array_equal(evaluation['dist'], dist)
+    for indicator in engine.INDICATORS:
+        np.testing.assert_array_equal(evaluation['group'][indicator], group[indicator])
+        np.testing.assert_allclose(evaluation['totals'][indicator], totals[indicator], rtol=1e-12)
+
+
+@pytest.mark.parametrize('decimals', [0, None])
+@pytest.mark.parametrize('seed', range(3))
+def test_random_edits(decimals, seed, synthetic_inputs):
+    rng = np.random.default_rng(seed)
+    args = pipeline_inputs(synthetic_inputs, seed)
+    evaluation = incremental.evaluate(incremental.inputs(**args), decimals=decimals)
+    for _ in range(40):
+        args = edit(args, rng)
+        data = incremental.inputs(**args)
+        evaluation = incremental.evaluate(data, evaluation, decimals)
+        assert_same(evaluation, data, decimals)
+
+
+def test_unchanged_inputs_keep_the_evaluation(synthetic_inputs):
+    args = pipeline_inputs(synthetic_inputs)
+    evaluation = incremental.evaluate(incremental.inputs(**args))
+    assert incremental.evaluate(incremental.inputs(**args), evaluation) is evaluation
+    # Other rounding is a new evaluation
+    assert incremental.evaluate(incremental.inputs(**args), evaluation, None)['changes'] is None
+
+
+def test_stages_compute_whole_arrays(synthetic_inputs):
+    calls = []
+
+    def stage(name):
+        def wrapper(*args, **kwargs):
+            calls.append(name)
+            return getattr(engine, name)(*args, **kwargs)
+        return wrapper
+
+    stages = types.SimpleNamespace(**{name: stage(name) for name in ['distance_split', 'impacts', 'group_totals']})
+    args = pipeline_inputs(synthetic_inputs)
+    evaluation = incremental.evaluate(incremental.inputs(**args), stages=stages)
+    assert calls == ['distance_split', 'impacts', 'group_totals']
+    # Slices are computed by the engine, new factors recompute all impacts with the stages
+    args['weights'] = args['weights'][::-1].copy()
+    evaluation = incremental.evaluate(incremental.inputs(**args), evaluation, stages=stages)
+    assert len(calls) == 3
+    args['factors'] = args['factors'] * 2
+    incremental.evaluate(incremental.inputs(**args), evaluation, stages=stages)
+    assert calls[3:] == ['impacts', 'group_totals']
@@ -0,0 +1,57 @@
+import numpy as np
+
+from decision_tool import defaults, engine, montecarlo
+
+NO_SPREAD = {key: 0 for key in montecarlo.UNCERTAINTY}
+
+
+def default_inputs():
+    return dict(pref=defaults.PREFERENCES[:4], delta=defaults.IMPACTS, distance=defaults.PERSONA_CHARACTERISTICS[:, 0],
+                bodyweight=defaults.PERSONA_CHARACTERISTICS[:, 1], factors=defaults.FACTORS.to_numpy(dtype=float),
+                walk_calories=engine.WALK_CALORIES, bike_calories=engine.BIKE_CALORIES,
+                weights=np.array([20, 30, 30, 20]), no_people=50000, likelihood=np.array([40, 15, 15, 30]))
+
+
+def point_estimate(inputs):
+    """Unrounded individual impacts and likelihood-weighted totals of the base scenario and the interventions."""
+    pref = np.concatenate([inputs['pref'][np.newaxis], engine.apply_intervention(inputs['pref'], inputs['delta'])])
+    dist = engine.distance_split(pref, inputs['distance'], decimals=None)
+    individual = engine.impacts(dist, inputs['factors'], inputs['bodyweight'], inputs['walk_calories'],
+                                inputs['bike_calories'], decimals=None)
+    group = engine.group_totals(individual, inputs['weights'], inputs['no_people'], decimals=None)
+    totals = engine.scenario_totals(group, inputs['likelihood'])
+    return individual, {indicator: values.sum(axis=-1) for indicator, values in totals.items()}
+
+
+def test_zero_spread_collapses_onto_point_estimate():
+    inputs = default_inputs()
+    individual, total = point_estimate(inputs)
+    result = montecarlo.simulate(**inputs, samples=2000, uncertainty=NO_SPREAD, chunk_size=300)
+    for indicator in engine.INDICATORS:
+        for band in result['total'][indicator]:
+            np.testing.assert_allclose(band, total[indicator], rtol=1e-6)
+        for band in result['individual'][indicator]:
+            np.testing.assert_allclose(band, individual[indicator], rtol=1e-6, atol=1e-6)
+
+
+def test_bands_contain_point_estimate():
+    inputs = default_inputs()
+    _, total = point_estimate(inputs)
+    result = montecarlo.simulate(**inputs, samples=5000, chunk_size=1000)
+    for indicator in engine.INDICATORS:
+        low, median, high = result['total'][indicator]
+        assert (low <= median).all() and (median <= high).all()
+        assert (low < total[indicator]).all() and (total[indicator] < high).all()
+
+
+def test_histogram_grows_with_later_values():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([rng.uniform(10, 11, (1000, 3)), rng.uniform(0, 100, (9000, 3))])
+    histogram = montecarlo.Histogram(np.full(3, 100), 512)
+    for chunk in np.split(values, 10):
+        histogram.add(chunk)
+    expected = np.percentile(values, montecarlo.PERCENTILES, axis=0)
+    # Each value is counted in its bin of the final range, so the error stays within one bin
+    np.testing.assert_allclose(histogram.percentiles(montecarlo.PERCENTILES, (3,)), expected,
+                               atol=histogram.width.max())
+    assert histogram.width.max() < 1
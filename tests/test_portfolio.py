@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from decision_tool import portfolio
+
+LEVELS = np.array([0.25, 0.5, 0.75, 1])
+
+
+def extensions(parents, last, levels, costs, budget):
+    """All extensions of the parents within the budget, one at a time."""
+    children, intervs = [], []
+    for parent, first in zip(parents, last + 1):
+        for interv in range(first, parents.shape[1]):
+            for level in levels:
+                child = parent.copy()
+                child[interv] = level
+                if child @ costs <= budget + 1e-9:
+                    children.append(child)
+                    intervs.append(interv)
+    return np.array(children).reshape(-1, parents.shape[1]), np.array(intervs, dtype=int)
+
+
+@pytest.mark.parametrize('room', [1, 7, 50, 10 ** 9])
+def test_extend_within_room(room):
+    costs = np.random.default_rng(0).uniform(0, 1, 20)
+    parents, last = np.zeros((1, 20)), np.array([-1])
+    for size in range(3):
+        expected, expected_last = extensions(parents, last, LEVELS, costs, 3)
+        children, children_last, _, complete = portfolio._extend(parents, last, LEVELS, costs, 3, room)
+        np.testing.assert_array_equal(children, expected[:room])
+        np.testing.assert_array_equal(children_last, expected_last[:room])
+        assert complete == (len(expected) <= room)
+        parents, last = expected, expected_last
+
+
+def test_search_stops_at_limit():
+    rng = np.random.default_rng(1)
+    problem = portfolio.problem(np.full((2, 3, 13), 2), rng.integers(-2, 3, (20, 2, 3, 13)), [10, 20, 30],
+                                [60, 70, 80], np.ones((2, 6)), 1, 0.4, [30, 30, 40], 1000, [50, 50])
+    result = portfolio.search(problem, levels=(0, 0.25, 0.5, 0.75, 1), limit=1000)
+    assert result['evaluated'] == 1000
+    assert not result['complete']
+    small = portfolio.search(dict(problem, delta=problem['delta'][:3], costs=problem['costs'][:3],
+                                  names=problem['names'][:3]))
+    assert small['evaluated'] == 2 ** 3
+    assert small['complete']
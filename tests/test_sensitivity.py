@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from decision_tool import engine, sensitivity
+
+
+def analysis(synthetic_inputs):
+    data = synthetic_inputs(3, 4)
+    return data, sensitivity.problem(data['pref'], data['distance'], data['bodyweight'], data['factors'],
+                                     engine.WALK_CALORIES, engine.BIKE_CALORIES, data['weights'], 50000,
+                                     data['likelihood'], data['personas'], data['scenarios'])
+
+
+@pytest.mark.parametrize('indicator', engine.INDICATORS)
+def test_nominal_inputs_equal_engine(indicator, synthetic_inputs):
+    data, problem = analysis(synthetic_inputs)
+    low, high = problem['bounds'][:, 0], problem['bounds'][:, 1]
+    x = (problem['nominal'][problem['active']] - low) / (high - low)
+    allocation = engine.mode_allocation(engine.MULTIMODAL_SPLIT)
+    dist = engine.distance_split(data['pref'], data['distance'], allocation=allocation, decimals=None)
+    individual = engine.impacts(dist, data['factors'], data['bodyweight'], engine.WALK_CALORIES,
+                                engine.BIKE_CALORIES, decimals=None)
+    group = engine.group_totals(individual, data['weights'], 50000, decimals=None)
+    expected = engine.scenario_totals(group, data['likelihood'])[indicator].sum()
+    np.testing.assert_allclose(sensitivity.evaluate(problem, x[np.newaxis], indicator), [expected], rtol=1e-12)
+
+
+def test_bounds(synthetic_inputs):
+    _, problem = analysis(synthetic_inputs)
+    bounds = dict(zip(problem['names'], problem['bounds'].tolist()))
+    assert bounds['Multimodal split'] == list(sensitivity.SPLIT_RANGE)
+    np.testing.assert_allclose(bounds['Likelihood S1'], np.array([0.75, 1.25]) * problem['nominal'][-3])
+    np.testing.assert_allclose(bounds['Distance P2'], [0.75, 1.25])
+
+
+def test_sobol_indices(synthetic_inputs):
+    _, problem = analysis(synthetic_inputs)
+    indices = sensitivity.sobol(problem, samples=4096, indicator='CO2e')
+    assert list(indices.index) == problem['names']
+    # The energy factors and the calories do not change the emissions
+    unused = [name for name in problem['names'] if name.startswith('MJ') or 'calories' in name]
+    np.testing.assert_allclose(indices.loc[unused].to_numpy(), 0, atol=1e-12)
+    # The first-order indices of the other inputs explain most of the variance
+    assert 0.8 < indices['S1'].sum() < 1.1
+    assert (indices['ST'] >= 0).all()
+    # The same seed draws the same samples
+    assert indices.equals(sensitivity.sobol(problem, samples=4096, indicator='CO2e'))
+
+
+def test_morris_screening(synthetic_inputs):
+    _, problem = analysis(synthetic_inputs)
+    effects = sensitivity.morris(problem, trajectories=50, indicator='Calories')
+    unused = [name for name in problem['names'] if name.startswith(('CO2e', 'MJ'))]
+    np.testing.assert_allclose(effects.loc[unused, 'mu_star'], 0, atol=1e-12)
+    assert (effects['mu_star'] >= effects['mu'].abs() - 1e-12).all()
+    # More weight or distance never burns fewer calories
+    moving = [name for name in problem['names'] if name.startswith(('Distance', 'Walk', 'Bike'))]
+    assert (effects.loc[moving, 'mu'] >= 0).all()
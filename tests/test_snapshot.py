@@ -0,0 +1,109 @@
+import json
+
+import numpy as np
+import pytest
+
+from decision_tool import defaults, engine, snapshot
+
+
+def default_state(no_scen=4):
+    """Snapshot dict of the default inputs with ``no_scen`` scenarios, as built by the interface."""
+    return {
+        'scenarios': {'names': [f'S{i + 1}' for i in range(no_scen)],
+                      'descriptions': [f'Scenario {i + 1}' for i in range(no_scen)],
+                      'likelihood': np.full(no_scen, 100 / no_scen),
+                      'characteristics': defaults.pad(defaults.CHARACTERISTICS, (no_scen, 4))},
+        'uncertainties': {'names': [name for name, _ in defaults.UNCERTAINTIES],
+                          'descriptions': [description for _, description in defaults.UNCERTAINTIES]},
+        'population': 50000,
+        'synthetic_population': False,
+        'walk_calories': engine.WALK_CALORIES,
+        'bike_calories': engine.BIKE_CALORIES,
+        'factors': {key: np.asarray(values, dtype=float) for key, values in engine.FACTORS.items()},
+        'allocation': engine.MODE_ALLOCATION,
+        'scenario_allocation': [None] * (no_scen - 1) + [engine.MODE_ALLOCATION * 0.5],
+        'personas': {'names': [name for name, _ in defaults.PERSONAS],
+                     'descriptions': [description for _, description in defaults.PERSONAS],
+                     'distance': defaults.PERSONA_CHARACTERISTICS[:, 0],
+                     'bodyweight': defaults.PERSONA_CHARACTERISTICS[:, 1],
+                     'weights': np.array([20, 30, 30, 20])},
+        'preferences': defaults.PREFERENCES[:no_scen],
+        'interventions': {'names': [name for name, _, _ in defaults.INTERVENTIONS],
+                          'acronyms': [acronym for _, acronym, _ in defaults.INTERVENTIONS],
+                          'descriptions': [description for _, _, description in defaults.INTERVENTIONS],
+                          'impacts': defaults.pad(defaults.IMPACTS, (2, no_scen, 4, len(engine.MODES)))},
+    }
+
+
+def changed(state, path, value):
+    """JSON bytes of ``state`` with the entry at ``path`` replaced by ``value``."""
+    data = json.loads(snapshot.dumps(state))
+    section = data
+    for key in path[:-1]:
+        section = section[key]
+    section[path[-1]] = value
+    return json.dumps(data).encode()
+
+
+def test_round_trip():
+    state = default_state()
+    result = snapshot.loads(snapshot.dumps(state))
+    assert result['version'] == snapshot.VERSION
+    assert result['scenarios']['names'] == state['scenarios']['names']
+    np.testing.assert_array_equal(result['scenarios']['characteristics'], state['scenarios']['characteristics'])
+    np.testing.assert_array_equal(result['preferences'], state['preferences'])
+    np.testing.assert_array_equal(result['interventions']['impacts'], state['interventions']['impacts'])
+    assert result['preferences'].dtype == np.int8
+    np.testing.assert_array_equal(result['personas']['weights'], state['personas']['weights'])
+    assert result['scenario_allocation'][:-1] == [None] * 3
+    np.testing.assert_array_equal(result['scenario_allocation'][-1], engine.MODE_ALLOCATION * 0.5)
+    # A loaded snapshot is saved and loaded again unchanged
+    assert snapshot.dumps(snapshot.loads(snapshot.dumps(result))) == snapshot.dumps(result)
+
+
+def test_round_trip_catalog():
+    state = default_state()
+    del state['personas'], state['preferences']
+    state['interventions']['impacts'] = state['interventions']['impacts'][:, :, :3]
+    result = snapshot.loads(snapshot.dumps(state))
+    assert 'personas' not in result
+    assert result['interventions']['impacts'].shape == (2, 4, 3, len(engine.MODES))
+
+
+@pytest.mark.parametrize('no_scen', snapshot.COUNTS['scenarios'])
+def test_count_limits(no_scen):
+    assert len(snapshot.loads(snapshot.dumps(default_state(no_scen)))['scenarios']['names']) == no_scen
+
+
+@pytest.mark.parametrize('path, value, message', [
+    (['version'], 2, 'version 2'),
+    (['preferences', 0, 0, 0], 5, 'preferences must hold codes'),
+    (['interventions', 'impacts', 0, 0, 0, 0], -3, 'impacts must hold codes'),
+    (['scenarios', 'characteristics', 0, 0], 0, 'characteristics must hold codes'),
+    (['scenarios', 'likelihood'], [50, 50], '2 scenarios likelihood for 4 scenarios'),
+    (['personas', 'descriptions'], ['P1', 'P2', 'P3'], '3 personas descriptions for 4 personas'),
+    (['scenario_allocation'], [None], '1 scenario_allocation for 4 scenarios'),
+    (['allocation'], [[1]], 'allocation has shape'),
+    (['interventions', 'names'], [], '0 interventions instead of 1 to 20'),
+    (['interventions', 'names'], [f'I{k}' for k in range(21)], '21 interventions instead of 1 to 20'),
+    (['personas', 'names'], ['P1'], '1 personas instead of 2 to 8'),
+    (['personas', 'names'], [f'P{k}' for k in range(9)], '9 personas instead of 2 to 8'),
+    (['scenarios', 'names'], ['S1'], '1 scenarios instead of 2 to 8'),
+    (['scenarios', 'names'], [f'S{k}' for k in range(9)], '9 scenarios instead of 2 to 8'),
+])
+def test_rejected(path, value, message):
+    with pytest.raises(ValueError, match=message):
+        snapshot.loads(changed(default_state(), path, value))
+
+
+@pytest.mark.parametrize('data', [b'', b'[1, 2]', b'{"scenarios": {}}', b'\xff'])
+def test_not_a_snapshot(data):
+    with pytest.raises(ValueError, match='Snapshot: not a snapshot file'):
+        snapshot.loads(data)
+
+
+def test_missing_entry():
+    data = json.loads(snapshot.dumps(default_state()))
+    del data['interventions']
+    with pytest.raises(ValueError, match='Snapshot: missing or invalid entry'):
+        snapshot.loads(json.dumps(data).encode())
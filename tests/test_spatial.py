@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from decision_tool import engine, spatial
+
+# Streets A-B-C with a shortcut A-C for bikes and pedestrians, a transit line from A to C and a one-way street C-A
+NETWORK = b"""From,To,Length (km),Modes,Oneway
+A,B,2,,
+B,C,3,,
+A,C,4,Bike Walk,
+A,S1,0.2,PT Walk,
+S1,S2,6,PT,
+S2,C,0.3,PT Walk,
+C,A,1,Car,1
+"""
+
+ZONES = b"""Zone,Node
+Home,A
+Work,C
+Mall,B
+"""
+
+
+@pytest.fixture
+def paths(tmp_path):
+    return spatial.zone_paths(NETWORK, ZONES, cache_dir=tmp_path)
+
+
+def test_shortest_paths(paths):
+    home, work = paths['names'].index('Home'), paths['names'].index('Work')
+    mode = {name: paths['paths'][engine.IMPACT_MODES.index(name)] for name in engine.IMPACT_MODES}
+    assert mode['Car'][home, work] == 5
+    assert mode['Car'][work, home] == 1
+    assert mode['Bike'][home, work] == 4
+    assert mode['PT'][home, work] == pytest.approx(6.5)
+
+
+def test_paths_are_cached(paths, tmp_path):
+    assert len(list(tmp_path.iterdir())) == 1
+    cached = spatial.zone_paths(NETWORK, ZONES, cache_dir=tmp_path)
+    assert cached['names'] == paths['names']
+    np.testing.assert_array_equal(cached['paths'], paths['paths'])
+
+
+def test_persona_distances(paths):
+    distance, routes = spatial.persona_distances(paths, ['Home', 'Mall'], ['Work', 'Work'])
+    np.testing.assert_allclose(distance, [6, 6])
+    assert routes.shape == (2, len(engine.IMPACT_MODES))
+    np.testing.assert_allclose(routes[0, engine.IMPACT_MODES.index('Bike')], 8 / 6)
+    np.testing.assert_allclose(routes[0, engine.IMPACT_MODES.index('PT')], 13 / 6)
+    with pytest.raises(ValueError, match='not a zone'):
+        spatial.persona_distances(paths, ['Home'], ['Station'])
+
+
+@pytest.mark.parametrize('zones, message', [
+    (b'Zone,Node\nHome,A\nHome,B\n', 'more than once'),
+    (b'Zone,Node\nHome,Z\n', 'not part of the network'),
+    (b'Zone,X,Y\nHome,8.5,47.4\n', 'GeoJSON network'),
+])
+def test_rejected_zones(zones, message):
+    with pytest.raises(ValueError, match=message):
+        spatial.read_zones(zones, spatial.read_network(NETWORK))
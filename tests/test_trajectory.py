@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from decision_tool import engine, trajectory
+
+ANCHORS = [2025, 2035, 2050]
+YEARS = np.arange(2020, 2056)
+
+
+def anchor_inputs(synthetic_inputs):
+    data = synthetic_inputs(3, 5, 1)
+    rng = np.random.default_rng(1)
+    pref = np.stack([data['pref'], np.clip(data['pref'] + data['delta'][0], 0, 4),
+                     rng.integers(0, 5, data['pref'].shape)])
+    factors = data['factors'] * np.array([1, 0.8, 0.5])[:, np.newaxis, np.newaxis]
+    return data, pref, factors, np.array([50000, 55000, 70000])
+
+
+def test_anchor_weights():
+    weights = trajectory.anchor_weights(ANCHORS, [2020, 2025, 2030, 2050, 2060])
+    np.testing.assert_allclose(weights, [[1, 0, 0], [1, 0, 0], [0.5, 0.5, 0], [0, 0, 1], [0, 0, 1]])
+    with pytest.raises(ValueError):
+        trajectory.anchor_weights([2025, np.nan], YEARS)
+
+
+def test_annual_totals_equal_one_run_per_year(synthetic_inputs):
+    data, pref, factors, no_people = anchor_inputs(synthetic_inputs)
+    annual = trajectory.annual_totals(pref, ANCHORS, YEARS, data['distance'], data['bodyweight'], factors,
+                                      engine.WALK_CALORIES, engine.BIKE_CALORIES, data['weights'], no_people)
+    for y, year in enumerate(YEARS):
+        # The inputs of the year, with fractional preference codes between the anchors
+        pref_year, factors_year, people_year = (trajectory.interpolate(values, ANCHORS, [year])[0]
+                                                for values in (pref, factors, no_people))
+        dist = engine.distance_split(pref_year, data['distance'], decimals=None)
+        individual = engine.impacts(dist, factors_year, data['bodyweight'], engine.WALK_CALORIES,
+                                    engine.BIKE_CALORIES, decimals=None)
+        group = engine.group_totals(individual, data['weights'], people_year, decimals=None)
+        for indicator in engine.INDICATORS:
+            np.testing.assert_allclose(annual[indicator][y], group[indicator].sum(axis=-1) * trajectory.DAYS,
+                                       rtol=1e-10)